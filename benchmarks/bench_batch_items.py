@@ -0,0 +1,61 @@
+# per-frame cost of moving 100k rectangles: one RectangleBatch vs Rectangle objects
+
+import os
+import tempfile
+import time
+
+import numpy
+
+# importing pywebuikit writes its page to PYWEBUIKIT_HTML_PATH, keep it out of the working tree
+os.environ.setdefault("PYWEBUIKIT_HTML_PATH", os.path.join(tempfile.gettempdir(), "pywebuikit_bench.html"))
+
+from pywebuikit import public_objects
+from pywebuikit.render import render_items
+from pywebuikit.render import batch_items
+
+N = 100000
+FRAMES = 20
+
+def per_frame(f) -> float:
+    st = time.perf_counter()
+    for i in range(FRAMES):
+        f(i)
+    return (time.perf_counter() - st) / FRAMES
+
+def main():
+    rng = numpy.random.default_rng(0)
+    batch = batch_items.RectangleBatch(
+        N,
+        x = rng.uniform(0, 1920, N), y = rng.uniform(0, 1080, N),
+        width = rng.uniform(2, 16, N), height = rng.uniform(2, 16, N)
+    )
+    batch.setColor(public_objects.Color(255, 128, 0))
+    vx = rng.uniform(-2, 2, N).astype(numpy.float32)
+    
+    def batch_frame(i):
+        batch.x += vx
+        numpy.mod(batch.x, 1920, out=batch.x)
+        batch.drawCode("ctx")
+    
+    items = [
+        render_items.Rectangle(float(x), float(y), float(w), float(h))
+        for x, y, w, h in zip(batch.x, batch.y, batch.width, batch.height)
+    ]
+    speeds = vx.tolist()
+    
+    def objects_frame(i):
+        for item, v in zip(items, speeds):
+            item.x = (item.x + v) % 1920
+        ",".join(f"ctx.fillRect({item.x},{item.y},{item.width},{item.height})" for item in items)
+    
+    batch_time = per_frame(batch_frame)
+    objects_time = per_frame(objects_frame)
+    payload = len(batch.drawCode("ctx"))
+    
+    print(f"{N} rectangles")
+    print(f"    {"RectangleBatch":<24}{batch_time * 1000:>10.2f} ms / frame, payload {payload / 1024 / 1024:.2f} MiB")
+    print(f"    {"Rectangle objects":<24}{objects_time * 1000:>10.2f} ms / frame")
+    print(f"    speedup {objects_time / batch_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
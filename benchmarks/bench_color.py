@@ -0,0 +1,145 @@
+# public_objects.Color against the overloaded Color it replaced (kept below as LegacyColor)
+#
+# the cases are what a frame loop does: build a color from a string or numbers, serialize it, change a channel
+
+import os
+import tempfile
+import timeit
+
+# importing pywebuikit writes its page to PYWEBUIKIT_HTML_PATH, keep it out of the working tree
+os.environ.setdefault("PYWEBUIKIT_HTML_PATH", os.path.join(tempfile.gettempdir(), "pywebuikit_bench.html"))
+
+from pywebuikit import jsbridge
+from pywebuikit import public_objects
+from pywebuikit._real_overload import overload, OverloadMeta
+
+numtype = public_objects.numtype
+
+class LegacyColor(metaclass=OverloadMeta):
+    checkvalue: bool = False
+    jstoint: bool = False
+    
+    @overload
+    def __init__(self, r: numtype, g: numtype, b: numtype, a: numtype = 1.0):
+        self.r = r
+        self.g = g
+        self.b = b
+        self.a = a
+    
+    @overload
+    def __init__(self, string: str):
+        if (
+            string.startswith("rgb")
+            or string.startswith("rgba")
+            or string.startswith("hsl")
+            or string.startswith("hsla")
+        ):
+            self._loadFunc(string)
+            return
+        
+        if string.startswith("#"): string = string[1:]
+        elif string.startswith("0x"): string = string[2:]
+        
+        if len(string) == 3 or len(string) == 4: string = "".join(x * 2 for x in string)
+        
+        r = int(string[0:2], 16)
+        g = int(string[2:4], 16)
+        b = int(string[4:6], 16)
+        a = 1.0 if len(string) < 8 else int(string[6:8], 16) / 255
+        self.__init__(r, g, b, a)
+    
+    def _loadFunc(self, rgbFunc: str):
+        rgbFunc = rgbFunc.replace(" ", "")
+        
+        if rgbFunc.startswith("rgb(") and rgbFunc.endswith(")"):
+            rgbFunc = rgbFunc[4:-1]
+            rgbFunc = rgbFunc.split(",")
+            
+            r = int(float(rgbFunc[0]))
+            g = int(float(rgbFunc[1]))
+            b = int(float(rgbFunc[2]))
+            a = 1.0
+        
+        elif rgbFunc.startswith("rgba(") and rgbFunc.endswith(")"):
+            rgbFunc = rgbFunc[5:-1]
+            rgbFunc = rgbFunc.split(",")
+            
+            r = int(float(rgbFunc[0]))
+            g = int(float(rgbFunc[1]))
+            b = int(float(rgbFunc[2]))
+            a = float(rgbFunc[3])
+        
+        elif rgbFunc.startswith("hsl(") and rgbFunc.endswith(")"):
+            rgbFunc = rgbFunc[4:-1]
+            rgbFunc = rgbFunc.split(",")
+            
+            h = float(rgbFunc[0])
+            s = float(rgbFunc[1])
+            l = float(rgbFunc[2])
+            
+            r, g, b, a = public_objects._hsl2rgb(h, s, l) + (1.0, )
+        
+        elif rgbFunc.startswith("hsla(") and rgbFunc.endswith(")"):
+            rgbFunc = rgbFunc[5:-1]
+            rgbFunc = rgbFunc.split(",")
+            
+            h = float(rgbFunc[0])
+            s = float(rgbFunc[1])
+            l = float(rgbFunc[2])
+            a = float(rgbFunc[3])
+            
+            r, g, b = public_objects._hsl2rgb(h, s, l)
+        
+        else:
+            raise ValueError("Invalid rgbFunc")
+        
+        self.__init__(r, g, b, a)
+    
+    def __pywebuikit_jseval__(self):
+        return (
+            f"'rgba({self.r}, {self.g}, {self.b}, {self.a})'"
+            
+            if not self.jstoint
+            else
+            
+            f"'rgba({int(self.r)}, {int(self.g)}, {int(self.b)}, {self.a})'"
+        )
+    
+    def __setattr__(self, n, v):
+        if not self.checkvalue:
+            return super().__setattr__(n, v)
+        
+        if n in ("r", "g", "b"):
+            v = v if (0 <= v <= 255) else (255 if v > 255 else 0)
+        elif n == "a":
+            v = v if (0 <= v <= 1) else (1 if v > 1 else 0)
+        
+        return super().__setattr__(n, v)
+
+CASES = {
+    "Color(\"rgba(...)\") + stringify": "stringify(Color(f\"rgba({i % 256}, 128, 0, 0.5)\"))",
+    "Color(\"#ff8000\")": "Color(\"#ff8000\")",
+    "Color(r, g, b, a)": "Color(255, 128, 0, 0.5)",
+    "stringify, unchanged color": "stringify(color)",
+    "set r + stringify": "color.r = i % 256; stringify(color)"
+}
+
+def bench(stmt: str, cls: type, number: int) -> float:
+    namespace = {"Color": cls, "color": cls(255, 128, 0, 0.5), "stringify": jsbridge.stringify_pyobj}
+    return min(timeit.repeat(f"i = (i + 1) % 64; {stmt}", "i = 0", globals=namespace, number=number, repeat=5)) / number * 1e9
+
+def main(number: int = 100000):
+    print(f"{"":<32}{"legacy":>12}{"Color":>12}")
+    for name, stmt in CASES.items():
+        legacy = bench(stmt, LegacyColor, number)
+        current = bench(stmt, public_objects.Color, number)
+        print(f"{name:<32}{legacy:>9.0f} ns{current:>9.0f} ns{legacy / current:>8.1f}x")
+    
+    number //= 10
+    current = min(timeit.repeat("Color.from_rgba(255, 128, 0, 0.5)", globals={"Color": public_objects.Color}, number=number, repeat=5)) / number * 1e9
+    packed = min(timeit.repeat("Color.from_packed_int(0xff8000)", globals={"Color": public_objects.Color}, number=number, repeat=5)) / number * 1e9
+    print(f"{"Color.from_rgba":<32}{"":>12}{current:>9.0f} ns")
+    print(f"{"Color.from_packed_int":<32}{"":>12}{packed:>9.0f} ns")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# getImageData / putImageData through evaluate_js results against the binary fserver path, needs a real window
+
+import os
+import tempfile
+import time
+
+import numpy
+
+# importing pywebuikit writes its page to PYWEBUIKIT_HTML_PATH, keep it out of the working tree
+os.environ.setdefault("PYWEBUIKIT_HTML_PATH", os.path.join(tempfile.gettempdir(), "pywebuikit_bench.html"))
+
+from pywebuikit import render
+from pywebuikit import webwindow
+
+SIZES = ((64, 64), (512, 512), (1920, 1080))
+REPEAT = 5
+
+def json_roundtrip(window: webwindow.WebWindow, width: int, height: int) -> float:
+    st = time.perf_counter()
+    for _ in range(REPEAT):
+        data = window.evaluate_js(f"Array.from(ctx.getImageData(0, 0, {width}, {height}).data);")
+        numpy.array(data, dtype=numpy.uint8).reshape(height, width, 4)
+    return (time.perf_counter() - st) / REPEAT
+
+def binary_roundtrip(rd: render.Context2DRender_Extended, width: int, height: int) -> float:
+    st = time.perf_counter()
+    for _ in range(REPEAT):
+        rd.getImageDataArray(0, 0, width, height)
+    return (time.perf_counter() - st) / REPEAT
+
+def binary_put(rd: render.Context2DRender_Extended, width: int, height: int) -> float:
+    pixels = numpy.random.default_rng(0).integers(0, 255, (height, width, 4), dtype=numpy.uint8)
+    st = time.perf_counter()
+    for _ in range(REPEAT):
+        rd.putImageDataArray(pixels, 0, 0)
+    return (time.perf_counter() - st) / REPEAT
+
+def main():
+    window = webwindow.WebWindow(1920, 1080, 0, 0)
+    rd = render.Context2DRender_Extended(window)
+    rd.create_mainCanvas()
+    
+    print(f"{"size":<12}{"json get":>12}{"binary get":>12}{"binary put":>12}  (ms)")
+    for width, height in SIZES:
+        print(
+            f"{f"{width}x{height}":<12}"
+            f"{json_roundtrip(window, width, height) * 1000:>12.1f}"
+            f"{binary_roundtrip(rd, width, height) * 1000:>12.1f}"
+            f"{binary_put(rd, width, height) * 1000:>12.1f}"
+        )
+    
+    window.desotroy()
+
+if __name__ == "__main__":
+    main()
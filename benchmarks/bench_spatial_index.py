@@ -0,0 +1,59 @@
+# spatial index build, update and query throughput at 10k and 100k items
+
+import os
+import tempfile
+import math
+import time
+import random
+
+# importing pywebuikit writes its page to PYWEBUIKIT_HTML_PATH, keep it out of the working tree
+os.environ.setdefault("PYWEBUIKIT_HTML_PATH", os.path.join(tempfile.gettempdir(), "pywebuikit_bench.html"))
+
+from pywebuikit.render import render_items
+from pywebuikit.render.spatial_index import SpatialGrid
+
+WORLD = 20000
+
+def make_items(n: int) -> list[render_items.Rectangle]:
+    rng = random.Random(n)
+    return [
+        render_items.Rectangle(rng.uniform(0, WORLD), rng.uniform(0, WORLD), rng.uniform(4, 64), rng.uniform(4, 64))
+        for _ in range(n)
+    ]
+
+def rate(f, number: int) -> float:
+    st = time.perf_counter()
+    for i in range(number):
+        f(i)
+    return number / (time.perf_counter() - st)
+
+def main():
+    for n in (10000, 100000):
+        items = make_items(n)
+        grid = SpatialGrid(cell_size=128)
+        rng = random.Random(0)
+        points = [(rng.uniform(0, WORLD), rng.uniform(0, WORLD)) for _ in range(1000)]
+        
+        st = time.perf_counter()
+        for item in items:
+            grid.insert(item, item.boundingBox())
+        build = time.perf_counter() - st
+        
+        def move(i):
+            item = items[i % n]
+            item.x += 3
+            grid.update(item, item.boundingBox())
+        
+        results = {
+            "update / sec": rate(move, 20000),
+            "query_point / sec": rate(lambda i: grid.query_point(*points[i % 1000]), 20000),
+            "query_rect 1280x720 / sec": rate(lambda i: grid.query_rect((*points[i % 1000], 1280, 720)), 2000),
+            "nearest / sec": rate(lambda i: grid.nearest(*points[i % 1000]), 5000)
+        }
+        
+        print(f"{n} items, build {build * 1000:.1f} ms")
+        for name, v in results.items():
+            print(f"    {name:<28}{v:>14,.0f}")
+
+if __name__ == "__main__":
+    main()
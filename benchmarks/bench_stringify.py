@@ -0,0 +1,32 @@
+# ops/sec of jsbridge serialization on realistic draw call argument lists
+
+import os
+import tempfile
+import timeit
+
+# importing pywebuikit writes its page to PYWEBUIKIT_HTML_PATH, keep it out of the working tree
+os.environ.setdefault("PYWEBUIKIT_HTML_PATH", os.path.join(tempfile.gettempdir(), "pywebuikit_bench.html"))
+
+from pywebuikit import jsbridge
+from pywebuikit import public_objects
+
+DRAW_CALLS = {
+    "rect(x, y, w, h)": (12.5, 40.0, 128.0, 64.0),
+    "arc(x, y, r, start, end, ccw)": (400.0, 300.0, 50.0, 0.0, 6.283185307179586, False),
+    "fillText(text, x, y)": ("score: 1024", 16.0, 32.0),
+    "drawImage(image, 8 numbers)": (jsbridge.HTMLImageElement("v_1"), 0, 0, 32, 32, 100.5, 200.5, 64.0, 64.0),
+    "setLineDash(segments)": ([4.0, 2.0, 1.0, 2.0], ),
+    "fillStyle = Color": (public_objects.Color(255, 128, 0, 0.5), )
+}
+
+def main(number: int = 20000):
+    for name, args in DRAW_CALLS.items():
+        t = min(timeit.repeat(
+            "iterable2jsarray(args, False)",
+            globals={"iterable2jsarray": jsbridge.iterable2jsarray, "args": args},
+            number=number, repeat=5
+        ))
+        print(f"{name:<32}{number / t:>14,.0f} ops/sec")
+
+if __name__ == "__main__":
+    main()
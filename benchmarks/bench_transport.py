@@ -0,0 +1,65 @@
+# evaluate_js bridge against the websocket transport, needs a real window
+#
+# commands/sec: frames of small canvas calls, MB/s: RectangleBatch payloads (base64 over the bridge, binary over the socket)
+
+import os
+import tempfile
+import time
+
+import numpy
+
+# importing pywebuikit writes its page to PYWEBUIKIT_HTML_PATH, keep it out of the working tree
+os.environ.setdefault("PYWEBUIKIT_HTML_PATH", os.path.join(tempfile.gettempdir(), "pywebuikit_bench.html"))
+
+from pywebuikit import render
+from pywebuikit import webwindow
+from pywebuikit.render import batch_items
+
+FRAMES = 50
+COMMANDS_PER_FRAME = 2000
+BATCH_SIZES = (1000, 100000)
+
+def commands_per_sec(window: webwindow.WebWindow, rd: render.Context2DRender_Extended) -> float:
+    st = time.perf_counter()
+    for _ in range(FRAMES):
+        with window.frame():
+            for i in range(COMMANDS_PER_FRAME):
+                rd.fillRect(i % 800, i % 600, 4, 4)
+    window.evaluate_js("null;") # waits for the socket traffic too
+    return FRAMES * COMMANDS_PER_FRAME / (time.perf_counter() - st)
+
+def megabytes_per_sec(window: webwindow.WebWindow, rd: render.Context2DRender_Extended, n: int) -> float:
+    rng = numpy.random.default_rng(n)
+    batch = batch_items.RectangleBatch(n, x=rng.uniform(0, 800, n), y=rng.uniform(0, 600, n), width=4, height=4)
+    size = len(batch.pack())
+    
+    st = time.perf_counter()
+    for _ in range(FRAMES):
+        rd.drawBatch(batch)
+    window.evaluate_js("null;")
+    return FRAMES * size / (time.perf_counter() - st) / 1024 / 1024
+
+def run(window: webwindow.WebWindow, rd: render.Context2DRender_Extended) -> dict[str, float]:
+    results = {"commands / sec": commands_per_sec(window, rd)}
+    for n in BATCH_SIZES:
+        results[f"MB/s, {n} rect batch"] = megabytes_per_sec(window, rd, n)
+    return results
+
+def main():
+    window = webwindow.WebWindow(800, 600, 100, 100)
+    rd = render.Context2DRender_Extended(window)
+    rd.create_mainCanvas()
+    
+    bridge = run(window, rd)
+    window.openTransport()
+    websocket = run(window, rd)
+    window.closeTransport()
+    
+    print(f"{"":<28}{"evaluate_js":>14}{"websocket":>14}")
+    for name in bridge:
+        print(f"{name:<28}{bridge[name]:>14,.1f}{websocket[name]:>14,.1f}{websocket[name] / bridge[name]:>9.1f}x")
+    
+    window.desotroy()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# main thread stalls while heavy frames are drawn, on the page against in the render worker, needs a real window
+#
+# python bench_worker.py        draws on the page
+# python bench_worker.py worker draws in the worker (create_mainCanvas(worker=True))
+#
+# a 4 ms interval timer on the page records its longest gap, that is how long input handling would have waited
+
+import os
+import tempfile
+import sys
+import time
+
+# importing pywebuikit writes its page to PYWEBUIKIT_HTML_PATH, keep it out of the working tree
+os.environ.setdefault("PYWEBUIKIT_HTML_PATH", os.path.join(tempfile.gettempdir(), "pywebuikit_bench.html"))
+
+from pywebuikit import render
+from pywebuikit import webwindow
+
+FRAMES = 30
+RECTS_PER_FRAME = 20000
+
+PROBE = """\
+r2probe = {last: performance.now(), gaps: []};
+setInterval(() => {
+    const now = performance.now();
+    r2probe.gaps.push(now - r2probe.last);
+    r2probe.last = now;
+}, 4);
+"""
+
+def main():
+    worker = sys.argv[1:] == ["worker"]
+    window = webwindow.WebWindow(800, 600, 100, 100)
+    rd = render.Context2DRender_Extended(window, cmdbuf=True)
+    rd.create_mainCanvas(worker=worker)
+    window.evaluate_js(PROBE)
+    
+    st = time.perf_counter()
+    for _ in range(FRAMES):
+        with window.frame():
+            rd.clear()
+            for i in range(RECTS_PER_FRAME):
+                rd.fillRectEx_BySize(i % 800, i * 7 % 600, 6, 6, f"rgb({i % 256}, 128, 64)")
+    rd.getAttribute("lineWidth") # waits until the drawing is done, in the worker too
+    elapsed = time.perf_counter() - st
+    
+    gaps = sorted(window.evaluate_js("r2probe.gaps;"))
+    print(f"{"worker" if worker else "page"}: {FRAMES / elapsed:.1f} frames/s, main thread gap p99 {gaps[int(len(gaps) * 0.99)]:.1f} ms, max {gaps[-1]:.1f} ms")
+    
+    window.desotroy()
+
+if __name__ == "__main__":
+    main()
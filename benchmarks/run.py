@@ -0,0 +1,206 @@
+# hot path benchmark suite on a headless window, runs anywhere python does
+#
+#   python benchmarks/run.py                          print throughput and allocations
+#   python benchmarks/run.py --save baseline.json     record a baseline
+#   python benchmarks/run.py --compare baseline.json  exit 1 when a case regressed
+
+import os
+import tempfile
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import typing
+
+# importing pywebuikit writes its page to PYWEBUIKIT_HTML_PATH, keep it out of the working tree
+os.environ.setdefault("PYWEBUIKIT_HTML_PATH", os.path.join(tempfile.gettempdir(), "pywebuikit_bench.html"))
+
+from pywebuikit import jsbridge
+from pywebuikit import public_objects
+from pywebuikit import render
+from pywebuikit import webwindow
+from pywebuikit._real_overload import overload, OverloadMeta
+
+class Case(typing.NamedTuple):
+    name: str
+    setup: typing.Callable[[], typing.Callable[[], typing.Any]]
+    number: int
+
+def headless_window() -> webwindow.WebWindow:
+    return webwindow.WebWindow(800, 600, 0, 0, backend=webwindow.HeadlessBackend(record=False))
+
+def setup_stringify():
+    args = (jsbridge.HTMLImageElement("v_1"), 0, 0, 32, 32, 100.5, 200.5, 64.0, 64.0)
+    return lambda: jsbridge.iterable2jsarray(args, False)
+
+def setup_call_method(cmdbuf: bool):
+    def setup():
+        window = headless_window()
+        rd = render.Context2DRender_Extended(window, cmdbuf=cmdbuf)
+        window.jsbatch.begin()
+        
+        def run():
+            rd.fillRect(12.5, 40.0, 128.0, 64.0)
+        
+        return run
+    return setup
+
+def setup_overload():
+    class Overloaded(metaclass=OverloadMeta):
+        @overload
+        def rect(self, x: float, y: float, width: float, height: float):
+            return x
+        
+        @overload
+        def rect(self, path: str):
+            return path
+    
+    o = Overloaded()
+    return lambda: o.rect(1.0, 2.0, 3.0, 4.0)
+
+def setup_color(string: str):
+    return lambda: lambda: public_objects.Color(string)
+
+def setup_color_stringify():
+    color = public_objects.Color(255, 128, 0, 0.5)
+    
+    def run():
+        color.r = 255
+        jsbridge.stringify_pyobj(color)
+    
+    return run
+
+def setup_gauge(recorded: bool):
+    def draw(rd: render.Context2DRender_Extended, angle: typing.Any, color: typing.Any):
+        with rd.savestate:
+            rd.translate(100, 100)
+            rd.rotate(angle)
+            for i in range(12):
+                rd.fillRectEx_BySize(-2, -80 + i, 4, 12, color)
+                rd.rotate(0.5235987755982988)
+            rd.drawLineEx(0, 0, 0, -70, 3, "red")
+    
+    def setup():
+        window = headless_window()
+        rd = render.Context2DRender_Extended(window)
+        window.jsbatch.begin()
+        
+        if not recorded:
+            return lambda: draw(rd, 0.5, "#ffffff")
+        
+        with rd.record("gauge") as rec:
+            draw(rd, rec.param("angle"), rec.param("color"))
+        return lambda: rd.play("gauge", angle=0.5, color="#ffffff")
+    return setup
+
+def setup_manager_render(state_tracking: bool):
+    def setup():
+        window = headless_window()
+        rd = render.Context2DRender_Extended(window, cmdbuf=True, state_tracking=state_tracking)
+        rdm = render.Canvas2DRenderManager(rd, [
+            render.render_items.Rectangle(i % 40 * 20, i // 40 * 20, 16, 16)
+            for i in range(1000)
+        ])
+        
+        def run():
+            with window.frame():
+                rdm.render(0.0)
+        
+        return run
+    return setup
+
+CASES = [
+    Case("stringify_pyobj drawImage args", setup_stringify, 20000),
+    Case("call_method batched", setup_call_method(False), 20000),
+    Case("call_method command buffer", setup_call_method(True), 20000),
+    Case("overload dispatch", setup_overload, 100000),
+    Case("Color parse #rrggbb", setup_color("#ff8000"), 20000),
+    Case("Color parse rgba()", setup_color("rgba(255, 128, 0, 0.5)"), 20000),
+    Case("Color set channel + stringify", setup_color_stringify, 20000),
+    Case("gauge widget, direct calls", setup_gauge(False), 2000),
+    Case("gauge widget, display list", setup_gauge(True), 2000),
+    Case("manager render 1000 rects", setup_manager_render(False), 20),
+    Case("manager render 1000 rects, shadow", setup_manager_render(True), 20)
+]
+
+def measure(case: Case, repeat: int) -> dict[str, float]:
+    f = case.setup()
+    number = case.number
+    
+    best = float("inf")
+    for _ in range(repeat):
+        st = time.perf_counter()
+        for _ in range(number):
+            f()
+        best = min(best, time.perf_counter() - st)
+    
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(number):
+            f()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        "ops_per_sec": number / best,
+        "peak_kib": (peak - before) / 1024,
+        "retained_bytes_per_op": max(0, after - before) / number
+    }
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], tolerance: float) -> list[str]:
+    regressions = []
+    
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {result["ops_per_sec"]:,.0f} ops/sec, baseline {base["ops_per_sec"]:,.0f}")
+        
+        # a few bytes of noise are normal, growing retention is not
+        if result["retained_bytes_per_op"] > base["retained_bytes_per_op"] * (1 + tolerance) + 8:
+            regressions.append(f"{name}: retains {result["retained_bytes_per_op"]:.1f} B/op, baseline {base["retained_bytes_per_op"]:.1f}")
+    
+    return regressions
+
+def main(argv: list[str]|None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filter", default="", help="only run cases containing this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 is 25%%")
+    args = parser.parse_args(argv)
+    
+    results = {}
+    print(f"{"case":<34}{"ops/sec":>14}{"peak KiB":>12}{"retained B/op":>16}")
+    for case in CASES:
+        if args.filter not in case.name:
+            continue
+        
+        result = results[case.name] = measure(case, args.repeat)
+        print(f"{case.name:<34}{result["ops_per_sec"]:>14,.0f}{result["peak_kib"]:>12.1f}{result["retained_bytes_per_op"]:>16.1f}")
+    
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "results": results}, f, indent=4)
+    
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"regression: {line}")
+        if regressions:
+            return 1
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,11 @@ from . import (
     jsapi,
     jsbridge,
     jscodes,
+    preloader,
     public_objects,
     render,
+    respack,
+    telemetry,
     webwindow
 )
 
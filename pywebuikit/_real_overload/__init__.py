@@ -1,12 +1,16 @@
 # copy from https://juejin.cn/post/7021911561459466254, modified & fix bugs by qaqFei
 
 import inspect
+import types
+import typing
 from typing import get_type_hints
 
 class OverloadList(list): ...
 class NoMatchingOverload(Exception): ...
 
 _MISSING = object()
+_KWARGS_KEY = object()
+_CACHE_MAXSIZE = 1024
 
 class OverloadDict(dict):
     def __setitem__(self, key, value):
@@ -31,61 +35,41 @@ class OverloadDict(dict):
     def _errmsg(key):
         return f"must mark all overloads with @overload: {key}"
     
-class BoundOverloadDispatcher:
-    def __init__(self, instance, owner_cls, name, overload_list, signatures):
-        self.instance = instance
-        self.owner_cls = owner_cls
-        self.name = name
-        self.overload_list = overload_list
-        self.signatures = signatures
+_placeholder_types: set[type] = set()
 
-    def best_match(self, *args, **kwargs):
-        for f, sig in zip(self.overload_list, self.signatures):
-            try:
-                bound_args = sig.bind(self.instance, *args, **kwargs)
-            except TypeError:
-                pass  # missing/extra/unexpected args or kwargs
-            else:
-                bound_args.apply_defaults()
-                # just for demonstration, use the first one that matches
-                if _signature_matches(sig, bound_args):
-                    return f
-
-        raise NoMatchingOverload()
-
-    def __call__(self, *args, **kwargs):
-        try:
-            f = self.best_match(*args, **kwargs)
-        except NoMatchingOverload:
-            pass
-        else:
-            return f(self.instance, *args, **kwargs)
+def register_placeholder(cls: type) -> type:
+    """
+    instances of cls match any type hint, for values which stand in for one given later
+    """
+    
+    _placeholder_types.add(cls)
+    return cls
+
+def _matches_any_hint(obj):
+    return type(obj) in _placeholder_types
 
-        # no matching overload in owner class, check next in line
-        super_instance = super(self.owner_cls, self.instance)
-        super_call = getattr(super_instance, self.name, _MISSING)
-        if super_call is not _MISSING:
-            return super_call(*args, **kwargs)
-        else:
-            raise NoMatchingOverload()
-            
 def _type_hint_matches(obj, hint):
-    # only works with concrete types, not things like Optional
-    return hint is inspect.Parameter.empty or isinstance(obj, hint)
-
-def _signature_matches(sig: inspect.Signature, bound_args: inspect.BoundArguments):
-    # doesn't handle type hints on *args or **kwargs
-    for name, arg in bound_args.arguments.items():
-        param = sig.parameters[name]
-        hint = param.annotation
-        if not _type_hint_matches(arg, hint):
-            return False
-    return True
+    # only works with concrete types and Literal, not things like Optional
+    if hint is inspect.Parameter.empty or _matches_any_hint(obj):
+        return True
+    if typing.get_origin(hint) is typing.Literal:
+        return obj in typing.get_args(hint)
+    return isinstance(obj, hint)
+
+def _literal_params(sig: inspect.Signature) -> frozenset[str]:
+    # Literal hints match by value, so they are checked on every call instead of in the cached lookup
+    return frozenset(
+        name
+        for name, param in sig.parameters.items()
+        if typing.get_origin(param.annotation) is typing.Literal
+    )
 
 class Overload:
     def __set_name__(self, owner, name):
         self.owner = owner
         self.name = name
+        self.dispatcher.__name__ = name
+        self.dispatcher.__qualname__ = f"{owner.__qualname__}.{name}"
 
     def __init__(self, overload_list):
         if not isinstance(overload_list, OverloadList):
@@ -105,6 +89,10 @@ class Overload:
                     if name != "self":
                         raise e
             self.signatures.append(sig)
+        
+        self._cache: dict[tuple, tuple] = {}
+        self._literals = [_literal_params(sig) for sig in self.signatures]
+        self.dispatcher = self._make_dispatcher()
 
     def __repr__(self):
         return f"{self.__class__.__qualname__}({self.overload_list!r})"
@@ -112,17 +100,86 @@ class Overload:
     def __get__(self, instance, _owner=None):
         if instance is None:
             return self
-        # don't use owner == type(instance)
-        # we want self.owner, which is the class from which get is being called
-        return BoundOverloadDispatcher(
-            instance, self.owner, self.name, self.overload_list, self.signatures
-        )
+        return types.MethodType(self.dispatcher, instance)
 
+    def _make_dispatcher(self):
+        cache = self._cache
+        
+        def dispatcher(instance, *args, **kwargs):
+            # the overloads which can match are cached by call shape: argument types and keyword names,
+            # the values of arguments with a Literal hint are checked on every call
+            key = tuple([type(a) for a in args])
+            if kwargs:
+                key = (_KWARGS_KEY, key, tuple(kwargs), tuple([type(v) for v in kwargs.values()]))
+            
+            candidates = cache.get(key)
+            if candidates is None:
+                candidates = self.candidates(instance, *args, **kwargs)
+                if len(cache) >= _CACHE_MAXSIZE:
+                    cache.clear()
+                cache[key] = candidates
+            
+            for f, checks in candidates:
+                for where, values in checks:
+                    if (args[where] if type(where) is int else kwargs[where]) not in values:
+                        break
+                else:
+                    return f(instance, *args, **kwargs)
+
+            # no matching overload in owner class, check next in line
+            # don't use owner == type(instance)
+            # we want self.owner, which is the class from which get is being called
+            super_instance = super(self.owner, instance)
+            super_call = getattr(super_instance, self.name, _MISSING)
+            if super_call is not _MISSING:
+                return super_call(*args, **kwargs)
+            else:
+                raise NoMatchingOverload()
+        
+        return dispatcher
+    
+    def candidates(self, instance, *args, **kwargs) -> tuple:
+        """
+        the overloads matching the argument types, in order, with the Literal checks left for each call:
+        ((f, ((position or keyword, allowed values), ...)), ...)
+        """
+        
+        result = []
+        for f, sig, literals in zip(self.overload_list, self.signatures, self._literals):
+            try:
+                bound_args = sig.bind(instance, *args, **kwargs)
+            except TypeError:
+                continue  # missing/extra/unexpected args or kwargs
+            bound_args.apply_defaults()
+            
+            checks = []
+            for index, (name, param) in enumerate(sig.parameters.items()):
+                arg = bound_args.arguments[name]
+                deferred = (
+                    name in literals
+                    and not _matches_any_hint(arg)
+                    and param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY)
+                )
+                
+                if deferred and name in kwargs:
+                    checks.append((name, typing.get_args(param.annotation)))
+                elif deferred and 0 < index <= len(args):
+                    checks.append((index - 1, typing.get_args(param.annotation)))
+                elif not _type_hint_matches(arg, param.annotation):
+                    # also defaults, which are the same on every call
+                    break
+            else:
+                result.append((f, tuple(checks)))
+        
+        return tuple(result)
+    
     def extend(self, other):
         if not isinstance(other, Overload):
             raise TypeError
         self.overload_list.extend(other.overload_list)
         self.signatures.extend(other.signatures)
+        self._literals = [_literal_params(sig) for sig in self.signatures]
+        self._cache.clear()
 
 class OverloadMeta(type):
     @classmethod
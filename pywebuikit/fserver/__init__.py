@@ -1,19 +1,192 @@
 from __future__ import annotations
+import re
+import mimetypes
+import traceback
 import http.server
+import urllib.parse
 
+from ..fserver import providers
+from ..fserver.providers import (
+    Resource, BytesResource, FileResource,
+    ResourceProvider, BytesProvider, FileProvider, DirectoryProvider, ZipProvider, GeneratedProvider
+)
 from .. import webwindow
 
+# the page keeps a copy and revalidates it with If-None-Match, which is a cheap 304
+CACHE_CONTROL = "no-cache"
+
+# larger uploads are refused before their body is read
+MAX_UPLOAD_SIZE = 1 << 30
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+def content_type(path: str) -> str:
+    guessed, _ = mimetypes.guess_type(path, strict=False)
+    return guessed or "application/octet-stream"
+
 def make_fsh(cv: webwindow.WebWindow):
+    bytes_provider = BytesProvider(cv.fserver_res)
+    
+    def open_resource(raw_path: str, path: str) -> Resource|None:
+        # fserver_res first (with the query, then without), then the registered providers in order
+        resource = bytes_provider.open(raw_path)
+        if resource is None and raw_path != path:
+            resource = bytes_provider.open(path)
+        
+        for provider in cv.fserver_providers:
+            if resource is not None:
+                break
+            resource = provider.open(path)
+        
+        return resource
+    
     class _FileServerHandler(http.server.BaseHTTPRequestHandler):
-        def do_GET(self):
-            self.send_response(200)
-            self.send_header("Content-type", "image/png")
+        protocol_version = "HTTP/1.1"
+        
+        def send_cors_headers(self):
             self.send_header("Access-Control-Allow-Origin", "*")
             self.send_header("Access-Control-Allow-Methods", "*")
-            self.send_header("Access-Control-Allow-Headers", "Authorization, Content-Type")
+            self.send_header("Access-Control-Allow-Headers", "Authorization, Content-Type, Range")
+            self.send_header("Access-Control-Expose-Headers", "Content-Length, Content-Range, ETag")
+        
+        def send_empty(self, code: int, *headers: tuple[str, str]):
+            self.send_response(code)
+            self.send_cors_headers()
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        
+        def parse_range(self, size: int) -> tuple[int, int]|None|bool:
+            # (start, end) inclusive, None for the whole resource, False when unsatisfiable
+            match = _RANGE.match(self.headers.get("Range", "").replace(" ", ""))
+            if match is None:
+                return None
+            
+            start, end = match.groups()
+            if not start and not end:
+                return None
+            
+            if not start:
+                length = int(end)
+                if length == 0 or size == 0:
+                    return False
+                return (max(0, size - length), size - 1)
+            
+            start = int(start)
+            end = size - 1 if not end else min(int(end), size - 1)
+            if start >= size or start > end:
+                return False
+            return (start, end)
+        
+        def serve(self, body: bool):
+            path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+            resource = open_resource(self.path, path)
+            
+            if resource is None:
+                self.send_empty(404)
+                return
+            
+            try:
+                self.send_resource(resource, path, body)
+            finally:
+                resource.close()
+        
+        def send_resource(self, resource: Resource, path: str, body: bool):
+            etag = resource.etag
+            size = resource.size
+            
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match is not None and (if_none_match.strip() == "*" or etag in (i.strip() for i in if_none_match.split(","))):
+                self.send_empty(304, ("ETag", etag), ("Cache-Control", CACHE_CONTROL))
+                return
+            
+            byte_range = self.parse_range(size)
+            if_range = self.headers.get("If-Range")
+            if if_range is not None and if_range.strip() != etag:
+                byte_range = None
+            
+            if byte_range is False:
+                self.send_empty(416, ("Content-Range", f"bytes */{size}"))
+                return
+            
+            start, end = (0, size - 1) if byte_range is None else byte_range
+            
+            self.send_response(200 if byte_range is None else 206)
+            self.send_cors_headers()
+            self.send_header("Content-Type", content_type(path))
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_CONTROL)
+            if byte_range is not None:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
             self.end_headers()
-            self.wfile.write(cv.fserver_res.get(self.path))
+            
+            if body and size:
+                resource.write(self.connection, self.wfile, start, end)
+        
+        def do_GET(self):
+            self.serve(True)
+        
+        def do_HEAD(self):
+            self.serve(False)
+        
+        def do_POST(self):
+            # uploads from the page, handled by window.fserver_uploads[path](body)
+            path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+            handler = cv.fserver_uploads.get(path)
+            if handler is None:
+                self.close_connection = True
+                self.send_empty(404)
+                return
+            
+            length = self.headers.get("Content-Length")
+            if length is None:
+                self.close_connection = True
+                self.send_empty(411)
+                return
+            
+            try:
+                size = int(length)
+            except ValueError:
+                size = -1
+            
+            if size < 0:
+                self.close_connection = True
+                self.send_empty(400)
+                return
+            
+            if size > MAX_UPLOAD_SIZE:
+                self.close_connection = True
+                self.send_empty(413)
+                return
+            
+            body = bytearray(size)
+            view = memoryview(body)
+            received = 0
+            while received < len(body):
+                n = self.rfile.readinto(view[received:])
+                if not n:
+                    self.close_connection = True
+                    self.send_empty(400)
+                    return
+                received += n
+            
+            try:
+                handler(body)
+            except Exception:
+                # the page gets a status instead of a dropped connection, the error still goes to stderr
+                self.log_error("upload handler for %s failed:\n%s", path, traceback.format_exc())
+                self.close_connection = True
+                self.send_empty(500)
+                return
+            
+            self.send_empty(204)
+        
+        def do_OPTIONS(self):
+            self.send_empty(204)
         
         def log_request(self, *args, **kwargs) -> None: ...
     
-    return _FileServerHandler
\ No newline at end of file
+    return _FileServerHandler
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import os
+import mmap
+import socket
+import struct
+import typing
+import hashlib
+import zipfile
+import threading
+import collections
+import posixpath
+from abc import ABC, abstractmethod
+
+class Resource(ABC):
+    """
+    one open resource for one response, write() sends bytes [start, end] of it
+    """
+    
+    def __init__(self, size: int, etag: str):
+        self.size = size
+        self.etag = etag
+    
+    @abstractmethod
+    def write(self, connection: socket.socket, wfile: typing.BinaryIO, start: int, end: int) -> None: ...
+    
+    def close(self) -> None: ...
+
+class BytesResource(Resource):
+    def __init__(self, data: bytes, etag: str|None = None):
+        super().__init__(len(data), f"\"{hashlib.blake2b(data, digest_size=16).hexdigest()}\"" if etag is None else etag)
+        self.data = data
+    
+    def write(self, connection: socket.socket, wfile: typing.BinaryIO, start: int, end: int) -> None:
+        wfile.write(memoryview(self.data)[start:end + 1])
+
+class FileResource(Resource):
+    """
+    a file (or a slice of one, for stored zip members) sent with os.sendfile,
+    or from a mmap where sendfile does not exist, the content never passes through python objects
+    """
+    
+    def __init__(self, path: str, offset: int = 0, size: int|None = None, etag: str|None = None):
+        self.file = open(path, "rb")
+        self.offset = offset
+        
+        try:
+            st = os.fstat(self.file.fileno())
+        except OSError:
+            self.file.close()
+            raise
+        
+        size = st.st_size - offset if size is None else size
+        super().__init__(size, f"\"{st.st_mtime_ns:x}-{st.st_size:x}-{offset:x}\"" if etag is None else etag)
+    
+    def write(self, connection: socket.socket, wfile: typing.BinaryIO, start: int, end: int) -> None:
+        count = end - start + 1
+        if count <= 0:
+            return
+        
+        if hasattr(os, "sendfile"):
+            connection.sendfile(self.file, self.offset + start, count)
+            return
+        
+        with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                wfile.write(view[self.offset + start:self.offset + start + count])
+    
+    def close(self) -> None:
+        self.file.close()
+
+class ResourceProvider(ABC):
+    """
+    maps url paths to resources, open() is called for every request and returns None for unknown paths,
+    providers load lazily, nothing is read before a path is requested
+    """
+    
+    @abstractmethod
+    def open(self, path: str) -> Resource|None: ...
+    
+    def close(self) -> None: ...
+
+def _relative(prefix: str, path: str) -> str|None:
+    # the part of path under prefix, None when it is outside or tries to leave it
+    prefix = prefix.rstrip("/") + "/"
+    if not path.startswith(prefix):
+        return None
+    
+    relative = posixpath.normpath(path[len(prefix):])
+    if relative.startswith("..") or relative.startswith("/") or relative == ".":
+        return None
+    return relative
+
+class BytesProvider(ResourceProvider):
+    """
+    serves a dict of path -> bytes, this is how window.fserver_res is served
+    """
+    
+    def __init__(self, resources: dict[str, bytes]):
+        self.resources = resources
+        self._etags: dict[str, tuple[bytes, str]] = {}
+    
+    def open(self, path: str) -> Resource|None:
+        data = self.resources.get(path)
+        if data is None:
+            return None
+        
+        cached = self._etags.get(path)
+        if cached is not None and cached[0] is data:
+            return BytesResource(data, cached[1])
+        
+        resource = BytesResource(data)
+        self._etags[path] = (data, resource.etag)
+        return resource
+
+class FileProvider(ResourceProvider):
+    def __init__(self, url_path: str, file_path: str):
+        self.url_path = url_path
+        self.file_path = file_path
+    
+    def open(self, path: str) -> Resource|None:
+        if path != self.url_path:
+            return None
+        
+        try:
+            return FileResource(self.file_path)
+        except OSError:
+            return None
+
+class DirectoryProvider(ResourceProvider):
+    def __init__(self, prefix: str, root: str):
+        self.prefix = prefix
+        self.root = os.path.abspath(root)
+    
+    def open(self, path: str) -> Resource|None:
+        relative = _relative(self.prefix, path)
+        if relative is None:
+            return None
+        
+        # on windows a part like "..\\x" or "c:x" would leave the root after the join
+        file_path = os.path.abspath(os.path.join(self.root, *relative.split("/")))
+        if not file_path.startswith(os.path.join(self.root, "")) or not os.path.isfile(file_path):
+            return None
+        
+        try:
+            return FileResource(file_path)
+        except OSError:
+            return None
+
+class ZipProvider(ResourceProvider):
+    """
+    members of a zip archive, stored members are sent straight from the archive file,
+    compressed members are inflated per request
+    """
+    
+    def __init__(self, prefix: str, zip_path: str):
+        self.prefix = prefix
+        self.zip_path = zip_path
+        self._zip: zipfile.ZipFile|None = None
+        self._data_offsets: dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def _get_zip(self) -> zipfile.ZipFile:
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.zip_path)
+        return self._zip
+    
+    def _data_offset(self, info: zipfile.ZipInfo) -> int:
+        offset = self._data_offsets.get(info.filename)
+        if offset is None:
+            # the local header has its own name and extra lengths
+            with open(self.zip_path, "rb") as f:
+                f.seek(info.header_offset)
+                header = f.read(30)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            offset = self._data_offsets[info.filename] = info.header_offset + 30 + name_length + extra_length
+        return offset
+    
+    def open(self, path: str) -> Resource|None:
+        relative = _relative(self.prefix, path)
+        if relative is None:
+            return None
+        
+        with self._lock:
+            zf = self._get_zip()
+            try:
+                info = zf.getinfo(relative)
+            except KeyError:
+                return None
+            
+            etag = f"\"{info.CRC:08x}-{info.file_size:x}\""
+            if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                return FileResource(self.zip_path, self._data_offset(info), info.file_size, etag)
+        
+        return BytesResource(zf.read(info), etag)
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+                self._zip = None
+
+class GeneratedProvider(ResourceProvider):
+    """
+    generate(path) returns the bytes of path or None, called on the first request,
+    the last cache_size results are kept
+    """
+    
+    def __init__(self, prefix: str, generate: typing.Callable[[str], bytes|None], cache_size: int = 64):
+        self.prefix = prefix
+        self.generate = generate
+        self.cache_size = cache_size
+        self._cache: collections.OrderedDict[str, BytesResource] = collections.OrderedDict()
+        self._lock = threading.Lock()
+    
+    def open(self, path: str) -> Resource|None:
+        if _relative(self.prefix, path) is None:
+            return None
+        
+        with self._lock:
+            resource = self._cache.get(path)
+            if resource is not None:
+                self._cache.move_to_end(path)
+                return resource
+        
+        data = self.generate(path)
+        if data is None:
+            return None
+        
+        resource = BytesResource(data)
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[path] = resource
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return resource
+    
+    def invalidate(self, path: str|None = None) -> None:
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(path, None)
@@ -1,8 +1,14 @@
 import typing
+import itertools
+import threading
 
 class JsApi:
     def __init__(self) -> None:
         self.things: dict[str, typing.Any] = {}
+        self._requests: dict[int, typing.Callable[[bool, typing.Any], typing.Any]] = {}
+        self._request_ids = itertools.count()
+        self._requests_lock = threading.Lock()
+        self.canvas_resets = 0
     
     def get_thing(self, name: str):
         return self.things[name]
@@ -18,4 +24,28 @@ class JsApi:
     
     def call_attr(self,name: str, *args, **kwargs):
         return getattr(self, name)(*args, **kwargs)
-    
\ No newline at end of file
+    
+    def canvas_reset(self):
+        # called by the page when a resize reset the main canvas context, renderers tracking its state compare the count
+        self.canvas_resets += 1
+    
+    def register_request(self, callback: typing.Callable[[bool, typing.Any], typing.Any]) -> int:
+        """
+        callback(ok, value) is called once, when the page calls settle_request with the returned id
+        """
+        
+        with self._requests_lock:
+            rid = next(self._request_ids)
+            self._requests[rid] = callback
+        return rid
+    
+    def cancel_request(self, rid: int) -> None:
+        with self._requests_lock:
+            self._requests.pop(rid, None)
+    
+    def settle_request(self, rid: int, ok: bool, value: typing.Any = None):
+        with self._requests_lock:
+            callback = self._requests.pop(rid, None)
+        
+        if callback is not None:
+            callback(ok, value)
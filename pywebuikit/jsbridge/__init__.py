@@ -174,39 +174,118 @@ drawable_type = (
     | VideoFrame
 )
 
-def stringify_pyobj(o: pyobj_sifytype) -> str:
-    if isinstance(o, PyWebUIKitJsEvalable):
-        return o.__pywebuikit_jseval__()
-    
-    elif isinstance(o, str):
-        return webwindow.StringProcesser.replaceString2CodeEval(o)
-    elif isinstance(o, int):
-        return str(o)
-    elif isinstance(o, float):
-        return str(o)
-    elif isinstance(o, bool):
-        return str(o).lower()
-    
-    elif isinstance(o, typing.Iterable):
-        return f"[{",".join(stringify_pyobj(i) for i in o)}]"
-    elif isinstance(o, typing.Mapping):
-        return f"{"{"}{",".join(f"{webwindow.StringProcesser.replaceString2CodeEval(key)}:{stringify_pyobj(value)}" for key, value in o.items())}{"}"}"
-    
-    elif isinstance(o, type(None)):
-        return "null"
+serializerType = typing.Callable[[typing.Any], str]
+
+_NUMBER_TYPES = frozenset((int, float))
+_NONFINITE_FLOATS = {"inf": "Infinity", "-inf": "-Infinity", "nan": "NaN"}
+
+def _stringify_float(o: float) -> str:
+    r = float.__repr__(o)
+    return _NONFINITE_FLOATS.get(r, r)
+
+def _join_items(seq: tuple|list) -> str:
+    # fast path for draw call arguments, which are nearly always plain numbers,
+    # finite int / float reprs never contain "n" (inf, nan)
+    if _NUMBER_TYPES.issuperset(map(type, seq)):
+        result = ",".join(map(repr, seq))
+        if "n" not in result:
+            return result
     
+    return ",".join([stringify_pyobj(i) for i in seq])
+
+def _stringify_sequence(o: tuple|list) -> str:
+    return f"[{_join_items(o)}]"
+
+def _stringify_iterable(o: typing.Iterable) -> str:
+    return f"[{_join_items(tuple(o))}]"
+
+def _stringify_mapping(o: typing.Mapping) -> str:
+    items = ",".join(
+        f"{webwindow.StringProcesser.replaceString2CodeEval(str(key))}:{stringify_pyobj(value)}"
+        for key, value in o.items()
+    )
+    return "{" + items + "}"
+
+_serializers: dict[type, serializerType] = {
+    str: webwindow.StringProcesser.replaceString2CodeEval,
+    bool: lambda o: "true" if o else "false",
+    int: int.__repr__,
+    float: _stringify_float,
+    type(None): lambda o: "null",
+    tuple: _stringify_sequence,
+    list: _stringify_sequence,
+    dict: _stringify_mapping
+}
+
+_serializer_cache: dict[type, serializerType] = {}
+
+def _resolve_serializer(t: type) -> serializerType:
+    if t in _serializers:
+        serializer = _serializers[t]
+    elif hasattr(t, "__pywebuikit_jseval__"):
+        serializer = t.__pywebuikit_jseval__
     else:
-        raise TypeError(f"Unsupported type {type(o)}")
+        serializer = next((_serializers[base] for base in t.__mro__ if base in _serializers), None)
+    
+    if serializer is None:
+        if issubclass(t, typing.Mapping):
+            serializer = _stringify_mapping
+        elif issubclass(t, typing.Iterable):
+            serializer = _stringify_iterable
+        else:
+            raise TypeError(f"Unsupported type {t}")
+    
+    _serializer_cache[t] = serializer
+    return serializer
+
+def register_serializer(t: type, serializer: serializerType) -> None:
+    """
+    register a serializer for t and its subclasses,
+    serializer takes the object and returns a js expression
+    """
+    
+    _serializers[t] = serializer
+    _serializer_cache.clear()
+
+def unregister_serializer(t: type) -> None:
+    _serializers.pop(t, None)
+    _serializer_cache.clear()
+
+def stringify_pyobj(o: pyobj_sifytype) -> str:
+    t = type(o)
+    serializer = _serializer_cache.get(t)
+    if serializer is None:
+        serializer = _resolve_serializer(t)
+    return serializer(o)
 
 def iterable2jsarray(iterableObject: typing.Iterable[pyobj_sifytype], hasbracket: bool = True) -> str:
-    result = ",".join(stringify_pyobj(i) for i in iterableObject)
+    if type(iterableObject) is not tuple and type(iterableObject) is not list:
+        iterableObject = tuple(iterableObject)
+    
+    result = _join_items(iterableObject)
     return f"[{result}]" if hasbracket else result
 
+def createImagesByUrl(window: webwindow.WebWindow, urls: typing.Iterable[str]):
+    """
+    starts all loads with one bridge call,
+    the promise resolves with the images in order once all of them are loaded,
+    and rejects if any of them fails
+    """
+    
+    urls = list(urls)
+    names = [f"v_{random.randint(0, 2 << 31)}" for _ in urls]
+    promise: public_objects.pythonPromise[list[HTMLImageElement]] = public_objects.pythonPromise()
+    
+    def _settle(ok: bool, value: typing.Any):
+        if ok: promise.resolve([HTMLImageElement(name) for name in names])
+        else: promise.reject(value)
+    
+    rid = window.jsapi.register_request(_settle)
+    window.evaluate_js(f"r2loadimages({rid}, {iterable2jsarray(names)}, {iterable2jsarray(urls)});")
+    return promise
+
 def createImageByUrl(window: webwindow.WebWindow, url: str):
-    tid = random.randint(0, 2 << 31)
-    promise: public_objects.pythonPromise[HTMLImageElement] = public_objects.pythonPromise()
-    window.jsapi.set_attr(f"v_{tid}", lambda: promise.resolve(HTMLImageElement(f"v_{tid}")))
-    window.evaluate_js(f"v_{tid} = new Image(); v_{tid}.onload = () => pywebview.api.call_attr('v_{tid}'); v_{tid}.src = {stringify_pyobj(url)};")
+    promise: public_objects.pythonPromise[HTMLImageElement] = createImagesByUrl(window, (url, )).then(lambda images: images[0])
     return promise
 
 def setFilter(window: webwindow.WebWindow, webfilterset: WebFilterSet, element: Element):
@@ -21,12 +21,38 @@ resizeCanvas = () => {
     cv.width = window.innerWidth;
     cv.height = window.innerHeight;
     ctx.reset();
+    pywebview.api.canvas_reset();
 };
 
 resizeCanvas();
 window.addEventListener("resize", resizeCanvas);
 """
 
+create_2DCanvas_worker = """\
+cv = document.createElement("canvas");
+
+cv.className = "main-canvas";
+document.body.appendChild(cv);
+cv.width = window.innerWidth;
+cv.height = window.innerHeight;
+r2worker_start(cv.transferControlToOffscreen());
+
+createCanvas2DHook = (method, hook) => {
+    r2worker_eval(`createCanvas2DHook(${JSON.stringify(method)}, ${hook});`);
+}
+
+createCanvas2DMethod = (method, func) => {
+    r2worker_eval(`createCanvas2DMethod(${JSON.stringify(method)}, ${func});`);
+}
+
+resizeCanvas = () => {
+    r2worker_post({type: "resize", width: window.innerWidth, height: window.innerHeight});
+    pywebview.api.canvas_reset();
+};
+
+window.addEventListener("resize", resizeCanvas);
+"""
+
 c2d_extend = """\
 // createCanvas2DHook('drawImage', (t, f, ...args) => {
 //     if (t.globalAlpha != 0.0) return f(...args);
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import heapq
+import random
+import typing
+import itertools
+import threading
+import concurrent.futures
+
+from .. import jsbridge
+from .. import public_objects
+
+if typing.TYPE_CHECKING:
+    from .. import webwindow
+
+decodeModeType = typing.Literal["bitmap", "image"]
+
+class PreloadHandle(public_objects.pythonPromise[jsbridge.ImageBitmap|jsbridge.HTMLImageElement]):
+    """
+    resolves with the decoded image once it can be drawn without a decode stall,
+    cancel() drops it from the queue or aborts it on the page
+    """
+    
+    def __init__(self, url: str, priority: float, name: str):
+        super().__init__()
+        self.url = url
+        self.priority = priority
+        self.name = name
+        self.width: int|None = None
+        self.height: int|None = None
+        self._entry: list|None = None
+
+class Preloader:
+    """
+    loads urls highest priority first (first come first served within a priority),
+    with at most max_concurrent loads in flight on the page,
+    mode "bitmap" fetches and decodes with createImageBitmap off the main thread and gives ImageBitmaps,
+    mode "image" loads an Image and waits for img.decode(),
+    on_progress(progress) is called after every load finishes, fails or is cancelled
+    """
+    
+    def __init__(
+        self,
+        window: webwindow.WebWindow,
+        max_concurrent: int = 6,
+        mode: decodeModeType = "bitmap",
+        on_progress: typing.Callable[[dict[str, typing.Any]], typing.Any]|None = None
+    ):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        
+        self.window = window
+        self.max_concurrent = max_concurrent
+        self.mode = mode
+        self.on_progress = on_progress
+        self.stats: dict[str, int] = {"total": 0, "loaded": 0, "failed": 0, "cancelled": 0}
+        
+        self._lock = threading.Lock()
+        self._queue: list[list] = []
+        self._queued = 0
+        self._seq = itertools.count()
+        self._in_flight: dict[PreloadHandle, int] = {}
+        self._pending: set[PreloadHandle] = set()
+        self._pumping = False
+    
+    @property
+    def progress(self) -> dict[str, typing.Any]:
+        with self._lock:
+            finished = self.stats["loaded"] + self.stats["failed"] + self.stats["cancelled"]
+            return {
+                **self.stats,
+                "queued": self._queued,
+                "in_flight": len(self._in_flight),
+                "fraction": finished / self.stats["total"] if self.stats["total"] else 1.0
+            }
+    
+    def load(self, url: str, priority: float = 0) -> PreloadHandle:
+        return self.loadMany(((url, priority), ))[0]
+    
+    def loadMany(self, urls: typing.Iterable[str|tuple[str, float]], priority: float = 0) -> list[PreloadHandle]:
+        """
+        urls are urls or (url, priority), all of them are queued before the first load starts
+        """
+        
+        handles = []
+        with self._lock:
+            for url in urls:
+                url, url_priority = (url, priority) if isinstance(url, str) else url
+                handle = PreloadHandle(url, url_priority, f"preload_{random.randint(0, 2 << 31)}")
+                self.stats["total"] += 1
+                self._pending.add(handle)
+                self._push(handle)
+                handles.append(handle)
+        
+        for handle in handles:
+            handle.add_done_callback(self._on_done)
+        
+        self._pump()
+        return handles
+    
+    def setPriority(self, handle: PreloadHandle, priority: float) -> None:
+        # only affects loads which have not started yet
+        with self._lock:
+            if handle._entry is None:
+                return
+            
+            handle._entry[2] = None
+            self._queued -= 1
+            handle.priority = priority
+            self._push(handle)
+    
+    def cancelAll(self) -> None:
+        # queued first, so cancelled loads in flight do not start the queued ones
+        with self._lock:
+            handles = sorted(self._pending, key=lambda handle: handle in self._in_flight)
+        
+        for handle in handles:
+            handle.cancel()
+    
+    def wait(self, timeout: float|None = None) -> bool:
+        """
+        waits until every load added so far finished, failed or was cancelled
+        """
+        
+        with self._lock:
+            handles = list(self._pending)
+        
+        _, not_done = concurrent.futures.wait(handles, timeout)
+        return not not_done
+    
+    def _push(self, handle: PreloadHandle):
+        # entries are [-priority, seq, handle], a re-prioritized handle leaves its old entry with handle None
+        handle._entry = [-handle.priority, next(self._seq), handle]
+        heapq.heappush(self._queue, handle._entry)
+        self._queued += 1
+    
+    def _pop(self) -> PreloadHandle|None:
+        while self._queue:
+            handle = heapq.heappop(self._queue)[2]
+            if handle is not None and not handle.done():
+                handle._entry = None
+                self._queued -= 1
+                return handle
+        return None
+    
+    def _pump(self):
+        # one thread sends at a time, loads settled meanwhile are picked up by its next round
+        with self._lock:
+            if self._pumping:
+                return
+            self._pumping = True
+        
+        try:
+            while True:
+                codes = []
+                with self._lock:
+                    while len(self._in_flight) < self.max_concurrent:
+                        handle = self._pop()
+                        if handle is None:
+                            break
+                        
+                        rid = self.window.jsapi.register_request(lambda ok, value, handle=handle: self._settle(handle, ok, value))
+                        self._in_flight[handle] = rid
+                        codes.append(f"r2preload({rid}, {jsbridge.stringify_pyobj(handle.name)}, {jsbridge.stringify_pyobj(handle.url)}, {jsbridge.stringify_pyobj(self.mode)});")
+                    
+                    if not codes:
+                        self._pumping = False
+                        return
+                
+                self.window.evaluate_js("".join(codes))
+        except BaseException:
+            with self._lock:
+                self._pumping = False
+            raise
+    
+    def _settle(self, handle: PreloadHandle, ok: bool, value: typing.Any):
+        with self._lock:
+            if self._in_flight.pop(handle, None) is None:
+                return
+            self.stats["loaded" if ok else "failed"] += 1
+        
+        try:
+            if ok:
+                handle.width, handle.height = value or (None, None)
+                handle.resolve((jsbridge.ImageBitmap if self.mode == "bitmap" else jsbridge.HTMLImageElement)(handle.name))
+            else:
+                handle.reject(value)
+        except concurrent.futures.InvalidStateError:
+            pass
+        
+        self._progress()
+        self._pump()
+    
+    def _on_done(self, handle: PreloadHandle):
+        with self._lock:
+            self._pending.discard(handle)
+        
+        if not handle.cancelled():
+            return
+        
+        # wakes concurrent.futures.wait, which only counts notified cancellations as done
+        handle.set_running_or_notify_cancel()
+        
+        with self._lock:
+            self.stats["cancelled"] += 1
+            if handle._entry is not None:
+                handle._entry[2] = None
+                handle._entry = None
+                self._queued -= 1
+            rid = self._in_flight.pop(handle, None)
+        
+        if rid is not None:
+            self.window.jsapi.cancel_request(rid)
+            self.window.evaluate_js(f"r2preload_cancel({jsbridge.stringify_pyobj(handle.name)});")
+        
+        self._progress()
+        self._pump()
+    
+    def _progress(self):
+        if self.on_progress is not None:
+            self.on_progress(self.progress)
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-import threading
 import typing
-
-from .._real_overload import overload, OverloadMeta
+import asyncio
+import operator
+import functools
+import threading
+import concurrent.futures
 
 pythonPromise_ValueType = typing.TypeVar("pythonPromise_ValueType")
 numtype = int|float
@@ -27,16 +29,100 @@ def _hsl2rgb(h: numtype, s: numtype, l: numtype):
         (b + m) * 255
     )
 
-class pythonPromise(typing.Generic[pythonPromise_ValueType]):
-    def __init__(self):
-        self.e = threading.Event()
-        
+class PromiseRejected(Exception): ...
+
+def _copy_future_state(source: concurrent.futures.Future, dest: concurrent.futures.Future):
+    if dest.done(): return
+    
+    try:
+        exc = source.exception()
+    except concurrent.futures.CancelledError as e:
+        exc = e
+    
+    if exc is not None: dest.set_exception(exc)
+    else: dest.set_result(source.result())
+
+class pythonPromise(concurrent.futures.Future, typing.Generic[pythonPromise_ValueType]):
+    """
+    a concurrent.futures.Future with promise style helpers,
+    it can be waited with a timeout, awaited in asyncio, and chained with then
+    """
+    
     def resolve(self, value: pythonPromise_ValueType):
-        self.value = value
-        self.e.set()
+        self.set_result(value)
+    
+    def reject(self, reason: BaseException|typing.Any):
+        self.set_exception(reason if isinstance(reason, BaseException) else PromiseRejected(reason))
+    
+    def wait(self, timeout: float|None = None) -> pythonPromise_ValueType:
+        return self.result(timeout)
+    
+    @property
+    def value(self) -> pythonPromise_ValueType:
+        return self.result()
+    
+    def then(
+        self,
+        onResolved: typing.Callable[[pythonPromise_ValueType], typing.Any]|None = None,
+        onRejected: typing.Callable[[BaseException], typing.Any]|None = None
+    ) -> pythonPromise:
+        promise = pythonPromise()
+        
+        def _settle(f: concurrent.futures.Future):
+            try:
+                exc = f.exception()
+                if exc is None:
+                    v = f.result() if onResolved is None else onResolved(f.result())
+                elif onRejected is not None:
+                    v = onRejected(exc)
+                else:
+                    raise exc
+            except BaseException as e:
+                promise.set_exception(e)
+                return
+            
+            if isinstance(v, concurrent.futures.Future):
+                v.add_done_callback(lambda vf: _copy_future_state(vf, promise))
+            else:
+                promise.set_result(v)
+        
+        self.add_done_callback(_settle)
+        return promise
+    
+    def catch(self, onRejected: typing.Callable[[BaseException], typing.Any]) -> pythonPromise:
+        return self.then(None, onRejected)
     
-    def wait(self):
-        self.e.wait()
+    def __await__(self):
+        return asyncio.wrap_future(self).__await__()
+    
+    @staticmethod
+    def all(promises: typing.Iterable[concurrent.futures.Future]) -> pythonPromise[list]:
+        promises = list(promises)
+        promise = pythonPromise()
+        remaining = len(promises)
+        lock = threading.Lock()
+        
+        if not promises:
+            promise.set_result([])
+            return promise
+        
+        def _settle(f: concurrent.futures.Future):
+            nonlocal remaining
+            
+            with lock:
+                if promise.done(): return
+                
+                if f.cancelled() or f.exception() is not None:
+                    _copy_future_state(f, promise)
+                    return
+                
+                remaining -= 1
+                if remaining == 0:
+                    promise.set_result([i.result() for i in promises])
+        
+        for i in promises:
+            i.add_done_callback(_settle)
+        return promise
 
 class iteratingRemoveableCurrentList_Iterator:
     def __init__(self, list: iteratingRemoveableCurrentList):
@@ -58,104 +144,181 @@ class iteratingRemoveableCurrentList_Iterator:
 class iteratingRemoveableCurrentList(list):
     def __iter__(self):
         return iteratingRemoveableCurrentList_Iterator(self)
-    
-class Color(metaclass=OverloadMeta):
-    checkvalue: bool = False
-    jstoint: bool = False
-    
-    @overload
-    def __init__(self, r: numtype, g: numtype, b: numtype, a: numtype = 1.0):
-        self.r = r
-        self.g = g
-        self.b = b
-        self.a = a
-    
-    @overload
-    def __init__(self, string: str):
-        if (
-            string.startswith("rgb")
-            or string.startswith("rgba")
-            or string.startswith("hsl")
-            or string.startswith("hsla")
-        ):
-            self._loadFunc(string)
-            return
-        
-        if string.startswith("#"): string = string[1:]
-        elif string.startswith("0x"): string = string[2:]
-        
-        if len(string) == 3 or len(string) == 4: string = "".join(x * 2 for x in string)
-        
-        r = int(string[0:2], 16)
-        g = int(string[2:4], 16)
-        b = int(string[4:6], 16)
-        a = 1.0 if len(string) < 8 else int(string[6:8], 16) / 255
-        self.__init__(r, g, b, a)
-    
-    def _loadFunc(self, rgbFunc: str):
-        rgbFunc = rgbFunc.replace(" ", "")
-        
-        if rgbFunc.startswith("rgb(") and rgbFunc.endswith(")"):
-            rgbFunc = rgbFunc[4:-1]
-            rgbFunc = rgbFunc.split(",")
 
-            r = int(float(rgbFunc[0]))
-            g = int(float(rgbFunc[1]))
-            b = int(float(rgbFunc[2]))
-            a = 1.0
-            
-        elif rgbFunc.startswith("rgba(") and rgbFunc.endswith(")"):
-            rgbFunc = rgbFunc[5:-1]
-            rgbFunc = rgbFunc.split(",")
-            
-            r = int(float(rgbFunc[0]))
-            g = int(float(rgbFunc[1]))
-            b = int(float(rgbFunc[2]))
-            a = float(rgbFunc[3])
-        
-        elif rgbFunc.startswith("hsl(") and rgbFunc.endswith(")"):
-            rgbFunc = rgbFunc[4:-1]
-            rgbFunc = rgbFunc.split(",")
+@functools.lru_cache(maxsize=1024)
+def _parse_color(string: str) -> tuple[numtype, numtype, numtype, numtype]:
+    if (
+        string.startswith("rgb")
+        or string.startswith("rgba")
+        or string.startswith("hsl")
+        or string.startswith("hsla")
+    ):
+        return _parse_color_func(string)
+    
+    if string.startswith("#"): string = string[1:]
+    elif string.startswith("0x"): string = string[2:]
+    
+    if len(string) == 3 or len(string) == 4: string = "".join(x * 2 for x in string)
+    
+    r = int(string[0:2], 16)
+    g = int(string[2:4], 16)
+    b = int(string[4:6], 16)
+    a = 1.0 if len(string) < 8 else int(string[6:8], 16) / 255
+    return (r, g, b, a)
 
-            h = float(rgbFunc[0])
-            s = float(rgbFunc[1])
-            l = float(rgbFunc[2])
+def _parse_color_func(rgbFunc: str) -> tuple[numtype, numtype, numtype, numtype]:
+    rgbFunc = rgbFunc.replace(" ", "")
+    
+    if rgbFunc.startswith("rgb(") and rgbFunc.endswith(")"):
+        r, g, b = rgbFunc[4:-1].split(",")
+        return (int(float(r)), int(float(g)), int(float(b)), 1.0)
+    
+    elif rgbFunc.startswith("rgba(") and rgbFunc.endswith(")"):
+        r, g, b, a = rgbFunc[5:-1].split(",")
+        return (int(float(r)), int(float(g)), int(float(b)), float(a))
+    
+    elif rgbFunc.startswith("hsl(") and rgbFunc.endswith(")"):
+        h, s, l = rgbFunc[4:-1].split(",")
+        return _hsl2rgb(float(h), float(s), float(l)) + (1.0, )
+    
+    elif rgbFunc.startswith("hsla(") and rgbFunc.endswith(")"):
+        h, s, l, a = rgbFunc[5:-1].split(",")
+        return _hsl2rgb(float(h), float(s), float(l)) + (float(a), )
+    
+    raise ValueError("Invalid rgbFunc")
 
-            r, g, b, a = _hsl2rgb(h, s, l) + (1.0, )
-        
-        elif rgbFunc.startswith("hsla(") and rgbFunc.endswith(")"):
-            rgbFunc = rgbFunc[5:-1]
-            rgbFunc = rgbFunc.split(",")
+def _clamp(v: numtype, high: numtype) -> numtype:
+    return v if (0 <= v <= high) else (high if v > high else 0)
 
-            h = float(rgbFunc[0])
-            s = float(rgbFunc[1])
-            l = float(rgbFunc[2])
-            a = float(rgbFunc[3])
+class _ColorMeta(type):
+    # Color.checkvalue / Color.jstoint are the class defaults, instances which set their own flag keep it
+    checkvalue = property(
+        operator.attrgetter("_class_checkvalue"),
+        lambda cls, v: setattr(cls, "_class_checkvalue", v)
+    )
+    jstoint = property(
+        operator.attrgetter("_class_jstoint"),
+        lambda cls, v: setattr(cls, "_class_jstoint", v)
+    )
 
-            r, g, b = _hsl2rgb(h, s, l)
+class Color(metaclass=_ColorMeta):
+    """
+    Color(r, g, b, a = 1.0) or Color(css string), parsed strings are cached,
+    the js form is built on first use and dropped when a channel is set,
+    checkvalue clamps channels when they are set, jstoint sends r, g, b as ints,
+    both can be set on the class or on one color, None on a color falls back to the class
+    """
+    
+    __slots__ = ("_r", "_g", "_b", "_a", "_jseval", "_checkvalue", "_jstoint")
+    
+    _class_checkvalue: bool = False
+    _class_jstoint: bool = False
+    
+    def __init__(self, r: numtype|str, g: numtype|None = None, b: numtype|None = None, a: numtype = 1.0):
+        if isinstance(r, str):
+            r, g, b, a = _parse_color(r)
+        elif g is None or b is None:
+            raise TypeError("Color takes (r, g, b, a = 1.0) or a color string")
         
-        else:
-            raise ValueError("Invalid rgbFunc")
+        if type(self)._class_checkvalue:
+            r, g, b, a = _clamp(r, 255), _clamp(g, 255), _clamp(b, 255), _clamp(a, 1)
         
-        self.__init__(r, g, b, a)
-
-    def __pywebuikit_jseval__(self):
-        return (
-            f"'rgba({self.r}, {self.g}, {self.b}, {self.a})'"
-            
-            if not self.jstoint
-            else
-            
-            f"'rgba({int(self.r)}, {int(self.g)}, {int(self.b)}, {self.a})'"
-        )
+        self._r = r
+        self._g = g
+        self._b = b
+        self._a = a
+        self._jseval = None
+        self._checkvalue = None
+        self._jstoint = None
     
-    def __setattr__(self, n, v):
-        if not self.checkvalue:
-            return super().__setattr__(n, v)
-            
-        if n in ("r", "g", "b"):
-            v = v if (0 <= v <= 255) else (255 if v > 255 else 0)
-        elif n == "a":
-            v = v if (0 <= v <= 1) else (1 if v > 1 else 0)
+    @classmethod
+    def from_rgba(cls, r: numtype, g: numtype, b: numtype, a: numtype = 1.0) -> Color:
+        if cls._class_checkvalue:
+            r, g, b, a = _clamp(r, 255), _clamp(g, 255), _clamp(b, 255), _clamp(a, 1)
         
-        return super().__setattr__(n, v)
\ No newline at end of file
+        self = object.__new__(cls)
+        self._r = r
+        self._g = g
+        self._b = b
+        self._a = a
+        self._jseval = None
+        self._checkvalue = None
+        self._jstoint = None
+        return self
+    
+    @classmethod
+    def from_packed_int(cls, value: int, alpha: bool = False) -> Color:
+        """
+        0xRRGGBB, or 0xRRGGBBAA when alpha is set
+        """
+        
+        if alpha:
+            return cls.from_rgba(value >> 24 & 0xFF, value >> 16 & 0xFF, value >> 8 & 0xFF, (value & 0xFF) / 255)
+        return cls.from_rgba(value >> 16 & 0xFF, value >> 8 & 0xFF, value & 0xFF, 1.0)
+    
+    def _get_checkvalue(self) -> bool:
+        checkvalue = self._checkvalue
+        return type(self)._class_checkvalue if checkvalue is None else checkvalue
+    
+    def _set_checkvalue(self, v: bool|None):
+        self._checkvalue = v
+    
+    def _get_jstoint(self) -> bool:
+        jstoint = self._jstoint
+        return type(self)._class_jstoint if jstoint is None else jstoint
+    
+    def _set_jstoint(self, v: bool|None):
+        self._jstoint = v
+    
+    checkvalue = property(_get_checkvalue, _set_checkvalue)
+    jstoint = property(_get_jstoint, _set_jstoint)
+    
+    def _set_r(self, v: numtype):
+        checkvalue = self._checkvalue
+        if type(self)._class_checkvalue if checkvalue is None else checkvalue:
+            v = _clamp(v, 255)
+        self._r = v
+        self._jseval = None
+    
+    def _set_g(self, v: numtype):
+        checkvalue = self._checkvalue
+        if type(self)._class_checkvalue if checkvalue is None else checkvalue:
+            v = _clamp(v, 255)
+        self._g = v
+        self._jseval = None
+    
+    def _set_b(self, v: numtype):
+        checkvalue = self._checkvalue
+        if type(self)._class_checkvalue if checkvalue is None else checkvalue:
+            v = _clamp(v, 255)
+        self._b = v
+        self._jseval = None
+    
+    def _set_a(self, v: numtype):
+        checkvalue = self._checkvalue
+        if type(self)._class_checkvalue if checkvalue is None else checkvalue:
+            v = _clamp(v, 1)
+        self._a = v
+        self._jseval = None
+    
+    r = property(operator.attrgetter("_r"), _set_r)
+    g = property(operator.attrgetter("_g"), _set_g)
+    b = property(operator.attrgetter("_b"), _set_b)
+    a = property(operator.attrgetter("_a"), _set_a)
+    
+    def __pywebuikit_jseval__(self):
+        # cached as (jstoint, code), so a change of the flag, on the color or on the class, is seen
+        jstoint = self._jstoint
+        jstoint = bool(type(self)._class_jstoint if jstoint is None else jstoint)
+        
+        jseval = self._jseval
+        if jseval is None or jseval[0] is not jstoint:
+            if not jstoint:
+                jseval = (jstoint, f"'rgba({self._r}, {self._g}, {self._b}, {self._a})'")
+            else:
+                jseval = (jstoint, f"'rgba({int(self._r)}, {int(self._g)}, {int(self._b)}, {self._a})'")
+            self._jseval = jseval
+        return jseval[1]
+    
+    def __repr__(self):
+        return f"Color({self._r}, {self._g}, {self._b}, {self._a})"
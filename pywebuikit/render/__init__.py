@@ -10,7 +10,17 @@ from .. import webwindow
 from .. import jscodes
 from .. import jsbridge
 from .. import public_objects
+from ..render import atlas
 from ..render import render_items
+from ..render import batch_items
+from ..render import command_buffer
+from ..render import path
+from ..render import pixels
+from ..render import shadow_state
+from ..render import display_list
+from ..render import render_worker
+from ..render import geometry
+from ..render.spatial_index import SpatialGrid
 from .._real_overload import overload, OverloadMeta
 
 _TV_RENDERITEM = typing.TypeVar("_TV_RENDERITEM", covariant=True)
@@ -18,7 +28,7 @@ _TV_RENDERITEM = typing.TypeVar("_TV_RENDERITEM", covariant=True)
 numtype = public_objects.numtype
 fillRuleType = typing.Literal["nonzero", "evenodd"]
 repetitionType = typing.Literal["repeat", "repeat-x", "repeat-y", "no-repeat"]
-    
+
 @typing.runtime_checkable
 class RenderItem(typing.Protocol[_TV_RENDERITEM]):
     @abstractmethod
@@ -33,13 +43,194 @@ class Canvas2D_SaveState:
     def __exit__(self, *args): self.ctx.restore()
 
 class BaseRender:
-    def __init__(self, window: webwindow.WebWindow, ctx: str|jsbridge.CanvasRenderingContext2D = "ctx"):
+    def __init__(
+        self,
+        window: webwindow.WebWindow,
+        ctx: str|jsbridge.CanvasRenderingContext2D = "ctx",
+        cmdbuf: bool = False,
+        state_tracking: bool = False
+    ):
         self.window = window
         self.ctx = jsbridge.CanvasRenderingContext2D(ctx) if isinstance(ctx, str) else ctx
         self.call_hooks: dict[str, typing.Callable[[tuple[jsbridge.pyobj_sifytype]], typing.Any]] = {}
+        self.cmdbuf: command_buffer.CommandBuffer|None = None
+        self.shadow: shadow_state.ShadowState|None = None
+        self._canvas_resets = 0 # window.jsapi.canvas_resets the shadow has seen
+        self.recording: display_list.DisplayList|None = None
+        self.recordings: dict[str, display_list.DisplayList] = {}
+        self.worker: render_worker.RenderWorker|None = None
+        
+        if cmdbuf:
+            self.setCommandBufferMode(True)
+        
+        if state_tracking:
+            self.setStateTrackingMode(True)
+    
+    def setCommandBufferMode(self, state: bool) -> None:
+        """
+        in command buffer mode, void canvas calls are packed into window.cmdbuf
+        and replayed by the page when the buffer is flushed,
+        the buffer is flushed before any other js code is evaluated,
+        so calls keep their order with everything else sent to the window
+        """
+        
+        if not state:
+            if self.cmdbuf is not None:
+                self.cmdbuf.flush()
+            self.cmdbuf = None
+            return
+        
+        if self.worker is not None:
+            self.cmdbuf = self.worker.commandBuffer()
+            return
+        
+        if self.window.cmdbuf is None:
+            self.window.cmdbuf = command_buffer.CommandBuffer(self.window)
+        self.cmdbuf = self.window.cmdbuf
+    
+    def setWorkerMode(self, state: bool) -> None:
+        """
+        in worker mode, this renderer draws in window.render_worker, created by create_mainCanvas(worker=True),
+        calls returning a value wait for the worker's reply, inside window.frame() they return a Future as on the page,
+        the other modes are kept
+        """
+        
+        if state and self.window.render_worker is None:
+            raise RuntimeError("the window has no render worker, create it with create_mainCanvas(worker=True)")
+        
+        # both go to the context of the old mode first, the worker has a new one
+        buffered, tracking = self.cmdbuf is not None, self.shadow is not None
+        self.setStateTrackingMode(False)
+        self.setCommandBufferMode(False)
+        
+        self.worker = self.window.render_worker if state else None
+        ctx_type = jsbridge.OffscreenCanvasRenderingContext2D if state else jsbridge.CanvasRenderingContext2D
+        self.ctx = ctx_type(self.ctx.v)
+        
+        self.setCommandBufferMode(buffered)
+        self.setStateTrackingMode(tracking)
+    
+    def evaluate_js(self, js: str) -> typing.Any:
+        """
+        evaluates js where this renderer draws, the page or its render worker
+        """
+        
+        if self.worker is not None:
+            return self.worker.evaluate_js(js)
+        return self.window.evaluate_js(js)
+    
+    def wait_jspromise(self, code: str, timeout: float|None = None) -> typing.Any:
+        if self.worker is not None:
+            return self.worker.wait_jspromise(code, timeout)
+        return self.window.wait_jspromise(code, timeout)
+    
+    def setStateTrackingMode(self, state: bool) -> None:
+        """
+        with state tracking, a shadow of the canvas state drops attribute, transform and save / restore calls
+        which change nothing, see shadow_state.ShadowState, the counters are in self.shadow.stats,
+        the page reports main canvas resizes (they reset the context), the tracked state is sent again on the next call,
+        the report is asynchronous, so calls sent right after a resize may still be dropped until it arrives,
+        other code changing the context still needs invalidateState()
+        """
+        
+        if not state:
+            self.syncState()
+            self.shadow = None
+            return
+        
+        if self.shadow is None:
+            self._canvas_resets = self.window.jsapi.canvas_resets
+            self.shadow = shadow_state.ShadowState(
+                lambda method, args: self._call_method(method, *args),
+                self._set_attribute
+            )
+    
+    def syncState(self) -> None:
+        # sends the state changes held back by the shadow, before js code which draws on this context
+        if self.shadow is not None:
+            self._check_canvas_reset()
+            self.shadow.sync(True)
+    
+    def _check_canvas_reset(self) -> None:
+        resets = self.window.jsapi.canvas_resets
+        if resets != self._canvas_resets:
+            self._canvas_resets = resets
+            self.shadow.canvasReset()
+    
+    def invalidateState(self) -> None:
+        # after js code changed the state of this context outside the renderer
+        if self.shadow is not None:
+            self.shadow.invalidate()
+    
+    def record(self, name: str, isolate: bool = True) -> display_list.DisplayList:
+        """
+        with rd.record("gauge") as rec: canvas calls in the block are recorded instead of sent,
+        rec.param("angle") stands in for a value given to rd.play("gauge", angle=...),
+        a new recording with the same name replaces the old one
+        """
+        
+        return display_list.DisplayList(self, name, isolate)
+    
+    def _start_recording(self, recording: display_list.DisplayList):
+        if self.recording is not None:
+            raise RuntimeError(f"already recording {self.recording.name!r}")
+        self.recording = recording
+    
+    def _stop_recording(self, recording: display_list.DisplayList, define: bool):
+        self.recording = None
+        if not define:
+            return
+        
+        recording.define()
+        replaced = self.recordings.get(recording.name)
+        self.recordings[recording.name] = recording
+        if replaced is not None:
+            replaced.release()
+    
+    def play(self, name: str|display_list.DisplayList, **values: typing.Any):
+        if self.recording is not None:
+            raise RuntimeError("display lists can not be played while recording")
+        
+        recording = self.recordings[name] if isinstance(name, str) else name
+        code = recording.playCode(**values)
+        
+        # an isolated list leaves the state as it was, any other is drawing by code the shadow does not see
+        if self.shadow is not None:
+            self._check_canvas_reset()
+            self.shadow.sync(not recording.isolate)
+        
+        if self.cmdbuf is not None:
+            self.cmdbuf.eval(code)
+        else:
+            self.evaluate_js(code)
+        
+        if not recording.isolate:
+            self.invalidateState()
+    
+    def releaseRecording(self, name: str):
+        recording = self.recordings.pop(name, None)
+        if recording is not None:
+            recording.release()
     
     def call_method(self, method: str, *args: tuple[jsbridge.pyobj_sifytype]):
+        if self.recording is not None:
+            return self.recording.call(jsbridge.stringify_pyobj(self), method, args)
+        
+        if self.shadow is not None:
+            self._check_canvas_reset()
+            if method in shadow_state.INTERCEPTED_METHODS:
+                return self.shadow.call(method, args)
+            self.shadow.sync()
+        
+        return self._call_method(method, *args)
+    
+    def _call_method(self, method: str, *args: tuple[jsbridge.pyobj_sifytype]):
         hook_do, hook_value = self.call_hooks[method](args) if method in self.call_hooks else (None, None)
+        buffered = self.cmdbuf is not None and method in command_buffer.OPCODES
+        
+        if buffered and hook_do is None:
+            return self.cmdbuf.call_method(self.ctx.v, method, args)
+        
         code = f"{jsbridge.stringify_pyobj(self)}.{method}({jsbridge.iterable2jsarray(args, False)});"
         
         match hook_do:
@@ -47,25 +238,71 @@ class BaseRender:
             case "cancel": return
             case "change_code": code = hook_value(code)
         
-        return self.window.evaluate_js(code)
+        if buffered:
+            return self.cmdbuf.eval(code)
+        
+        if self.worker is not None and method not in command_buffer.OPCODES:
+            return self.worker.request(code)
+        
+        return self.evaluate_js(code)
+    
+    def getPath2D(self, shape: path.PathBuilder|str) -> jsbridge.Path2D:
+        """
+        the cached page side Path2D of a PathBuilder (or svg path data), built once per distinct path
+        """
+        
+        if self.recording is not None:
+            data = shape if isinstance(shape, str) else shape.data()
+            return jsbridge.Path2D(self.recording.constant(f"new Path2D({jsbridge.stringify_pyobj(data)})"))
+        
+        if self.worker is not None:
+            return self.worker.paths.get(shape)
+        
+        if self.window.path2d_cache is None:
+            self.window.path2d_cache = path.Path2DCache(self.window)
+        return self.window.path2d_cache.get(shape)
     
     def create_canvasRef(self):
         vn = f"cvref__{random.randint(0, 2 << 31)}"
-        self.window.evaluate_js(f"{vn} = {jsbridge.stringify_pyobj(self)}.canvas;")
+        self.evaluate_js(f"{vn} = {jsbridge.stringify_pyobj(self)}.canvas;")
         return jsbridge.Element(vn)
     
     def __pywebuikit_jseval__(self):
         return jsbridge.stringify_pyobj(self.ctx)
-    
+
 class Context2DRender(BaseRender, metaclass=OverloadMeta):
-    def create_mainCanvas(self):
-        return self.window.evaluate_js(jscodes.create_2DCanvas)
+    def create_mainCanvas(self, worker: bool = False):
+        """
+        with worker, control of the canvas goes to a web worker and this renderer draws there,
+        see render_worker.RenderWorker
+        """
+        
+        if not worker:
+            return self.window.evaluate_js(jscodes.create_2DCanvas)
+        
+        if self.window.render_worker is None:
+            self.window.render_worker = render_worker.RenderWorker(self.window)
+        self.setWorkerMode(True)
     
     def setAttribute(self, name: str, value: jsbridge.pyobj_sifytype):
-        return self.window.evaluate_js(f"{jsbridge.stringify_pyobj(self)}.{name} = ({jsbridge.stringify_pyobj(value)});")
+        if self.recording is not None:
+            return self.recording.setAttribute(jsbridge.stringify_pyobj(self), name, value)
+        
+        if self.shadow is not None:
+            return self.shadow.setAttribute(name, value)
+        
+        return self._set_attribute(name, value)
+    
+    def _set_attribute(self, name: str, value: jsbridge.pyobj_sifytype):
+        if self.cmdbuf is not None:
+            return self.cmdbuf.set_attribute(self.ctx.v, name, value)
+        
+        return self.evaluate_js(f"{jsbridge.stringify_pyobj(self)}.{name} = ({jsbridge.stringify_pyobj(value)});")
     
     def getAttribute(self, name: str):
-        return self.window.evaluate_js(f"{jsbridge.stringify_pyobj(self)}.{name};")
+        self.syncState()
+        code = f"{jsbridge.stringify_pyobj(self)}.{name};"
+        return self.window.evaluate_js(code) if self.worker is None else self.worker.request(code)
     
     @overload
     def arc(self, x: numtype, y: numtype, radius: numtype, startAngle: numtype, endAngle: numtype):
@@ -98,11 +335,19 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
     @overload
     def clip(self, fillRule: fillRuleType):
         return self.call_method("clip", fillRule)
-
+    
     @overload
     def clip(self, path: jsbridge.Path2D, fillRule: fillRuleType):
         return self.call_method("clip", path, fillRule)
     
+    @overload
+    def clip(self, path: path.PathBuilder):
+        return self.call_method("clip", self.getPath2D(path))
+    
+    @overload
+    def clip(self, path: path.PathBuilder, fillRule: fillRuleType):
+        return self.call_method("clip", self.getPath2D(path), fillRule)
+    
     @overload
     def closePath(self):
         return self.call_method("closePath")
@@ -113,7 +358,7 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
     @overload
     def createImageData(self, width: numtype, height: numtype):
         return self.call_method("createImageData", width, height)
-
+    
     @overload
     def createImageData(self, width: numtype, height: numtype, setting: jsbridge.PyWebUIKitJsEvalable):
         return self.call_method("createImageData", width, height, setting)
@@ -142,7 +387,7 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
     @overload
     def drawImage(self, image: jsbridge.drawable_type, dx: numtype, dy: numtype):
         return self.call_method("drawImage", image, dx, dy)
-
+    
     @overload
     def drawImage(self, image: jsbridge.drawable_type, dx: numtype, dy: numtype, dWidth: numtype, dHeight: numtype):
         return self.call_method("drawImage", image, dx, dy, dWidth, dHeight)
@@ -151,13 +396,26 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
     def drawImage(self, image: jsbridge.drawable_type, sx: numtype, sy: numtype, sWidth: numtype, sHeight: numtype, dx: numtype, dy: numtype, dWidth: numtype, dHeight: numtype):
         return self.call_method("drawImage", image, sx, sy, sWidth, sHeight, dx, dy, dWidth, dHeight)
     
+    @overload
+    def drawImage(self, image: atlas.AtlasSprite, dx: numtype, dy: numtype):
+        return self.call_method("drawImage", image.sheet, image.sx, image.sy, image.width, image.height, dx, dy, image.width, image.height)
+    
+    @overload
+    def drawImage(self, image: atlas.AtlasSprite, dx: numtype, dy: numtype, dWidth: numtype, dHeight: numtype):
+        return self.call_method("drawImage", image.sheet, image.sx, image.sy, image.width, image.height, dx, dy, dWidth, dHeight)
+    
+    @overload
+    def drawImage(self, image: atlas.AtlasSprite, sx: numtype, sy: numtype, sWidth: numtype, sHeight: numtype, dx: numtype, dy: numtype, dWidth: numtype, dHeight: numtype):
+        # the source rectangle is relative to the sprite
+        return self.call_method("drawImage", image.sheet, image.sx + sx, image.sy + sy, sWidth, sHeight, dx, dy, dWidth, dHeight)
+    
     def ellipse(self, x: numtype, y: numtype, radiusX: numtype, radiusY: numtype, rotation: numtype, startAngle: numtype, endAngle: numtype, counterclockwise: bool = False):
         return self.call_method("ellipse", x, y, radiusX, radiusY, rotation, startAngle, endAngle, counterclockwise)
     
     @overload
     def fill(self):
         return self.call_method("fill")
-
+    
     @overload
     def fill(self, path: jsbridge.Path2D):
         return self.call_method("fill", path)
@@ -170,6 +428,14 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
     def fill(self, path: jsbridge.Path2D, fillRule: fillRuleType):
         return self.call_method("fill", path, fillRule)
     
+    @overload
+    def fill(self, path: path.PathBuilder):
+        return self.call_method("fill", self.getPath2D(path))
+    
+    @overload
+    def fill(self, path: path.PathBuilder, fillRule: fillRuleType):
+        return self.call_method("fill", self.getPath2D(path), fillRule)
+    
     def fillRect(self, x: numtype, y: numtype, width: numtype, height: numtype):
         return self.call_method("fillRect", x, y, width, height)
     
@@ -208,11 +474,11 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
     @overload
     def isPointInPath(self, x: numtype, y: numtype, fillRule: fillRuleType):
         return self.call_method("isPointInPath", x, y, fillRule)
-
+    
     @overload
     def isPointInPath(self, path: jsbridge.Path2D, x: numtype, y: numtype):
         return self.call_method("isPointInPath", path, x, y)
-
+    
     @overload
     def isPointInPath(self, path: jsbridge.Path2D, x: numtype, y: numtype, fillRule: fillRuleType):
         return self.call_method("isPointInPath", path, x, y, fillRule)
@@ -220,7 +486,7 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
     @overload
     def isPointInStroke(self, x: numtype, y: numtype):
         return self.call_method("isPointInStroke", x, y)
-
+    
     @overload
     def isPointInStroke(self, path: jsbridge.Path2D, x: numtype, y: numtype):
         return self.call_method("isPointInStroke", path, x, y)
@@ -237,7 +503,7 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
     @overload
     def putImageData(self, imageData: jsbridge.ImageData, dx: numtype, dy: numtype):
         return self.call_method("putImageData", imageData, dx, dy)
-
+    
     @overload
     def putImageData(self, imageData: jsbridge.ImageData, dx: numtype, dy: numtype, dirtyX: numtype, dirtyY: numtype, dirtyWidth: numtype, dirtyHeight: numtype):
         return self.call_method("putImageData", imageData, dx, dy, dirtyX, dirtyY, dirtyWidth, dirtyHeight)
@@ -283,11 +549,15 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
     @overload
     def stroke(self):
         return self.call_method("stroke")
-
+    
     @overload
     def stroke(self, path: jsbridge.Path2D):
         return self.call_method("stroke", path)
     
+    @overload
+    def stroke(self, path: path.PathBuilder):
+        return self.call_method("stroke", self.getPath2D(path))
+    
     @overload
     def strokeRect(self, x: numtype, y: numtype, width: numtype, height: numtype):
         return self.call_method("strokeRect", x, y, width, height)
@@ -308,8 +578,8 @@ class Context2DRender(BaseRender, metaclass=OverloadMeta):
         return self.call_method("translate", x, y)
 
 class Context2DRender_Extended(Context2DRender):
-    def __init__(self, window):
-        super().__init__(window)
+    def __init__(self, window, ctx: str|jsbridge.CanvasRenderingContext2D = "ctx", cmdbuf: bool = False, state_tracking: bool = False):
+        super().__init__(window, ctx, cmdbuf, state_tracking)
         
         self.savestate = Canvas2D_SaveState(self)
         self.window.evaluate_js(jscodes.c2d_extend)
@@ -329,6 +599,73 @@ class Context2DRender_Extended(Context2DRender):
             jsbridge.JavaScriptVariable(f"{jsbridge.stringify_pyobj(self)}.canvas.height")
         )
     
+    def drawBatch(self, batch: batch_items.BaseBatch):
+        if self.recording is not None:
+            return self.recording.append(batch.drawCode(jsbridge.stringify_pyobj(self)))
+        
+        self.syncState()
+        socket_transport = self.window.transport
+        if socket_transport is None or not socket_transport.connected:
+            return self.evaluate_js(batch.drawCode(jsbridge.stringify_pyobj(self)))
+        
+        # the payload goes as a binary message, everything queued before it has to be sent first
+        self._flush_for_binary()
+        
+        # the page forwards it to the render worker, target is the handler there
+        socket_transport.send_binary(
+            "batch" if self.worker is None else "worker", batch.pack(),
+            target = "batch",
+            fn = batch.jsDrawFunction,
+            ctx = jsbridge.stringify_pyobj(self),
+            n = len(batch),
+            args = batch.drawArgs()
+        )
+    
+    def _flush_for_binary(self):
+        if self.window.cmdbuf is not None:
+            self.window.cmdbuf.flush()
+        if self.window.render_worker is not None:
+            self.window.render_worker.flush()
+        self.window.jsbatch.flush()
+    
+    def getImageDataArray(self, sx: numtype, sy: numtype, sw: numtype, sh: numtype, timeout: float|None = None):
+        """
+        getImageData as a (sh, sw, 4) uint8 numpy array, the pixels are posted to fserver as binary
+        """
+        
+        return pixels.read_image_data(self.window, f"{jsbridge.stringify_pyobj(self)}.getImageData({sx}, {sy}, {sw}, {sh})", timeout, self.wait_jspromise)
+    
+    def imageDataToArray(self, imagedata: jsbridge.ImageData, timeout: float|None = None):
+        return pixels.read_image_data(self.window, jsbridge.stringify_pyobj(imagedata), timeout, self.wait_jspromise)
+    
+    def putImageDataArray(self, array: typing.Any, dx: numtype, dy: numtype, timeout: float|None = None):
+        """
+        putImageData from a (height, width, 3 or 4) numpy array,
+        sent as one binary message over the websocket transport, else fetched from fserver before this returns
+        """
+        
+        socket_transport = self.window.transport
+        if socket_transport is None or not socket_transport.connected:
+            return pixels.write_image_data(self.window, array, f"(im) => {jsbridge.stringify_pyobj(self)}.putImageData(im, {dx}, {dy})", timeout, self.wait_jspromise)
+        
+        rgba = pixels.as_rgba(array)
+        self._flush_for_binary()
+        
+        socket_transport.send_binary(
+            "imagedata" if self.worker is None else "worker", memoryview(rgba).cast("B"),
+            target = "imagedata",
+            ctx = jsbridge.stringify_pyobj(self),
+            width = rgba.shape[1],
+            height = rgba.shape[0],
+            dx = dx,
+            dy = dy
+        )
+    
+    def createImageDataFromArray(self, array: typing.Any, timeout: float|None = None) -> jsbridge.ImageData:
+        name = f"imagedata_{random.randint(0, 2 << 31)}"
+        pixels.write_image_data(self.window, array, f"(im) => {{ window[{jsbridge.stringify_pyobj(name)}] = im; }}", timeout, self.wait_jspromise)
+        return jsbridge.ImageData(name)
+    
     def rotateByDegrees(self, deg: numtype):
         return self.rotate(deg * math.pi / 180)
     
@@ -403,6 +740,16 @@ class Context2DRender_Extended(Context2DRender):
         x, y, width, height = self.pos2size(x1, y1, x2, y2)
         return self.diagonalRect_BySize(x, y, width, height, power)
     
+    def diagonalRectPath(self, x: numtype, y: numtype, width: numtype, height: numtype, power: numtype) -> path.PathBuilder:
+        # the same shape as a PathBuilder, fill / stroke / clip it to reuse one cached Path2D across frames
+        return path.PathBuilder().polygon((
+            (x + width * power, y),
+            (x + width, y),
+            (x + width - width * power, y + height),
+            (x, y + height),
+            (x + width * power, y)
+        ), close=False)
+    
     def clipDiagonalRect_BySize(self, x: numtype, y: numtype, width: numtype, height: numtype, power: numtype):
         self.beginPath()
         self.diagonalRect_BySize(x, y, width, height, power)
@@ -416,7 +763,7 @@ class Context2DRender_Extended(Context2DRender):
         self.beginPath()
         self.rect(x, y, width, height)
         self.clip()
-
+    
     def clipRect_ByPos(self, x1: numtype, y1: numtype, x2: numtype, y2: numtype):
         x, y, width, height = self.pos2size(x1, y1, x2, y2)
         return self.clipRect_BySize(x, y, width, height)
@@ -427,11 +774,11 @@ class Context2DRender_Extended(Context2DRender):
             self.beginPath()
             self.diagonalRect_BySize(x, y, width, height, power)
             self.fill()
-
+    
     def drawDiagonalRect_ByPos(self, x1: numtype, y1: numtype, x2: numtype, y2: numtype, power: numtype, color: str):
         x, y, width, height = self.pos2size(x1, y1, x2, y2)
         return self.drawDiagonalRect_BySize(x, y, width, height, power, color)
-
+    
     def drawTriangle(self, x1: numtype, y1: numtype, x2: numtype, y2: numtype, x3: numtype, y3: numtype, color: str):
         with self.savestate:
             self.setAttribute("fillStyle", color)
@@ -471,11 +818,19 @@ class Timer:
                     self.tozero()
                 case "stop":
                     t = self.max
-                    
+        
         return t
 
 class Canvas2DRenderManager:
-    def __init__(self, canvas_render: Context2DRender_Extended, items: list[RenderItem]|None = None):
+    def __init__(
+        self,
+        canvas_render: Context2DRender_Extended,
+        items: list[RenderItem]|None = None,
+        retained: bool = False,
+        dirty_rects: bool = False,
+        spatial_index: bool = False,
+        viewport: tuple[numtype, numtype]|None = None
+    ):
         self.timer = Timer()
         self.canvas_render = canvas_render
         self.items: list[RenderItem] = [] if items is None else items.copy()
@@ -484,36 +839,361 @@ class Canvas2DRenderManager:
             RenderItem,
             float
         ], typing.Any]] = {}
+        
+        # retained mode: items with retainedAttributes are mirrored on the page once,
+        # later frames only send the attributes which changed, and the page redraws from its copy,
+        # in runs between the other items so the list order is kept,
+        # the manager clears the viewport before it redraws, a frame where nothing changed
+        # and no other item is drawn sends nothing and leaves the canvas as it is,
+        # call invalidate() after the canvas is resized or drawn over outside the manager,
+        # it can not be combined with dirty_rects
+        if retained and dirty_rects:
+            raise ValueError("retained and dirty_rects can not be combined")
+        
+        self.retained = retained
+        self.scene = f"scene_{random.randint(0, 2 << 31)}"
+        self._retained_ids: dict[int, tuple[RenderItem, int]] = {}
+        self._retained_values: dict[int, dict[str, str]] = {}
+        self._retained_order: list[int] = []
+        self._retained_nextid = 0
+        self._scene_drawn = False
+        
+        # dirty rectangle mode: the manager clears and redraws only the regions
+        # covered by changed items, in this frame and the previous one,
+        # items need boundingBox() (and popDirty() to see non geometry changes),
+        # call invalidate() after the canvas is resized or drawn over outside the manager
+        self.dirty_rects = dirty_rects
+        self.viewport = viewport
+        self.stats: dict[str, numtype] = {"dirty_fraction": 0.0, "items_redrawn": 0, "regions": 0}
+        self._last_boxes: dict[int, tuple[RenderItem, geometry.rectType]] = {}
+        self._full_redraw = True
+        
+        # spatial index: bounding boxes are kept in a grid, updated only for changed items,
+        # items outside the viewport are skipped, and hitTest / queryRect / nearestItem run without the bridge
+        self.index: SpatialGrid[RenderItem]|None = SpatialGrid() if spatial_index else None
+        self._positions: dict[int, int] = {}
+        
+        # attributes set on each item since the last frame, None for items which can't track them
+        self._frame_dirty: dict[int, set[str]|None] = {}
     
-    def render(self):
-        t = self.timer.now()
-        cvr = self.canvas_render
+    def render(self, t: numtype|None = None):
+        if t is None:
+            t = self.timer.now()
         
+        # the page may have reset the context since the last frame (a resize does)
+        self.canvas_render.invalidateState()
+        try:
+            self._render(t)
+        finally:
+            self.canvas_render.syncState()
+    
+    def _render(self, t: float):
         for item in self.items:
             item.update(t)
         
+        if self.retained or self.dirty_rects or self.index is not None:
+            self._frame_dirty = {
+                id(item): item.popDirty() if hasattr(item, "popDirty") else None
+                for item in self.items
+            }
+        
+        if self.index is not None:
+            self._update_index()
+        
+        if self.retained:
+            if self.dirty_rects:
+                raise ValueError("retained and dirty_rects can not be combined")
+            return self._render_retained(t)
+        
+        items = self.items
+        if self.index is not None:
+            items = self._cull(items)
+        
+        if self.dirty_rects:
+            return self._render_dirty(items, t)
+        
+        for item in items:
+            self.render_item(item, t)
+    
+    def _get_viewport(self) -> tuple[numtype, numtype]:
+        if self.viewport is None:
+            window = self.canvas_render.window
+            self.viewport = (window.getLegacyWindowWidth(), window.getLegacyWindowHeight())
+        return self.viewport
+    
+    def _update_index(self):
+        index = self.index
+        indexed_count = 0
+        
         for item in self.items:
-            itype = item.itemType()
+            bbox_method = getattr(item, "boundingBox", None)
+            if bbox_method is None:
+                continue
+            
+            indexed_count += 1
+            dirty = self._frame_dirty.get(id(item))
+            if dirty is None or dirty or item not in index:
+                index.update(item, bbox_method())
+        
+        self._positions = {id(item): i for i, item in enumerate(self.items)}
+        
+        if len(index) > indexed_count:
+            for item in list(index.items()):
+                if id(item) not in self._positions:
+                    index.remove(item)
+    
+    def _cull(self, items: list[RenderItem]) -> list[RenderItem]:
+        visible = {id(item) for item in self.index.query_rect((0, 0, *self._get_viewport()))}
+        return [item for item in items if id(item) in visible or item not in self.index]
+    
+    def hitTest(self, x: numtype, y: numtype) -> list[RenderItem]:
+        # items whose bounding box contains the point, topmost first, as of the last render
+        if self.index is None:
+            return [
+                item for item in reversed(self.items)
+                if hasattr(item, "boundingBox") and geometry.rect_contains_point(item.boundingBox(), x, y)
+            ]
+        
+        positions = self._positions
+        hits = self.index.query_point(x, y)
+        hits.sort(key=lambda item: positions.get(id(item), -1), reverse=True)
+        return hits
+    
+    def queryRect(self, x: numtype, y: numtype, width: numtype, height: numtype) -> list[RenderItem]:
+        rect = (x, y, width, height)
+        
+        if self.index is None:
+            return [
+                item for item in self.items
+                if hasattr(item, "boundingBox") and geometry.rects_intersect(item.boundingBox(), rect)
+            ]
+        
+        positions = self._positions
+        result = self.index.query_rect(rect)
+        result.sort(key=lambda item: positions.get(id(item), -1))
+        return result
+    
+    def nearestItem(self, x: numtype, y: numtype, max_distance: numtype = math.inf) -> RenderItem|None:
+        if self.index is None:
+            raise RuntimeError("nearestItem needs spatial_index=True")
+        return self.index.nearest(x, y, max_distance)
+    
+    def invalidate(self):
+        self._full_redraw = True
+        self._scene_drawn = False
+    
+    def setViewport(self, width: numtype, height: numtype):
+        self.viewport = (width, height)
+        self.invalidate()
+    
+    def _render_dirty(self, items: list[RenderItem], t: float):
+        cvr = self.canvas_render
+        
+        view = (0, 0, *self._get_viewport())
+        boxes: dict[int, tuple[RenderItem, geometry.rectType]] = {}
+        dirty: list[geometry.rectType] = []
+        full = self._full_redraw
+        
+        for item in items:
+            bbox_method = getattr(item, "boundingBox", None)
+            if bbox_method is None:
+                full = True
+                continue
+            
+            bbox = geometry.pixel_rect(bbox_method())
+            boxes[id(item)] = (item, bbox)
+            
+            last = self._last_boxes.get(id(item))
+            attrs = self._frame_dirty.get(id(item))
+            changed = attrs is None or bool(attrs)
+            
+            if last is None or last[0] is not item:
+                dirty.append(bbox)
+            elif changed or last[1] != bbox:
+                dirty.append(bbox)
+                dirty.append(last[1])
+        
+        for key, (item, bbox) in self._last_boxes.items():
+            if key not in boxes or boxes[key][0] is not item:
+                dirty.append(bbox)
+        
+        self._last_boxes = boxes
+        self._full_redraw = False
+        
+        if full:
+            regions = [view]
+        else:
+            clipped = (geometry.rect_clip(r, view) for r in dirty)
+            regions = geometry.merge_rects([r for r in clipped if r is not None])
+        
+        items_redrawn = 0
+        for region in regions:
+            if self.index is not None and not full:
+                candidates = {id(item) for item in self.index.query_rect(region)}
+            else:
+                candidates = None
             
-            match itype:
-                case "builtin-rectangle":
-                    item: render_items.Rectangle
+            with cvr.savestate:
+                cvr.beginPath()
+                cvr.rect(*region)
+                cvr.clip()
+                cvr.clearRect(*region)
+                
+                for item in items:
+                    if candidates is not None and id(item) not in candidates:
+                        continue
                     
-                    with cvr.savestate:
-                        if item.is_fill:
-                            cvr.setAttribute("fillStyle", item.fillColor)
-                            endMethod = cvr.fill
-                        else:
-                            cvr.setAttribute("strokeStyle", item.strokeColor)
-                            cvr.setAttribute("lineWidth", item.strokeLineWidth)
-                            endMethod = cvr.stroke
-                        
-                        cvr.beginPath()
-                        cvr.rect(item.x, item.y, item.width, item.height)
-                        endMethod()
-                            
-                case _:
-                    if itype in self.renderMethods:
-                        self.renderMethods[itype](cvr, item, t)
+                    entry = boxes.get(id(item))
+                    if full or entry is None or geometry.rects_intersect(entry[1], region):
+                        self.render_item(item, t)
+                        items_redrawn += 1
+        
+        view_area = view[2] * view[3]
+        self.stats = {
+            "dirty_fraction": min(1.0, sum(r[2] * r[3] for r in regions) / view_area) if view_area else 0.0,
+            "items_redrawn": items_redrawn,
+            "regions": len(regions)
+        }
+    
+    def render_item(self, item: RenderItem, t: float):
+        cvr = self.canvas_render
+        itype = item.itemType()
+        
+        match itype:
+            case "builtin-rectangle":
+                item: render_items.Rectangle
+                
+                with cvr.savestate:
+                    if item.is_fill:
+                        cvr.setAttribute("fillStyle", item.fillColor)
+                        endMethod = cvr.fill
                     else:
-                        raise ValueError(f"Unknown render item type: {itype}")
+                        cvr.setAttribute("strokeStyle", item.strokeColor)
+                        cvr.setAttribute("lineWidth", item.strokeLineWidth)
+                        endMethod = cvr.stroke
+                    
+                    cvr.beginPath()
+                    cvr.rect(item.x, item.y, item.width, item.height)
+                    endMethod()
+            
+            case "builtin-image":
+                item: render_items.Image
+                cvr.drawImage(item.image, item.x, item.y, item.width, item.height)
+            
+            case "builtin-displaylist":
+                item: render_items.DisplayListItem
+                cvr.play(item.name, **item.params)
+            
+            case "builtin-rectangle-batch" | "builtin-circle-batch" | "builtin-sprite-batch":
+                cvr.drawBatch(item)
+            
+            case _:
+                if itype in self.renderMethods:
+                    self.renderMethods[itype](cvr, item, t)
+                else:
+                    raise ValueError(f"Unknown render item type: {itype}")
+    
+    def _render_retained(self, t: float):
+        immediate, sync_code = self._sync_retained()
+        
+        if self.index is not None:
+            visible = {id(item) for item in self._cull([item for _, item in immediate])}
+            immediate = [(before, item) for before, item in immediate if id(item) in visible]
+        
+        if sync_code is None and not immediate and self._scene_drawn:
+            return
+        
+        cvr = self.canvas_render
+        scene, ctx = jsbridge.stringify_pyobj(self.scene), jsbridge.stringify_pyobj(cvr)
+        codes = [] if sync_code is None else [sync_code]
+        drawn = 0
+        
+        cvr.clearRect(0, 0, *self._get_viewport())
+        cvr.syncState()
+        for before, item in immediate:
+            if before > drawn:
+                codes.append(f"r2scene_draw({scene}, {ctx}, {drawn}, {before});")
+                drawn = before
+            
+            if codes:
+                cvr.evaluate_js("".join(codes))
+                codes = []
+            
+            self.render_item(item, t)
+            cvr.syncState()
+        
+        if len(self._retained_order) > drawn:
+            codes.append(f"r2scene_draw({scene}, {ctx}, {drawn}, {len(self._retained_order)});")
+        
+        if codes:
+            cvr.evaluate_js("".join(codes))
+        self._scene_drawn = True
+    
+    def _sync_retained(self) -> tuple[list[tuple[int, RenderItem]], str|None]:
+        # returns the items which must still be drawn immediately, with the number of retained items before each,
+        # and the code updating the page copy, None when nothing changed
+        adds: list[str] = []
+        updates: list[str] = []
+        order: list[int] = []
+        immediate: list[tuple[int, RenderItem]] = []
+        seen: set[int] = set()
+        
+        for item in self.items:
+            attrs = getattr(item, "retainedAttributes", None)
+            if attrs is None:
+                immediate.append((len(order), item))
+                continue
+            
+            entry = self._retained_ids.get(id(item))
+            if entry is None or entry[0] is not item:
+                rid = self._retained_nextid
+                self._retained_nextid += 1
+                self._retained_ids[id(item)] = (item, rid)
+                values = {name: jsbridge.stringify_pyobj(getattr(item, name)) for name in attrs}
+                self._retained_values[rid] = values
+                adds.append(f"[{rid},{jsbridge.stringify_pyobj(item.itemType())},{self._jsobject(values)}]")
+            else:
+                rid = entry[1]
+                dirty = self._frame_dirty.get(id(item))
+                if dirty is None or dirty:
+                    values = self._retained_values[rid]
+                    changed = {}
+                    for name in attrs:
+                        if dirty is None or name in dirty:
+                            v = jsbridge.stringify_pyobj(getattr(item, name))
+                            if values[name] != v:
+                                values[name] = changed[name] = v
+                    if changed:
+                        updates.append(f"[{rid},{self._jsobject(changed)}]")
+            
+            seen.add(id(item))
+            order.append(rid)
+        
+        removes = []
+        for key in self._retained_ids.keys() - seen:
+            _, rid = self._retained_ids.pop(key)
+            self._retained_values.pop(rid)
+            removes.append(rid)
+        
+        order_changed = order != self._retained_order
+        self._retained_order = order
+        
+        if not (adds or updates or removes or order_changed):
+            return immediate, None
+        
+        return immediate, (
+            f"r2scene_sync({jsbridge.stringify_pyobj(self.scene)}, "
+            f"[{",".join(adds)}], [{",".join(updates)}], {jsbridge.iterable2jsarray(removes)}, "
+            f"{jsbridge.iterable2jsarray(order) if order_changed else "null"});"
+        )
+    
+    @staticmethod
+    def _jsobject(values: dict[str, str]) -> str:
+        return "{" + ",".join(f"{name}:{v}" for name, v in values.items()) + "}"
+    
+    def releaseScene(self):
+        self.canvas_render.evaluate_js(f"delete r2scenes[{jsbridge.stringify_pyobj(self.scene)}];")
+        self._retained_ids.clear()
+        self._retained_values.clear()
+        self._retained_order = []
+        self._scene_drawn = False
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import io
+import os
+import math
+import random
+import struct
+import typing
+
+from .. import jsbridge
+from .. import respack
+from .. import public_objects
+
+if typing.TYPE_CHECKING:
+    from .. import webwindow
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+sourceType = bytes | str | os.PathLike
+placementType = tuple[int, int, int]
+
+def image_size(data: bytes) -> tuple[int, int]:
+    """
+    reads (width, height) from the header of a png, gif, bmp, jpeg or webp image, for packing without Pillow
+    """
+    
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", data[16:24])
+    
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", data[6:10])
+    
+    if data[:2] == b"BM":
+        width, height = struct.unpack("<ii", data[18:26])
+        return (width, abs(height))
+    
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        chunk = data[12:16]
+        if chunk == b"VP8X":
+            return (int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1)
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return ((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return (width & 0x3FFF, height & 0x3FFF)
+    
+    if data[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                i += 1
+                continue
+            
+            marker = data[i + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                i += 1 if marker == 0xFF else 2
+                continue
+            
+            # start of frame markers, except DHT, JPG and DAC which share the range
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[i + 5:i + 9])
+                return (width, height)
+            
+            i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    
+    raise ValueError("unknown image format, install Pillow to pack it")
+
+class _MaxRectsBin:
+    """
+    maxrects bin, free space is kept as maximal (overlapping) rectangles,
+    new rectangles go where they leave the shortest leftover side
+    """
+    
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.free: list[tuple[int, int, int, int]] = [(0, 0, width, height)]
+        self.used_width = 0
+        self.used_height = 0
+    
+    def insert(self, width: int, height: int) -> tuple[int, int]|None:
+        best = None
+        best_score = (math.inf, math.inf)
+        
+        for fx, fy, fw, fh in self.free:
+            if width <= fw and height <= fh:
+                leftover_w, leftover_h = fw - width, fh - height
+                score = (min(leftover_w, leftover_h), max(leftover_w, leftover_h))
+                if score < best_score:
+                    best, best_score = (fx, fy), score
+        
+        if best is None:
+            return None
+        
+        self._split(best[0], best[1], width, height)
+        self.used_width = max(self.used_width, best[0] + width)
+        self.used_height = max(self.used_height, best[1] + height)
+        return best
+    
+    def _split(self, ux: int, uy: int, uw: int, uh: int):
+        free = []
+        for rect in self.free:
+            fx, fy, fw, fh = rect
+            if ux >= fx + fw or ux + uw <= fx or uy >= fy + fh or uy + uh <= fy:
+                free.append(rect)
+                continue
+            
+            if ux > fx: free.append((fx, fy, ux - fx, fh))
+            if ux + uw < fx + fw: free.append((ux + uw, fy, fx + fw - ux - uw, fh))
+            if uy > fy: free.append((fx, fy, fw, uy - fy))
+            if uy + uh < fy + fh: free.append((fx, uy + uh, fw, fy + fh - uy - uh))
+        
+        def contained(i: int, a: tuple[int, int, int, int]):
+            for j, b in enumerate(free):
+                if j != i and b[0] <= a[0] and b[1] <= a[1] and a[0] + a[2] <= b[0] + b[2] and a[1] + a[3] <= b[1] + b[3]:
+                    if a != b or j < i:
+                        return True
+            return False
+        
+        self.free = [rect for i, rect in enumerate(free) if not contained(i, rect)]
+
+def pack_rects(
+    sizes: typing.Sequence[tuple[int, int]],
+    max_width: int = 2048,
+    max_height: int = 2048,
+    padding: int = 1
+) -> tuple[list[placementType], list[tuple[int, int]]]:
+    """
+    packs sizes into as few max_width x max_height sheets as it can,
+    returns (sheet, x, y) for each size in order and the used size of each sheet,
+    padding is left free to the right of and below every rectangle so sampling never bleeds into a neighbour
+    """
+    
+    placements: list[placementType|None] = [None] * len(sizes)
+    bins: list[_MaxRectsBin] = []
+    
+    # big rectangles first, small ones fill the gaps
+    order = sorted(range(len(sizes)), key=lambda i: (max(sizes[i]), sizes[i][0] * sizes[i][1]), reverse=True)
+    
+    for i in order:
+        width, height = sizes[i][0] + padding, sizes[i][1] + padding
+        if width - padding > max_width or height - padding > max_height:
+            raise ValueError(f"a {sizes[i][0]}x{sizes[i][1]} image does not fit in a {max_width}x{max_height} sheet")
+        
+        for sheet, sheet_bin in enumerate(bins):
+            position = sheet_bin.insert(width, height)
+            if position is not None:
+                break
+        else:
+            # the padding of the last column / row may stick out of the sheet
+            sheet_bin = _MaxRectsBin(max_width + padding, max_height + padding)
+            bins.append(sheet_bin)
+            sheet = len(bins) - 1
+            position = sheet_bin.insert(width, height)
+        
+        placements[i] = (sheet, *position)
+    
+    return placements, [(b.used_width - padding, b.used_height - padding) for b in bins]
+
+class AtlasSprite:
+    """
+    a sub-rectangle of an atlas sheet, drawImage and SpriteBatch.fromSprites draw only this rectangle
+    """
+    
+    def __init__(self, name: str, sheet: jsbridge.drawable_type, sx: int, sy: int, width: int, height: int):
+        self.name = name
+        self.sheet = sheet
+        self.sx = sx
+        self.sy = sy
+        self.width = width
+        self.height = height
+    
+    def __repr__(self):
+        return f"AtlasSprite({self.name!r}, {self.sheet.v}, {self.sx}, {self.sy}, {self.width}, {self.height})"
+
+class TextureAtlas:
+    def __init__(self, sheets: list[jsbridge.drawable_type], sprites: dict[str, AtlasSprite]):
+        self.sheets = sheets
+        self.sprites = sprites
+    
+    def __getitem__(self, name: str) -> AtlasSprite:
+        return self.sprites[name]
+    
+    def __contains__(self, name: str):
+        return name in self.sprites
+    
+    def __iter__(self):
+        return iter(self.sprites.values())
+    
+    def __len__(self):
+        return len(self.sprites)
+    
+    def release(self, window: webwindow.WebWindow):
+        for sheet in self.sheets:
+            sheet.release_ref(window)
+
+class AtlasBuilder:
+    """
+    packs images into a few sheets, the sheets are composed by Pillow when it is installed,
+    otherwise the sources are sent to the page as one resource pack and composed there
+    """
+    
+    def __init__(self, max_size: int = 2048, padding: int = 1):
+        self.max_size = max_size
+        self.padding = padding
+        self._sources: dict[str, typing.Any] = {}
+    
+    def __len__(self):
+        return len(self._sources)
+    
+    def add(self, name: str, source: sourceType|typing.Any) -> AtlasBuilder:
+        # source is encoded image bytes, a path, or a PIL image
+        self._sources[name] = source
+        return self
+    
+    def addDirectory(self, root: str, prefix: str = "", extensions: typing.Iterable[str] = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp")) -> AtlasBuilder:
+        extensions = {i.lower() for i in extensions}
+        
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in extensions:
+                    path = os.path.join(dirpath, filename)
+                    self.add(prefix + os.path.relpath(path, root).replace(os.sep, "/"), path)
+        return self
+    
+    def _encoded(self, source: typing.Any) -> bytes:
+        if isinstance(source, bytes):
+            return source
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                return f.read()
+        raise TypeError(f"cannot pack {type(source).__name__} without Pillow")
+    
+    def _opened(self, source: typing.Any):
+        if isinstance(source, bytes):
+            return Image.open(io.BytesIO(source))
+        if isinstance(source, (str, os.PathLike)):
+            return Image.open(source)
+        return source
+    
+    def build(self, window: webwindow.WebWindow, use_pillow: bool|None = None) -> public_objects.pythonPromise[TextureAtlas]:
+        """
+        the promise resolves once every sheet is loaded by the page, sprites can be drawn from then on
+        """
+        
+        use_pillow = Image is not None if use_pillow is None else use_pillow
+        if use_pillow and Image is None:
+            raise ImportError("AtlasBuilder(use_pillow=True) needs Pillow, install it with `pip install pywebuikit[pillow]`")
+        
+        names = list(self._sources)
+        if use_pillow:
+            images = [self._opened(self._sources[name]) for name in names]
+            sizes = [image.size for image in images]
+        else:
+            encoded = [self._encoded(self._sources[name]) for name in names]
+            sizes = [image_size(data) for data in encoded]
+        
+        placements, sheet_sizes = pack_rects(sizes, self.max_size, self.max_size, self.padding)
+        
+        atlas_id = f"atlas_{random.randint(0, 2 << 31)}"
+        sheet_names = [f"{atlas_id}_{i}" for i in range(len(sheet_sizes))]
+        resources: dict[str, bytes] = {}
+        
+        if use_pillow:
+            sheets = [jsbridge.HTMLImageElement(name) for name in sheet_names]
+            
+            for i, (width, height) in enumerate(sheet_sizes):
+                sheet = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+                for image, (index, x, y) in zip(images, placements):
+                    if index == i:
+                        sheet.paste(image.convert("RGBA"), (x, y))
+                
+                buffer = io.BytesIO()
+                sheet.save(buffer, "PNG")
+                resources[f"/atlas/{sheet_names[i]}.png"] = buffer.getvalue()
+        else:
+            sheets = [jsbridge.OffscreenCanvas(name) for name in sheet_names]
+            builder = respack.ResPackBuilder()
+            for name, data in zip(names, encoded):
+                builder.add(name, data)
+            pack = builder.build()
+            resources[f"/atlas/{atlas_id}.respack"] = pack.data
+        
+        sprites = {
+            name: AtlasSprite(name, sheets[sheet], x, y, width, height)
+            for name, (sheet, x, y), (width, height) in zip(names, placements, sizes)
+        }
+        promise: public_objects.pythonPromise[TextureAtlas] = public_objects.pythonPromise()
+        
+        def _settle(ok: bool, value: typing.Any):
+            # the page keeps its own copy of the sheets
+            for path in resources:
+                window.fserver_res.pop(path, None)
+            
+            if ok: promise.resolve(TextureAtlas(sheets, sprites))
+            else: promise.reject(value)
+        
+        window.fserver_res.update(resources)
+        urls = [window.getResourceUrl(path) for path in resources]
+        rid = window.jsapi.register_request(_settle)
+        
+        if use_pillow:
+            window.evaluate_js(f"r2loadimages({rid}, {jsbridge.iterable2jsarray(sheet_names)}, {jsbridge.iterable2jsarray(urls)});")
+        else:
+            window.evaluate_js(
+                f"r2atlas_compose({rid}, {jsbridge.iterable2jsarray(sheet_names)}, {jsbridge.stringify_pyobj(urls[0])}, "
+                f"{jsbridge.stringify_pyobj([entry for _, entry in pack.index])}, "
+                f"{jsbridge.stringify_pyobj(sheet_sizes)}, {jsbridge.stringify_pyobj(placements)});"
+            )
+        return promise
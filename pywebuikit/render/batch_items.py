@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import base64
+import typing
+
+from .. import jsbridge
+from .. import public_objects
+from ..render import atlas
+from ..render import geometry
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+numtype = public_objects.numtype
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("batch render items need numpy, install it with `pip install pywebuikit[numpy]`")
+
+class BaseBatch:
+    """
+    many shapes stored as numpy columns, update them with vectorized operations,
+    each batch is sent to the page as one base64 typed array payload and drawn by one js loop,
+    float32 columns come first in the payload, the uint8 rgba column last
+    """
+    
+    floatColumns: tuple[str, ...] = ()
+    jsDrawFunction: str = ""
+    
+    def __init__(self, n: int, **columns: typing.Any):
+        _require_numpy()
+        
+        unknown = columns.keys() - set(self.floatColumns) - {"rgba"}
+        if unknown:
+            raise TypeError(f"unknown columns: {", ".join(sorted(unknown))}")
+        
+        for name in self.floatColumns:
+            setattr(self, name, numpy.zeros(n, dtype=numpy.float32))
+        self.rgba = numpy.zeros((n, 4), dtype=numpy.uint8)
+        self.rgba[:, 3] = 255
+        
+        for name, value in columns.items():
+            getattr(self, name)[...] = value
+    
+    def __len__(self):
+        return len(self.rgba)
+    
+    def update(self, t: numtype) -> typing.Any: ...
+    
+    def setColor(self, color: public_objects.Color, index: typing.Any = slice(None)):
+        self.rgba[index] = (color.r, color.g, color.b, round(color.a * 255))
+    
+    def pack(self) -> bytes:
+        n = len(self)
+        
+        for name in self.floatColumns:
+            if len(getattr(self, name)) != n:
+                raise ValueError(f"column {name} has {len(getattr(self, name))} rows, expected {n}")
+        
+        geometry_data = numpy.empty((n, len(self.floatColumns)), dtype=numpy.float32)
+        for i, name in enumerate(self.floatColumns):
+            geometry_data[:, i] = getattr(self, name)
+        
+        return geometry_data.tobytes() + numpy.ascontiguousarray(self.rgba, dtype=numpy.uint8).tobytes()
+    
+    def drawArgs(self) -> list[str]:
+        # js expressions passed to jsDrawFunction after the payload
+        return []
+    
+    def drawCode(self, ctx: str) -> str:
+        payload = base64.b64encode(self.pack()).decode("ascii")
+        return f"{self.jsDrawFunction}({ctx}, {len(self)}, \"{payload}\"{"".join(f", {i}" for i in self.drawArgs())});"
+
+class RectangleBatch(BaseBatch):
+    floatColumns = ("x", "y", "width", "height")
+    jsDrawFunction = "r2drawrects"
+    
+    def itemType(self):
+        return "builtin-rectangle-batch"
+    
+    def boundingBox(self) -> geometry.rectType:
+        if not len(self): return (0, 0, 0, 0)
+        x1 = float(numpy.minimum(self.x, self.x + self.width).min())
+        y1 = float(numpy.minimum(self.y, self.y + self.height).min())
+        x2 = float(numpy.maximum(self.x, self.x + self.width).max())
+        y2 = float(numpy.maximum(self.y, self.y + self.height).max())
+        return (x1, y1, x2 - x1, y2 - y1)
+
+class CircleBatch(BaseBatch):
+    floatColumns = ("x", "y", "radius")
+    jsDrawFunction = "r2drawcircles"
+    
+    def itemType(self):
+        return "builtin-circle-batch"
+    
+    def boundingBox(self) -> geometry.rectType:
+        if not len(self): return (0, 0, 0, 0)
+        r = numpy.abs(self.radius)
+        x1, y1 = float((self.x - r).min()), float((self.y - r).min())
+        return (x1, y1, float((self.x + r).max()) - x1, float((self.y + r).max()) - y1)
+
+class SpriteBatch(BaseBatch):
+    """
+    draws sub-rectangles (sx, sy, sWidth, sHeight) of one image,
+    the alpha channel of rgba is used as globalAlpha, rgb is ignored
+    """
+    
+    floatColumns = ("x", "y", "width", "height", "sx", "sy", "sWidth", "sHeight")
+    jsDrawFunction = "r2drawsprites"
+    
+    def __init__(self, image: jsbridge.drawable_type, n: int, **columns: typing.Any):
+        super().__init__(n, **columns)
+        self.image = image
+    
+    @classmethod
+    def fromSprites(cls, sprites: typing.Sequence[atlas.AtlasSprite], **columns: typing.Any) -> SpriteBatch:
+        """
+        one entry per sprite, source rectangles and sizes come from the sprites,
+        all of them must be on the same atlas sheet
+        """
+        
+        _require_numpy()
+        sheets = {id(sprite.sheet): sprite.sheet for sprite in sprites}
+        if len(sheets) != 1:
+            raise ValueError(f"sprites of a batch must share one atlas sheet, got {len(sheets)}")
+        
+        n = len(sprites)
+        source = numpy.array([(sprite.sx, sprite.sy, sprite.width, sprite.height) for sprite in sprites], dtype=numpy.float32).reshape(n, 4)
+        defaults = {"sx": source[:, 0], "sy": source[:, 1], "sWidth": source[:, 2], "sHeight": source[:, 3], "width": source[:, 2], "height": source[:, 3]}
+        return cls(next(iter(sheets.values())), n, **{**defaults, **columns})
+    
+    def itemType(self):
+        return "builtin-sprite-batch"
+    
+    def drawArgs(self) -> list[str]:
+        return [jsbridge.stringify_pyobj(self.image)]
+    
+    def boundingBox(self) -> geometry.rectType:
+        return RectangleBatch.boundingBox(self)
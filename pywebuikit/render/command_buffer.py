@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import math
+import typing
+import threading
+
+from .. import webwindow
+from .. import jsbridge
+from .. import public_objects
+
+numtype = public_objects.numtype
+
+OP_SETCTX = 0
+OP_SETATTR = 1
+OP_EVAL = 2
+
+TAG_NUMBER = 0
+TAG_POOL = 1
+TAG_BOOL = 2
+TAG_NULL = 3
+
+METHOD_NAMES = (
+    "arc", "arcTo", "beginPath", "bezierCurveTo", "clearRect", "clip",
+    "closePath", "drawFocusIfNeeded", "drawImage", "ellipse", "fill",
+    "fillRect", "fillText", "lineTo", "moveTo", "putImageData",
+    "quadraticCurveTo", "rect", "reset", "resetTransform", "restore",
+    "rotate", "roundRect", "save", "scale", "setLineDash", "setTransform",
+    "stroke", "strokeRect", "strokeText", "transform", "translate"
+)
+
+OPCODES: dict[str, int] = {name: i + OP_EVAL + 1 for i, name in enumerate(METHOD_NAMES)}
+OPNAMES: tuple[str|None, ...] = (None, ) * (OP_EVAL + 1) + METHOD_NAMES
+
+class CommandBuffer:
+    """
+    encodes canvas calls as a flat array of numbers:
+    [opcode, argc, (tag, value) * argc, ...]
+    non-numeric operands are stored in a per-flush pool of js expressions,
+    the page replays the buffer with r2cmdbuf without eval-ing any call,
+    the flush itself is still one r2cmdbuf(...) call sent as js source,
+    a pool expression is evaluated when an op first uses it after the last eval op,
+    so it sees what the evals before it changed
+    """
+
+    def __init__(self, window: webwindow.WebWindow, max_ops: int = 1 << 16):
+        self.window = window
+        self.max_ops = max_ops
+        self.ops: list[numtype] = []
+        self.pool: list[str] = []
+        self._pool_index: dict[str, int] = {}
+        self._current_ctx: str|None = None
+        self._op_count = 0
+        self._lock = threading.RLock()
+
+        self.setup()
+
+    def setup(self):
+        self.window.evaluate_js(f"r2cmdbuf_ops = {jsbridge.iterable2jsarray(OPNAMES)};")
+
+    def __len__(self):
+        return len(self.ops)
+
+    def _pool_ref(self, code: str) -> int:
+        index = self._pool_index.get(code)
+        if index is None:
+            index = len(self.pool)
+            self.pool.append(code)
+            self._pool_index[code] = index
+        return index
+
+    def _push_operand(self, v: jsbridge.pyobj_sifytype):
+        ops = self.ops
+        t = type(v)
+
+        if t is bool:
+            ops.append(TAG_BOOL)
+            ops.append(1 if v else 0)
+            return
+
+        if t is float or t is int:
+            try:
+                finite = math.isfinite(v)
+            except OverflowError:
+                # an int too large for a double, it goes through the pool as its source
+                finite = False
+
+            if finite:
+                ops.append(TAG_NUMBER)
+                ops.append(v)
+                return
+        elif v is None:
+            ops.append(TAG_NULL)
+            ops.append(0)
+            return
+
+        ops.append(TAG_POOL)
+        ops.append(self._pool_ref(jsbridge.stringify_pyobj(v)))
+
+    def _push_op(self, ctx: str|None, opcode: int, args: typing.Iterable[jsbridge.pyobj_sifytype], argc: int):
+        if ctx is not None and ctx != self._current_ctx:
+            self._current_ctx = ctx
+            self.ops.append(OP_SETCTX)
+            self.ops.append(1)
+            self.ops.append(TAG_POOL)
+            self.ops.append(self._pool_ref(ctx))
+
+        self._op_count += 1
+        self.ops.append(opcode)
+        self.ops.append(argc)
+        for arg in args:
+            self._push_operand(arg)
+
+        if len(self.ops) >= self.max_ops:
+            self.flush()
+
+    def call_method(self, ctx: str, method: str, args: tuple[jsbridge.pyobj_sifytype]):
+        with self._lock:
+            self._push_op(ctx, OPCODES[method], args, len(args))
+
+    def set_attribute(self, ctx: str, name: str, value: jsbridge.pyobj_sifytype):
+        with self._lock:
+            self._push_op(ctx, OP_SETATTR, (name, value), 2)
+
+    def eval(self, code: str):
+        with self._lock:
+            self._push_op(None, OP_EVAL, (code, ), 1)
+            # the eval may change what the context expression refers to
+            self._current_ctx = None
+
+    def encode(self) -> str:
+        return f"r2cmdbuf([{','.join(map(str, self.ops))}], [{','.join(f"() => ({code})" for code in self.pool)}]);"
+
+    def clear(self):
+        self.ops = []
+        self.pool = []
+        self._pool_index = {}
+        self._current_ctx = None
+        self._op_count = 0
+
+    def flush(self):
+        with self._lock:
+            if not self.ops:
+                return
+
+            code = self.encode()
+            if self.window.telemetry is not None:
+                # the flush itself is counted by evaluate_js
+                self.window.telemetry.record_commands(self._op_count - 1)
+            self.clear()
+            self.window.evaluate_js(code)
+
+class WorkerCommandBuffer(CommandBuffer):
+    """
+    a command buffer replayed by r2cmdbuf inside the render worker,
+    the pool is sent as js source and evaluated in the worker, where the contexts and images live,
+    lazily as on the page
+    """
+
+    def setup(self):
+        code = f"r2cmdbuf_ops = {jsbridge.iterable2jsarray(OPNAMES)};"
+        self.window.evaluate_js(f"r2worker_eval({jsbridge.stringify_pyobj(code)});")
+
+    def encode(self) -> str:
+        return f"r2worker_cmdbuf([{','.join(map(str, self.ops))}], {jsbridge.iterable2jsarray(self.pool)});"
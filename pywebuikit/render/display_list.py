@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import random
+import typing
+import weakref
+
+from .. import jsbridge
+from .._real_overload import register_placeholder
+from ..render import command_buffer
+
+if typing.TYPE_CHECKING:
+    from ..render import BaseRender
+
+# calls which return nothing, everything else needs a result on the python side and can not be recorded
+RECORDABLE_METHODS = frozenset(command_buffer.METHOD_NAMES)
+
+_MISSING = object()
+
+class DisplayListExpr:
+    """
+    a js expression over the parameters of a recording, arithmetic on it builds a new expression,
+    overloaded canvas methods accept it for any argument type
+    """
+    
+    __slots__ = ("code", )
+    
+    def __init__(self, code: str):
+        self.code = code
+    
+    def __pywebuikit_jseval__(self):
+        return self.code
+    
+    def __repr__(self):
+        return f"DisplayListExpr({self.code!r})"
+    
+    def _binary(self, op: str, other: typing.Any, reverse: bool = False):
+        a, b = jsbridge.stringify_pyobj(self), jsbridge.stringify_pyobj(other)
+        return DisplayListExpr(f"({b}{op}{a})" if reverse else f"({a}{op}{b})")
+    
+    def __add__(self, other): return self._binary("+", other)
+    def __radd__(self, other): return self._binary("+", other, True)
+    def __sub__(self, other): return self._binary("-", other)
+    def __rsub__(self, other): return self._binary("-", other, True)
+    def __mul__(self, other): return self._binary("*", other)
+    def __rmul__(self, other): return self._binary("*", other, True)
+    def __truediv__(self, other): return self._binary("/", other)
+    def __rtruediv__(self, other): return self._binary("/", other, True)
+    def __mod__(self, other): return self._binary("%", other)
+    def __rmod__(self, other): return self._binary("%", other, True)
+    def __pow__(self, other): return self._binary("**", other)
+    def __rpow__(self, other): return self._binary("**", other, True)
+    def __neg__(self): return DisplayListExpr(f"(-{self.code})")
+
+register_placeholder(DisplayListExpr)
+
+def _delete_on_page(evaluate_js: typing.Callable[[str], typing.Any], var: str):
+    evaluate_js(f"delete {var};")
+
+class DisplayList:
+    """
+    canvas calls recorded once and compiled into one js function on the page,
+    playing it is a single call with the parameter values,
+    with isolate the function runs between save() and restore(), so it leaves the state as it found it,
+    the page function is deleted by release(), by a new recording with the same name,
+    or when this object is garbage collected
+    """
+    
+    def __init__(self, render: BaseRender, name: str, isolate: bool = True):
+        self.render = render
+        self.name = name
+        self.isolate = isolate
+        self.var = f"displaylist_{random.randint(0, 2 << 31)}"
+        self.params: dict[str, typing.Any] = {}
+        self.defined = False
+        self._body: list[str] = []
+        self._constants: dict[str, str] = {}
+        self._finalizer: weakref.finalize|None = None
+    
+    def __len__(self):
+        return len(self._body)
+    
+    def __enter__(self):
+        if self.defined:
+            raise RuntimeError(f"display list {self.name!r} is already recorded")
+        self.render._start_recording(self)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.render._stop_recording(self, exc_type is None)
+    
+    def param(self, name: str, default: typing.Any = _MISSING) -> DisplayListExpr:
+        """
+        a value given to play(), a parameter without a default must always be given
+        """
+        
+        if not name.isidentifier():
+            raise ValueError(f"parameter name must be an identifier, got {name!r}")
+        
+        self.params[name] = default
+        return DisplayListExpr(f"p_{name}")
+    
+    def constant(self, code: str) -> str:
+        """
+        evaluates code once when the list is defined, e.g. a Path2D, returns the name to use it in calls
+        """
+        
+        name = self._constants.get(code)
+        if name is None:
+            name = self._constants[code] = f"k{len(self._constants)}"
+        return name
+    
+    def append(self, code: str):
+        self._body.append(code)
+    
+    def call(self, ctx: str, method: str, args: tuple):
+        if method not in RECORDABLE_METHODS:
+            raise RuntimeError(f"{method} returns a value and can not be recorded")
+        self._body.append(f"{ctx}.{method}({jsbridge.iterable2jsarray(args, False)});")
+    
+    def setAttribute(self, ctx: str, name: str, value: jsbridge.pyobj_sifytype):
+        self._body.append(f"{ctx}.{name} = ({jsbridge.stringify_pyobj(value)});")
+    
+    def defineCode(self) -> str:
+        constants = "".join(f"const {name} = {code};" for code, name in self._constants.items())
+        params = ",".join(f"p_{name}" for name in self.params)
+        body = "".join(self._body)
+        if self.isolate:
+            ctx = jsbridge.stringify_pyobj(self.render)
+            body = f"{ctx}.save();{body}{ctx}.restore();"
+        return f"{self.var} = (() => {{{constants}return ({params}) => {{{body}}};}})();"
+    
+    def define(self):
+        # on the page or in the render worker, where the renderer draws,
+        # not render.evaluate_js: the finalizer would keep the renderer alive through it
+        worker = self.render.worker
+        evaluate_js = self.render.window.evaluate_js if worker is None else worker.evaluate_js
+        evaluate_js(self.defineCode())
+        self.defined = True
+        self._finalizer = weakref.finalize(self, _delete_on_page, evaluate_js, self.var)
+        self._finalizer.atexit = False
+    
+    def playCode(self, **values: typing.Any) -> str:
+        if not self.defined:
+            raise RuntimeError(f"display list {self.name!r} is not defined, it was released or not recorded yet")
+        
+        unknown = values.keys() - self.params.keys()
+        if unknown:
+            raise TypeError(f"display list {self.name!r} has no parameters {", ".join(sorted(unknown))}")
+        
+        args = []
+        for name, default in self.params.items():
+            value = values.get(name, default)
+            if value is _MISSING:
+                raise TypeError(f"display list {self.name!r} needs parameter {name!r}")
+            args.append(value)
+        
+        return f"{self.var}({jsbridge.iterable2jsarray(args, False)});"
+    
+    def release(self):
+        self.defined = False
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
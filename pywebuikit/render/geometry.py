@@ -0,0 +1,65 @@
+import math
+
+from .. import public_objects
+
+numtype = public_objects.numtype
+rectType = tuple[numtype, numtype, numtype, numtype] # x, y, width, height
+
+def normalize_rect(x: numtype, y: numtype, width: numtype, height: numtype) -> rectType:
+    if width < 0: x, width = x + width, -width
+    if height < 0: y, height = y + height, -height
+    return (x, y, width, height)
+
+def pixel_rect(rect: rectType, margin: numtype = 1) -> rectType:
+    # expand to whole pixels, the margin covers antialiased edges
+    x1 = math.floor(rect[0] - margin)
+    y1 = math.floor(rect[1] - margin)
+    x2 = math.ceil(rect[0] + rect[2] + margin)
+    y2 = math.ceil(rect[1] + rect[3] + margin)
+    return (x1, y1, x2 - x1, y2 - y1)
+
+def rects_intersect(a: rectType, b: rectType) -> bool:
+    return (
+        a[0] < b[0] + b[2] and b[0] < a[0] + a[2]
+        and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+    )
+
+def rect_contains_point(rect: rectType, x: numtype, y: numtype) -> bool:
+    return rect[0] <= x <= rect[0] + rect[2] and rect[1] <= y <= rect[1] + rect[3]
+
+def rect_union(a: rectType, b: rectType) -> rectType:
+    x1 = min(a[0], b[0])
+    y1 = min(a[1], b[1])
+    x2 = max(a[0] + a[2], b[0] + b[2])
+    y2 = max(a[1] + a[3], b[1] + b[3])
+    return (x1, y1, x2 - x1, y2 - y1)
+
+def rect_clip(rect: rectType, bound: rectType) -> rectType|None:
+    x1 = max(rect[0], bound[0])
+    y1 = max(rect[1], bound[1])
+    x2 = min(rect[0] + rect[2], bound[0] + bound[2])
+    y2 = min(rect[1] + rect[3], bound[1] + bound[3])
+    return (x1, y1, x2 - x1, y2 - y1) if x2 > x1 and y2 > y1 else None
+
+def merge_rects(rects: list[rectType], max_count: int = 16) -> list[rectType]:
+    # merges overlapping rects until none overlap,
+    # if more than max_count remain they are collapsed into their union
+    merged: list[rectType] = []
+    
+    for rect in rects:
+        while True:
+            for i, other in enumerate(merged):
+                if rects_intersect(rect, other):
+                    rect = rect_union(rect, merged.pop(i))
+                    break
+            else:
+                break
+        merged.append(rect)
+    
+    if len(merged) > max_count:
+        union = merged[0]
+        for rect in merged[1:]:
+            union = rect_union(union, rect)
+        merged = [union]
+    
+    return merged
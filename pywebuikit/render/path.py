@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import math
+import random
+import typing
+import collections
+
+from .. import jsbridge
+from .. import public_objects
+
+if typing.TYPE_CHECKING:
+    from .. import webwindow
+
+numtype = public_objects.numtype
+pointType = tuple[numtype, numtype]
+
+_TAU = math.pi * 2
+
+def _num(v: numtype) -> str:
+    return repr(v) if type(v) is int else repr(float(v))
+
+class PathBuilder:
+    """
+    records canvas path calls as svg path data, so the whole path is one new Path2D(data) on the page,
+    arcs and ellipses become svg arc commands and arcTo is resolved to its tangent points here,
+    calls return the builder: PathBuilder().moveTo(0, 0).lineTo(10, 0).closePath()
+    """
+    
+    def __init__(self, data: str|None = None):
+        self._parts: list[str] = []
+        self._current: pointType|None = None
+        self._start: pointType|None = None
+        self._data: str|None = None
+        
+        if data is not None:
+            self.svg(data)
+    
+    def __len__(self):
+        return len(self._parts)
+    
+    def _append(self, part: str):
+        self._parts.append(part)
+        self._data = None
+    
+    def data(self) -> str:
+        if self._data is None:
+            self._data = " ".join(self._parts)
+        return self._data
+    
+    def __pywebuikit_jseval__(self):
+        # an uncached path, Path2DCache keeps one handle per distinct path
+        return f"new Path2D({jsbridge.stringify_pyobj(self.data())})"
+    
+    def _ensure(self, x: numtype, y: numtype):
+        # canvas calls without a current point start a subpath at their first point
+        if self._current is None:
+            self.moveTo(x, y)
+    
+    def moveTo(self, x: numtype, y: numtype) -> PathBuilder:
+        self._append(f"M {_num(x)} {_num(y)}")
+        self._current = self._start = (x, y)
+        return self
+    
+    def lineTo(self, x: numtype, y: numtype) -> PathBuilder:
+        if self._current is None:
+            return self.moveTo(x, y)
+        
+        self._append(f"L {_num(x)} {_num(y)}")
+        self._current = (x, y)
+        return self
+    
+    def quadraticCurveTo(self, cpx: numtype, cpy: numtype, x: numtype, y: numtype) -> PathBuilder:
+        self._ensure(cpx, cpy)
+        self._append(f"Q {_num(cpx)} {_num(cpy)} {_num(x)} {_num(y)}")
+        self._current = (x, y)
+        return self
+    
+    def bezierCurveTo(self, cp1x: numtype, cp1y: numtype, cp2x: numtype, cp2y: numtype, x: numtype, y: numtype) -> PathBuilder:
+        self._ensure(cp1x, cp1y)
+        self._append(f"C {_num(cp1x)} {_num(cp1y)} {_num(cp2x)} {_num(cp2y)} {_num(x)} {_num(y)}")
+        self._current = (x, y)
+        return self
+    
+    def closePath(self) -> PathBuilder:
+        if self._current is not None:
+            self._append("Z")
+            self._current = self._start
+        return self
+    
+    def rect(self, x: numtype, y: numtype, width: numtype, height: numtype) -> PathBuilder:
+        self.moveTo(x, y)
+        self._append(f"L {_num(x + width)} {_num(y)} L {_num(x + width)} {_num(y + height)} L {_num(x)} {_num(y + height)} Z")
+        return self
+    
+    def polygon(self, points: typing.Iterable[pointType], close: bool = True) -> PathBuilder:
+        points = iter(points)
+        first = next(points, None)
+        if first is None:
+            return self
+        
+        self.moveTo(*first)
+        for x, y in points:
+            self.lineTo(x, y)
+        
+        return self.closePath() if close else self
+    
+    def ellipse(
+        self,
+        x: numtype, y: numtype,
+        radiusX: numtype, radiusY: numtype,
+        rotation: numtype,
+        startAngle: numtype, endAngle: numtype,
+        counterclockwise: bool = False
+    ) -> PathBuilder:
+        if radiusX < 0 or radiusY < 0:
+            raise ValueError("radii must not be negative")
+        
+        # the swept angle as canvas defines it: a full turn at most, otherwise taken modulo a turn
+        sweep = startAngle - endAngle if counterclockwise else endAngle - startAngle
+        sweep = _TAU if sweep >= _TAU else sweep % _TAU
+        if counterclockwise:
+            sweep = -sweep
+        
+        cos_r, sin_r = math.cos(rotation), math.sin(rotation)
+        
+        def point(angle: float) -> pointType:
+            px, py = radiusX * math.cos(angle), radiusY * math.sin(angle)
+            return (x + px * cos_r - py * sin_r, y + px * sin_r + py * cos_r)
+        
+        self.lineTo(*point(startAngle))
+        if sweep == 0:
+            return self
+        
+        # svg arcs can not draw a full turn, every piece is at most half of one
+        pieces = math.ceil(abs(sweep) / math.pi)
+        rotation_deg = _num(math.degrees(rotation))
+        flag = 1 if sweep > 0 else 0
+        
+        for i in range(1, pieces + 1):
+            end = point(startAngle + sweep * i / pieces)
+            self._append(f"A {_num(radiusX)} {_num(radiusY)} {rotation_deg} 0 {flag} {_num(end[0])} {_num(end[1])}")
+            self._current = end
+        
+        return self
+    
+    def arc(self, x: numtype, y: numtype, radius: numtype, startAngle: numtype, endAngle: numtype, counterclockwise: bool = False) -> PathBuilder:
+        return self.ellipse(x, y, radius, radius, 0, startAngle, endAngle, counterclockwise)
+    
+    def circle(self, x: numtype, y: numtype, radius: numtype) -> PathBuilder:
+        self.moveTo(x + radius, y)
+        self.arc(x, y, radius, 0, _TAU)
+        return self.closePath()
+    
+    def arcTo(self, x1: numtype, y1: numtype, x2: numtype, y2: numtype, radius: numtype) -> PathBuilder:
+        if radius < 0:
+            raise ValueError("radius must not be negative")
+        
+        if self._current is None:
+            if self._parts:
+                raise ValueError("arcTo needs a known current point, it can not follow raw svg data")
+            self.moveTo(x1, y1)
+        
+        x0, y0 = self._current
+        v1x, v1y = x0 - x1, y0 - y1
+        v2x, v2y = x2 - x1, y2 - y1
+        cross = v1x * v2y - v1y * v2x
+        
+        if (x0, y0) == (x1, y1) or (x1, y1) == (x2, y2) or radius == 0 or abs(cross) < 1e-12:
+            return self.lineTo(x1, y1)
+        
+        len1, len2 = math.hypot(v1x, v1y), math.hypot(v2x, v2y)
+        angle = math.acos(max(-1.0, min(1.0, (v1x * v2x + v1y * v2y) / (len1 * len2))))
+        distance = radius / math.tan(angle / 2)
+        
+        self.lineTo(x1 + v1x / len1 * distance, y1 + v1y / len1 * distance)
+        end = (x1 + v2x / len2 * distance, y1 + v2y / len2 * distance)
+        self._append(f"A {_num(radius)} {_num(radius)} 0 0 {1 if cross < 0 else 0} {_num(end[0])} {_num(end[1])}")
+        self._current = end
+        return self
+    
+    def svg(self, data: str) -> PathBuilder:
+        """
+        appends raw svg path data, the current point is unknown afterwards
+        """
+        
+        data = data.strip()
+        if data:
+            self._append(data)
+            self._current = self._start = None
+        return self
+
+class Path2DCache:
+    """
+    one page side Path2D per distinct path data, least recently used handles are deleted past max_size,
+    the deletes are sent with the next new path,
+    evaluate runs the code creating the handles, window.evaluate_js by default
+    """
+    
+    def __init__(self, window: webwindow.WebWindow, max_size: int = 256, evaluate: typing.Callable[[str], typing.Any]|None = None):
+        self.window = window
+        self.max_size = max_size
+        self.evaluate = window.evaluate_js if evaluate is None else evaluate
+        self.stats: dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+        self._paths: collections.OrderedDict[str, jsbridge.Path2D] = collections.OrderedDict()
+        self._released: list[str] = []
+    
+    def __len__(self):
+        return len(self._paths)
+    
+    def get(self, path: PathBuilder|str) -> jsbridge.Path2D:
+        data = path if isinstance(path, str) else path.data()
+        
+        handle = self._paths.get(data)
+        if handle is not None:
+            self._paths.move_to_end(data)
+            self.stats["hits"] += 1
+            return handle
+        
+        self.stats["misses"] += 1
+        while len(self._paths) >= self.max_size:
+            self._released.append(self._paths.popitem(last=False)[1].v)
+            self.stats["evictions"] += 1
+        
+        handle = jsbridge.Path2D(f"path2d_{random.randint(0, 2 << 31)}")
+        releases = "".join(f"delete {name};" for name in self._released)
+        self._released.clear()
+        
+        self.evaluate(f"{releases}{handle.v} = new Path2D({jsbridge.stringify_pyobj(data)});")
+        self._paths[data] = handle
+        return handle
+    
+    def clear(self):
+        self._released.extend(handle.v for handle in self._paths.values())
+        self._paths.clear()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import random
+import typing
+
+from .. import jsbridge
+
+if typing.TYPE_CHECKING:
+    from .. import webwindow
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("pixel transfer needs numpy, install it with `pip install pywebuikit[numpy]`")
+
+def as_rgba(array: typing.Any) -> numpy.ndarray:
+    """
+    (height, width, 4) contiguous uint8, (height, width, 3) and (height, width) arrays get an opaque alpha channel
+    """
+    
+    _require_numpy()
+    array = numpy.asarray(array)
+    
+    if array.ndim == 2:
+        array = array[:, :, None].repeat(3, axis=2)
+    
+    if array.ndim != 3 or array.shape[2] not in (3, 4):
+        raise ValueError(f"expected a (height, width, 3 or 4) array, got shape {array.shape}")
+    
+    if array.shape[2] == 3:
+        rgba = numpy.empty((*array.shape[:2], 4), dtype=numpy.uint8)
+        rgba[:, :, :3] = array
+        rgba[:, :, 3] = 255
+        return rgba
+    
+    return numpy.ascontiguousarray(array, dtype=numpy.uint8)
+
+waitType = typing.Callable[[str, float|None], typing.Any]
+
+def read_image_data(window: webwindow.WebWindow, imagedata: str, timeout: float|None = None, wait: waitType|None = None) -> numpy.ndarray:
+    """
+    imagedata is js code evaluating to an ImageData, its pixels are posted to fserver as one binary body,
+    the result is a writable (height, width, 4) uint8 array over that body,
+    wait evaluates the js promise, window.wait_jspromise by default (RenderWorker.request for the worker)
+    """
+    
+    _require_numpy()
+    path = f"/imagedata/{random.randint(0, 2 << 31)}"
+    received: list[bytearray] = []
+    window.fserver_uploads[path] = received.append
+    
+    wait = window.wait_jspromise if wait is None else wait
+    
+    try:
+        width, height = wait(f"r2imagedata_post({imagedata}, {jsbridge.stringify_pyobj(window.getResourceUrl(path))})", timeout)
+    finally:
+        window.fserver_uploads.pop(path, None)
+    
+    return numpy.frombuffer(received[0], dtype=numpy.uint8).reshape(height, width, 4)
+
+def write_image_data(window: webwindow.WebWindow, array: typing.Any, then: str, timeout: float|None = None, wait: waitType|None = None) -> typing.Any:
+    """
+    the page fetches the pixels of array from fserver as an ImageData and calls then(imagedata),
+    blocks until then returned, so later canvas calls see the pixels
+    """
+    
+    rgba = as_rgba(array)
+    height, width = rgba.shape[:2]
+    path = f"/imagedata/{random.randint(0, 2 << 31)}"
+    window.fserver_res[path] = rgba.tobytes()
+    wait = window.wait_jspromise if wait is None else wait
+    
+    try:
+        return wait(f"r2imagedata_fetch({jsbridge.stringify_pyobj(window.getResourceUrl(path))}, {width}, {height}).then({then})", timeout)
+    finally:
+        window.fserver_res.pop(path, None)
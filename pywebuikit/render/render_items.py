@@ -1,9 +1,38 @@
+import typing
+
 from .. import public_objects
+from ..render import geometry
 from .._real_overload import overload, OverloadMeta
 
 numtype = public_objects.numtype
 
-class Rectangle(metaclass=OverloadMeta):
+class DirtyTrackingItem:
+    """
+    records which public attributes were set since the last popDirty,
+    in-place changes (e.g. item.fillColor.r = 0) are not seen, call markDirty for them
+    """
+    
+    def __setattr__(self, name: str, value: typing.Any):
+        super().__setattr__(name, value)
+        
+        if name[0] != "_":
+            dirty = self.__dict__.get("_dirty")
+            if dirty is None:
+                super().__setattr__("_dirty", {name})
+            else:
+                dirty.add(name)
+    
+    def markDirty(self, *names: str):
+        for name in names:
+            self.__setattr__(name, getattr(self, name))
+    
+    def popDirty(self) -> set[str]:
+        return self.__dict__.pop("_dirty", None) or set()
+
+class Rectangle(DirtyTrackingItem, metaclass=OverloadMeta):
+    # attributes mirrored to the page by Canvas2DRenderManager in retained mode
+    retainedAttributes = ("x", "y", "width", "height", "fillColor", "strokeColor", "is_fill", "strokeLineWidth")
+    
     update = lambda self, t: None
     fillColor = public_objects.Color(0, 0, 0, 0)
     strokeColor = public_objects.Color(0, 0, 0, 0)
@@ -26,4 +55,42 @@ class Rectangle(metaclass=OverloadMeta):
     
     def itemType(self):
         return "builtin-rectangle"
-    
\ No newline at end of file
+    
+    def boundingBox(self) -> geometry.rectType:
+        x, y, width, height = geometry.normalize_rect(self.x, self.y, self.width, self.height)
+        m = 0 if self.is_fill else self.strokeLineWidth / 2
+        return (x - m, y - m, width + m * 2, height + m * 2)
+
+class Image(DirtyTrackingItem):
+    """
+    image is any drawable or an atlas.AtlasSprite, which draws only its sheet rectangle
+    """
+    
+    update = lambda self, t: None
+    
+    def __init__(self, image: typing.Any, x: numtype, y: numtype, width: numtype, height: numtype):
+        self.image = image
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+    
+    def itemType(self):
+        return "builtin-image"
+    
+    def boundingBox(self) -> geometry.rectType:
+        return geometry.normalize_rect(self.x, self.y, self.width, self.height)
+
+class DisplayListItem(DirtyTrackingItem):
+    """
+    plays the display list the renderer recorded under name, with params as its parameter values
+    """
+    
+    update = lambda self, t: None
+    
+    def __init__(self, name: str, **params: typing.Any):
+        self.name = name
+        self.params = params
+    
+    def itemType(self):
+        return "builtin-displaylist"
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import random
+import typing
+
+from .. import jscodes
+from .. import jsbridge
+from ..render import command_buffer
+from ..render import path
+
+if typing.TYPE_CHECKING:
+    from .. import webwindow
+
+class RenderWorker:
+    """
+    the web worker the main canvas is transferred to by jscodes.create_2DCanvas_worker,
+    renderers in worker mode send their canvas calls here, so heavy frames do not block
+    input handling, layout and css filters on the main thread,
+    the worker has its own globals: images, Path2Ds and display lists used by it must live there,
+    page images are copied in with shareImage()
+    """
+    
+    def __init__(self, window: webwindow.WebWindow):
+        self.window = window
+        self.cmdbuf: command_buffer.WorkerCommandBuffer|None = None
+        self.paths = path.Path2DCache(window, evaluate=self.evaluate_js)
+        
+        window.evaluate_js(jscodes.create_2DCanvas_worker)
+    
+    def commandBuffer(self) -> command_buffer.WorkerCommandBuffer:
+        if self.cmdbuf is None:
+            self.cmdbuf = command_buffer.WorkerCommandBuffer(self.window)
+        return self.cmdbuf
+    
+    def flush(self) -> None:
+        if self.cmdbuf is not None:
+            self.cmdbuf.flush()
+    
+    def evaluate_js(self, js: str) -> typing.Any:
+        """
+        runs js in the worker, the worker does not answer, so nothing is returned
+        """
+        
+        return self.window.evaluate_js(f"r2worker_eval({jsbridge.stringify_pyobj(js)});")
+    
+    def wait_jspromise(self, code: str, timeout: float|None = None) -> typing.Any:
+        """
+        evaluates code in the worker and waits for its value, promises are awaited there,
+        values which can not be posted back are sent as a plain object of their fields
+        """
+        
+        return self.window.wait_jspromise(f"r2worker_request({jsbridge.stringify_pyobj(code)})", timeout)
+    
+    def request(self, code: str, timeout: float|None = None) -> typing.Any:
+        """
+        the value of code in the worker, inside window.frame() a concurrent.futures.Future like window.evaluate_js returns there,
+        it settles once the batch is sent and the worker answered, outside a frame this waits as wait_jspromise does
+        """
+        
+        if not self.window.jsbatch.active:
+            return self.wait_jspromise(code, timeout)
+        
+        future, _ = self.window._jspromise_future(f"r2worker_request({jsbridge.stringify_pyobj(code)})")
+        return future
+    
+    def shareImage(self, image: jsbridge.drawable_type, timeout: float|None = None) -> jsbridge.ImageBitmap:
+        """
+        copies a page image (or canvas, video frame, ...) into the worker as an ImageBitmap and returns its handle there
+        """
+        
+        handle = jsbridge.ImageBitmap(f"bitmap_{random.randint(0, 2 << 31)}")
+        self.window.wait_jspromise(f"r2worker_share({jsbridge.stringify_pyobj(handle.v)}, {jsbridge.stringify_pyobj(image)})", timeout)
+        return handle
+    
+    def releaseImage(self, handle: jsbridge.ImageBitmap) -> None:
+        self.evaluate_js(f"{handle.v}.close(); delete {handle.v};")
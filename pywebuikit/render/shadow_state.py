@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import math
+import typing
+
+from .. import jsbridge
+from .. import public_objects
+
+numtype = public_objects.numtype
+matrixType = tuple[float, float, float, float, float, float]
+
+TRANSFORM_KEY = "transform"
+TRANSFORM_METHODS = frozenset(("translate", "rotate", "scale", "transform", "setTransform", "resetTransform"))
+# saved and restored by the canvas, but not modelled here, so they always need a real save
+UNTRACKED_STATE_METHODS = frozenset(("clip", "setLineDash"))
+INTERCEPTED_METHODS = TRANSFORM_METHODS | UNTRACKED_STATE_METHODS | {"save", "restore", "reset"}
+
+_IDENTITY: matrixType = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+def _multiply(m: matrixType, n: matrixType) -> matrixType:
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (
+        a * a2 + c * b2,
+        b * a2 + d * b2,
+        a * c2 + c * d2,
+        b * c2 + d * d2,
+        a * e2 + c * f2 + e,
+        b * e2 + d * f2 + f
+    )
+
+def _operation_matrix(method: str, args: tuple) -> matrixType|None:
+    # None when the operands are not plain numbers, the result is then unknown
+    if not all(type(v) is int or type(v) is float for v in args):
+        return None
+    
+    match method, len(args):
+        case "translate", 2: return (1.0, 0.0, 0.0, 1.0, float(args[0]), float(args[1]))
+        case "scale", 2: return (float(args[0]), 0.0, 0.0, float(args[1]), 0.0, 0.0)
+        case "rotate", 1:
+            cos, sin = math.cos(args[0]), math.sin(args[0])
+            return (cos, sin, -sin, cos, 0.0, 0.0)
+        case "transform" | "setTransform", 6: return tuple(map(float, args))
+        case "resetTransform", 0: return _IDENTITY
+    
+    return None
+
+class _Frame:
+    __slots__ = ("values", "snapshot", "untracked", "stale")
+    
+    def __init__(self, values: dict[str, tuple], snapshot: dict[str, tuple]|None = None):
+        # values: key -> (comparison key, value to send), a missing key is unknown
+        self.values = values
+        # the canvas values when the real save() of this frame was sent, None while the save is not sent
+        self.snapshot = snapshot
+        # set once something the shadow can not roll back was sent inside the frame
+        self.untracked = False
+        # keys the canvas may hold a value of the previous frame for, after a dropped restore(); save()
+        self.stale: set[str] = set()
+
+class ShadowState:
+    """
+    python side copy of the canvas state stack, so calls which change nothing are not sent:
+    attributes are sent lazily before the next drawing call and only when they differ from the canvas,
+    transforms with number operands are folded into one setTransform,
+    save() is sent only once the frame changes something a restore must undo,
+    restore(); save() is dropped when the frame between them only changed tracked values,
+    the state is only correct while every change to the context goes through the renderer,
+    call BaseRender.syncState() before and BaseRender.invalidateState() after drawing on it with other code
+    """
+    
+    def __init__(
+        self,
+        send_call: typing.Callable[[str, tuple], typing.Any],
+        send_attribute: typing.Callable[[str, jsbridge.pyobj_sifytype], typing.Any]
+    ):
+        self.send_call = send_call
+        self.send_attribute = send_attribute
+        self.frames: list[_Frame] = [_Frame({})]
+        self.canvas: dict[str, tuple] = {}
+        self._pending: _Frame|None = None
+        self.stats: dict[str, int] = {
+            "attributes_requested": 0, "attributes_sent": 0,
+            "transforms_requested": 0, "transforms_sent": 0,
+            "saves_requested": 0, "saves_sent": 0,
+            "restores_requested": 0, "restores_sent": 0
+        }
+    
+    def removedCommands(self) -> int:
+        stats = self.stats
+        return sum(stats[f"{kind}_requested"] - stats[f"{kind}_sent"] for kind in ("attributes", "transforms", "saves", "restores"))
+    
+    def _send(self, method: str, args: tuple = ()):
+        self._flush_restore()
+        return self.send_call(method, args)
+    
+    def _flush_restore(self):
+        if self._pending is not None:
+            frame, self._pending = self._pending, None
+            self.send_call("restore", ())
+            self.stats["restores_sent"] += 1
+            self.canvas = dict(frame.snapshot)
+    
+    def _real_frame(self) -> _Frame|None:
+        for frame in reversed(self.frames):
+            if frame.snapshot is not None:
+                return frame
+        return None
+    
+    def _resolve(self, frame: _Frame):
+        # sends the dropped restore(); save() after all
+        self._flush_restore()
+        self.send_call("restore", ())
+        self.send_call("save", ())
+        self.stats["restores_sent"] += 1
+        self.stats["saves_sent"] += 1
+        self.canvas = dict(frame.snapshot)
+        frame.stale = set()
+    
+    def _save(self):
+        # sends the save of the top frame, only the innermost real frame may have stale keys
+        frame = self._real_frame()
+        if frame is not None and frame.stale:
+            self._resolve(frame)
+        
+        self._send("save")
+        self.stats["saves_sent"] += 1
+        self.frames[-1].snapshot = dict(self.canvas)
+    
+    def _mark_untracked(self):
+        # up to the innermost real save, that restore is the one which undoes the change,
+        # after a full sync, a frame with stale keys must not be marked
+        for frame in reversed(self.frames):
+            frame.untracked = True
+            if frame.snapshot is not None:
+                break
+    
+    def _needs_save(self, key: str) -> bool:
+        # an unknown value can only be brought back by a real restore
+        for i in range(len(self.frames) - 1, 0, -1):
+            if self.frames[i].snapshot is not None:
+                break
+            if key not in self.frames[i - 1].values:
+                return True
+        return False
+    
+    def setAttribute(self, name: str, value: jsbridge.pyobj_sifytype):
+        self.stats["attributes_requested"] += 1
+        self.frames[-1].values[name] = (jsbridge.stringify_pyobj(value), value)
+    
+    def sync(self, full: bool = False):
+        """
+        sends what is needed for the canvas to match the top frame, called before every drawing call,
+        full also resolves stale keys the top frame knows, so the canvas matches every frame
+        """
+        
+        self._flush_restore()
+        values = self.frames[-1].values
+        
+        frame = self._real_frame()
+        if frame is not None and frame.stale and (full or any(key not in values for key in frame.stale)):
+            self._resolve(frame)
+        
+        changed = self._changed()
+        if not changed:
+            return
+        
+        if self.frames[-1].snapshot is None and any(self._needs_save(key) for key, _ in changed):
+            self._save()
+            changed = self._changed()
+        
+        canvas = self.canvas
+        for key, entry in changed:
+            if key == TRANSFORM_KEY:
+                self.send_call("setTransform", entry[1])
+                self.stats["transforms_sent"] += 1
+            else:
+                self.send_attribute(key, entry[1])
+                self.stats["attributes_sent"] += 1
+            canvas[key] = entry
+    
+    def _changed(self) -> list[tuple[str, tuple]]:
+        canvas = self.canvas
+        return [(key, entry) for key, entry in self.frames[-1].values.items() if canvas.get(key, (None, ))[0] != entry[0]]
+    
+    def call(self, method: str, args: tuple):
+        match method:
+            case "save": return self.save()
+            case "restore": return self.restore()
+            case "reset": return self.reset()
+        
+        if method in TRANSFORM_METHODS:
+            return self.transform(method, args)
+        
+        # clip, setLineDash: the state can not be rolled back without a real save
+        self.sync(True)
+        top = self.frames[-1]
+        if top.snapshot is None and len(self.frames) > 1:
+            self._save()
+        self._mark_untracked()
+        return self.send_call(method, args)
+    
+    def save(self):
+        self.stats["saves_requested"] += 1
+        values = dict(self.frames[-1].values)
+        pending = self._pending
+        
+        if pending is not None and not pending.untracked:
+            # restore(); save() cancel out, the canvas keeps the restored frame and is synced lazily
+            self._pending = None
+            frame = _Frame(values, pending.snapshot)
+            frame.stale = pending.stale | {key for key in self.canvas if key not in values}
+            self.frames.append(frame)
+        else:
+            self.frames.append(_Frame(values))
+    
+    def restore(self):
+        self.stats["restores_requested"] += 1
+        
+        if len(self.frames) == 1:
+            # a save this renderer did not see
+            self._send("restore")
+            self.stats["restores_sent"] += 1
+            return self.invalidate()
+        
+        frame = self.frames.pop()
+        if frame.snapshot is not None:
+            self._flush_restore()
+            self._pending = frame
+    
+    def reset(self):
+        self._pending = None
+        self.frames = [_Frame({})]
+        self.canvas = {}
+        return self.send_call("reset", ())
+    
+    def transform(self, method: str, args: tuple):
+        self.stats["transforms_requested"] += 1
+        top = self.frames[-1]
+        matrix = _operation_matrix(method, args)
+        current = top.values.get(TRANSFORM_KEY)
+        
+        if matrix is not None and method not in ("setTransform", "resetTransform"):
+            matrix = None if current is None else _multiply(current[1], matrix)
+        
+        if matrix is not None:
+            top.values[TRANSFORM_KEY] = (matrix, matrix)
+            return
+        
+        # relative to a transform which is not known, sent as it is
+        self.sync(True)
+        if top.snapshot is None and self._needs_save(TRANSFORM_KEY):
+            self._save()
+        top.values.pop(TRANSFORM_KEY, None)
+        self.canvas.pop(TRANSFORM_KEY, None)
+        self._mark_untracked()
+        self.stats["transforms_sent"] += 1
+        return self.send_call(method, args)
+    
+    def canvasReset(self):
+        """
+        the page reset the context (a resize does), every tracked value is sent again on the next sync,
+        the saves sent before are gone with it, their restores still go out and do nothing
+        """
+        
+        self._pending = None
+        self.canvas = {}
+        for frame in self.frames:
+            if frame.snapshot is not None:
+                frame.snapshot = {}
+            frame.stale = set()
+    
+    def invalidate(self):
+        """
+        forgets the values of the canvas and of the top frame, for after other code changed the context,
+        the values outer frames will restore are kept
+        """
+        
+        # values set before the other code ran are sent first
+        self.sync(True)
+        self.frames[-1].values = {}
+        self._mark_untracked()
+        self.canvas = {}
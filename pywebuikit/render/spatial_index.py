@@ -0,0 +1,180 @@
+import math
+import typing
+
+from .. import public_objects
+from ..render import geometry
+
+numtype = public_objects.numtype
+_TV_ITEM = typing.TypeVar("_TV_ITEM")
+
+class SpatialGrid(typing.Generic[_TV_ITEM]):
+    """
+    uniform grid of bounding boxes, items are keyed by identity,
+    update() only touches the grid when an item moves to other cells
+    """
+    
+    def __init__(self, cell_size: numtype = 128):
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], set[int]] = {}
+        self._items: dict[int, tuple[_TV_ITEM, geometry.rectType, tuple[int, int, int, int]]] = {}
+        self._bounds: tuple[int, int, int, int]|None = None # occupied cell range, only grows
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __contains__(self, item: _TV_ITEM):
+        return id(item) in self._items
+    
+    def _cell_range(self, rect: geometry.rectType) -> tuple[int, int, int, int]:
+        cs = self.cell_size
+        return (
+            math.floor(rect[0] / cs),
+            math.floor(rect[1] / cs),
+            math.floor((rect[0] + rect[2]) / cs),
+            math.floor((rect[1] + rect[3]) / cs)
+        )
+    
+    def _add_cells(self, key: int, cells: tuple[int, int, int, int]):
+        cx1, cy1, cx2, cy2 = cells
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                cell = self._cells.get((cx, cy))
+                if cell is None:
+                    self._cells[(cx, cy)] = {key}
+                else:
+                    cell.add(key)
+        
+        if self._bounds is None:
+            self._bounds = cells
+        else:
+            bx1, by1, bx2, by2 = self._bounds
+            self._bounds = (min(bx1, cx1), min(by1, cy1), max(bx2, cx2), max(by2, cy2))
+    
+    def _remove_cells(self, key: int, cells: tuple[int, int, int, int]):
+        cx1, cy1, cx2, cy2 = cells
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                cell = self._cells[(cx, cy)]
+                cell.discard(key)
+                if not cell:
+                    del self._cells[(cx, cy)]
+    
+    def insert(self, item: _TV_ITEM, rect: geometry.rectType):
+        if id(item) in self._items:
+            return self.update(item, rect)
+        
+        rect = geometry.normalize_rect(*rect)
+        cells = self._cell_range(rect)
+        self._items[id(item)] = (item, rect, cells)
+        self._add_cells(id(item), cells)
+    
+    def update(self, item: _TV_ITEM, rect: geometry.rectType):
+        entry = self._items.get(id(item))
+        if entry is None:
+            return self.insert(item, rect)
+        
+        rect = geometry.normalize_rect(*rect)
+        cells = self._cell_range(rect)
+        if cells != entry[2]:
+            self._remove_cells(id(item), entry[2])
+            self._add_cells(id(item), cells)
+        self._items[id(item)] = (item, rect, cells)
+    
+    def remove(self, item: _TV_ITEM):
+        entry = self._items.pop(id(item), None)
+        if entry is not None:
+            self._remove_cells(id(item), entry[2])
+    
+    def clear(self):
+        self._cells.clear()
+        self._items.clear()
+        self._bounds = None
+    
+    def items(self) -> typing.Iterator[_TV_ITEM]:
+        return (entry[0] for entry in self._items.values())
+    
+    def boundingBox(self, item: _TV_ITEM) -> geometry.rectType|None:
+        entry = self._items.get(id(item))
+        return None if entry is None else entry[1]
+    
+    def _candidates(self, rect: geometry.rectType) -> set[int]:
+        cx1, cy1, cx2, cy2 = self._cell_range(rect)
+        
+        if self._bounds is not None:
+            bx1, by1, bx2, by2 = self._bounds
+            cx1, cy1, cx2, cy2 = max(cx1, bx1), max(cy1, by1), min(cx2, bx2), min(cy2, by2)
+        
+        keys: set[int] = set()
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self._cells):
+            # the query covers more cells than are occupied, walk the occupied ones instead
+            for (cx, cy), cell in self._cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    keys.update(cell)
+            return keys
+        
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                cell = self._cells.get((cx, cy))
+                if cell is not None:
+                    keys.update(cell)
+        return keys
+    
+    def query_rect(self, rect: geometry.rectType) -> list[_TV_ITEM]:
+        rect = geometry.normalize_rect(*rect)
+        result = []
+        
+        for key in self._candidates(rect):
+            item, bbox, _ = self._items[key]
+            if geometry.rects_intersect(bbox, rect):
+                result.append(item)
+        return result
+    
+    def query_point(self, x: numtype, y: numtype) -> list[_TV_ITEM]:
+        cell = self._cells.get((math.floor(x / self.cell_size), math.floor(y / self.cell_size)))
+        if cell is None:
+            return []
+        
+        result = []
+        for key in cell:
+            item, bbox, _ = self._items[key]
+            if geometry.rect_contains_point(bbox, x, y):
+                result.append(item)
+        return result
+    
+    def nearest(self, x: numtype, y: numtype, max_distance: numtype = math.inf) -> _TV_ITEM|None:
+        # ring search over cells, distance is measured to the bounding box edge
+        if self._bounds is None or not self._items:
+            return None
+        
+        cs = self.cell_size
+        px, py = math.floor(x / cs), math.floor(y / cs)
+        bx1, by1, bx2, by2 = self._bounds
+        max_ring = max(abs(px - bx1), abs(px - bx2), abs(py - by1), abs(py - by2))
+        
+        best, best_distance = None, max_distance
+        checked: set[int] = set()
+        
+        for ring in range(max_ring + 1):
+            # any cell in this ring is at least (ring - 1) * cell_size away
+            if (ring - 1) * cs > best_distance:
+                break
+            
+            for cx in range(px - ring, px + ring + 1):
+                for cy in (range(py - ring, py + ring + 1) if abs(cx - px) == ring else (py - ring, py + ring)):
+                    cell = self._cells.get((cx, cy))
+                    if cell is None:
+                        continue
+                    
+                    for key in cell:
+                        if key in checked:
+                            continue
+                        checked.add(key)
+                        
+                        item, (rx, ry, rw, rh), _ = self._items[key]
+                        dx = max(rx - x, 0, x - rx - rw)
+                        dy = max(ry - y, 0, y - ry - rh)
+                        distance = math.hypot(dx, dy)
+                        if distance <= best_distance:
+                            best, best_distance = item, distance
+        
+        return best
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import os
+import json
+import random
+import typing
+import shutil
+
+from .. import fserver
+from .. import jsbridge
+from .. import public_objects
+
+if typing.TYPE_CHECKING:
+    from .. import webwindow
+
+indexType = list[tuple[str, tuple[int, int]]]
+
+class ResPack:
+    """
+    entries concatenated in one blob, index is [(name, (offset, size)), ...] as loadrespackage takes it,
+    the blob is either in memory (data) or a file on disk (path) with the index next to it in path + ".json"
+    """
+    
+    def __init__(self, index: indexType, data: bytes|None = None, path: str|None = None):
+        if (data is None) == (path is None):
+            raise ValueError("a resource pack has either data or path")
+        
+        self.index = index
+        self.data = data
+        self.path = path
+        self._entries = dict(index)
+    
+    def __len__(self):
+        return len(self.index)
+    
+    def __contains__(self, name: str):
+        return name in self._entries
+    
+    @property
+    def names(self) -> list[str]:
+        return [name for name, _ in self.index]
+    
+    def read(self, name: str) -> bytes:
+        offset, size = self._entries[name]
+        if self.data is not None:
+            return self.data[offset:offset + size]
+        
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+    
+    @classmethod
+    def load(cls, path: str) -> ResPack:
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            index = [(name, (offset, size)) for name, (offset, size) in json.load(f)]
+        return cls(index, path=path)
+
+class ResPackBuilder:
+    """
+    builder = ResPackBuilder(); builder.addFile("player", "player.png"); pack = builder.write("assets.respack")
+    files are only read when the pack is built, write() streams them to disk
+    """
+    
+    def __init__(self):
+        self._entries: dict[str, bytes|str] = {}
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def add(self, name: str, data: bytes) -> ResPackBuilder:
+        self._entries[name] = bytes(data)
+        return self
+    
+    def addFile(self, name: str, path: str) -> ResPackBuilder:
+        self._entries[name] = os.fspath(path)
+        return self
+    
+    def addDirectory(self, root: str, prefix: str = "", extensions: typing.Iterable[str]|None = None) -> ResPackBuilder:
+        # entry names are the paths relative to root, with / separators
+        extensions = None if extensions is None else {i.lower() for i in extensions}
+        
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if extensions is not None and os.path.splitext(filename)[1].lower() not in extensions:
+                    continue
+                
+                path = os.path.join(dirpath, filename)
+                self.addFile(prefix + os.path.relpath(path, root).replace(os.sep, "/"), path)
+        return self
+    
+    def _sizes(self) -> list[int]:
+        return [len(v) if isinstance(v, bytes) else os.path.getsize(v) for v in self._entries.values()]
+    
+    def _index(self) -> indexType:
+        index, offset = [], 0
+        for name, size in zip(self._entries, self._sizes()):
+            index.append((name, (offset, size)))
+            offset += size
+        return index
+    
+    def build(self) -> ResPack:
+        parts = []
+        for value in self._entries.values():
+            if isinstance(value, bytes):
+                parts.append(value)
+            else:
+                with open(value, "rb") as f:
+                    parts.append(f.read())
+        
+        return ResPack(self._index(), data=b"".join(parts))
+    
+    def write(self, path: str) -> ResPack:
+        index = self._index()
+        
+        with open(path, "wb") as out:
+            for value in self._entries.values():
+                if isinstance(value, bytes):
+                    out.write(value)
+                else:
+                    with open(value, "rb") as f:
+                        shutil.copyfileobj(f, out, 1 << 20)
+        
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        
+        return ResPack(index, path=path)
+
+class ResPackImage(jsbridge.ImageBitmap):
+    """
+    an entry of a registered pack, the page decodes it with createImageBitmap on first use,
+    until then (and after it is evicted) it draws as a transparent placeholder
+    """
+    
+    def __init__(self, pack: str, name: str):
+        super().__init__(f"r2respack_get({jsbridge.stringify_pyobj(pack)}, {jsbridge.stringify_pyobj(name)})")
+        self.pack = pack
+        self.name = name
+
+class RegisteredResPack:
+    def __init__(
+        self,
+        window: webwindow.WebWindow,
+        name: str,
+        pack: ResPack,
+        url: str,
+        url_path: str,
+        provider: fserver.ResourceProvider|None = None
+    ):
+        self.window = window
+        self.name = name
+        self.pack = pack
+        self.url = url
+        self.url_path = url_path
+        # serves a pack on disk, in-memory packs are in window.fserver_res[url_path]
+        self.provider = provider
+    
+    def image(self, name: str) -> ResPackImage:
+        if name not in self.pack:
+            raise KeyError(name)
+        return ResPackImage(self.name, name)
+    
+    def decode(self, names: typing.Iterable[str]|None = None) -> public_objects.pythonPromise[None]:
+        """
+        decodes entries ahead of their first draw, the promise resolves once all of them are decoded,
+        entries past the decoded memory cap are evicted again right away
+        """
+        
+        names = self.pack.names if names is None else list(names)
+        promise: public_objects.pythonPromise[None] = public_objects.pythonPromise()
+        
+        def _settle(ok: bool, value: typing.Any):
+            if ok: promise.resolve(None)
+            else: promise.reject(value)
+        
+        rid = self.window.jsapi.register_request(_settle)
+        self.window.evaluate_js(f"r2respack_decode_all({rid}, {jsbridge.stringify_pyobj(self.name)}, {json.dumps(names, ensure_ascii=False)});")
+        return promise
+    
+    def setMaxDecodedBytes(self, max_decoded_bytes: int):
+        self.window.evaluate_js(f"r2respack_setmax({jsbridge.stringify_pyobj(self.name)}, {int(max_decoded_bytes)});")
+    
+    def release(self):
+        """
+        drops the page copy and stops serving the pack, entries can not be drawn or decoded afterwards
+        """
+        
+        self.window.evaluate_js(f"r2respack_release({jsbridge.stringify_pyobj(self.name)});")
+        
+        if self.provider is not None:
+            self.window.unregisterProvider(self.provider)
+            self.provider = None
+        elif self.window.fserver_res.get(self.url_path) is self.pack.data:
+            del self.window.fserver_res[self.url_path]
+
+def register(
+    window: webwindow.WebWindow,
+    pack: ResPack,
+    url_path: str|None = None,
+    max_decoded_bytes: int = 256 << 20
+) -> RegisteredResPack:
+    """
+    serves the pack through fserver (from disk when it has a path) and announces its index to the page,
+    nothing is fetched until the first entry is drawn or decoded
+    """
+    
+    name = f"respack_{random.randint(0, 2 << 31)}"
+    url_path = f"/respack/{name}" if url_path is None else url_path
+    
+    if pack.path is not None:
+        provider = window.registerProvider(fserver.FileProvider(url_path, pack.path))
+    else:
+        provider = None
+        window.fserver_res[url_path] = pack.data
+    url = window.getResourceUrl(url_path)
+    
+    window.evaluate_js(
+        f"r2respack_register({jsbridge.stringify_pyobj(name)}, {jsbridge.stringify_pyobj(url)}, "
+        f"{json.dumps(pack.index, ensure_ascii=False)}, {int(max_decoded_bytes)});"
+    )
+    return RegisteredResPack(window, name, pack, url, url_path, provider)
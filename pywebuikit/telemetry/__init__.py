@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import io
+import csv
+import json
+import time
+import bisect
+import typing
+import threading
+import contextlib
+import collections
+
+if typing.TYPE_CHECKING:
+    from .. import webwindow
+
+METRICS = ("build_time", "commands", "payload_bytes", "round_trip", "page_time", "frame_interval")
+
+class RollingHistogram:
+    """
+    keeps the last size samples, bucket counts are updated on add and eviction,
+    bucket i counts samples < edges[i], the last bucket counts the rest
+    """
+    
+    def __init__(self, size: int = 600, lowest: float = 1e-4, factor: float = 2, count: int = 20):
+        self.edges = [lowest * factor ** i for i in range(count)]
+        self.counts = [0] * (count + 1)
+        self.samples: collections.deque[float] = collections.deque(maxlen=size)
+    
+    def __len__(self):
+        return len(self.samples)
+    
+    def add(self, v: float):
+        if len(self.samples) == self.samples.maxlen:
+            self.counts[bisect.bisect_right(self.edges, self.samples[0])] -= 1
+        
+        self.samples.append(v)
+        self.counts[bisect.bisect_right(self.edges, v)] += 1
+    
+    def clear(self):
+        self.samples.clear()
+        self.counts = [0] * len(self.counts)
+    
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+    
+    def summary(self) -> dict[str, float]:
+        if not self.samples:
+            return {"count": 0, "mean": 0.0, "min": 0.0, "max": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+        
+        ordered = sorted(self.samples)
+        n = len(ordered)
+        return {
+            "count": n,
+            "mean": sum(ordered) / n,
+            "min": ordered[0],
+            "max": ordered[-1],
+            "p50": ordered[int(0.5 * n)],
+            "p95": ordered[min(n - 1, int(0.95 * n))],
+            "p99": ordered[min(n - 1, int(0.99 * n))]
+        }
+    
+    def buckets(self) -> list[tuple[float|None, int]]:
+        return list(zip([*self.edges, None], self.counts))
+
+class FrameTelemetry:
+    """
+    per frame: build_time (python time outside the bridge), commands (evaluated codes and buffered canvas calls),
+    payload_bytes, round_trip (time spent waiting on the bridge), page_time (js execution measured with performance.now()),
+    times are in seconds, enable with window.enableTelemetry(), frames are delimited by frame() or begin_frame / end_frame
+    """
+    
+    def __init__(self, window: webwindow.WebWindow, size: int = 600, overlay: bool = False, ctx: str = "ctx"):
+        self.window = window
+        self.overlay = overlay
+        self.ctx = ctx
+        self.histograms: dict[str, RollingHistogram] = {
+            "build_time": RollingHistogram(size),
+            "commands": RollingHistogram(size, 1),
+            "payload_bytes": RollingHistogram(size, 64),
+            "round_trip": RollingHistogram(size),
+            "page_time": RollingHistogram(size),
+            "frame_interval": RollingHistogram(size)
+        }
+        self.records: collections.deque[dict[str, float]] = collections.deque(maxlen=size)
+        
+        self._lock = threading.Lock()
+        self._frame_count = 0
+        self._frame_start: float|None = None
+        self._last_frame_start: float|None = None
+        self._current = self._empty_record()
+    
+    @staticmethod
+    def _empty_record() -> dict[str, float]:
+        return {"commands": 0, "payload_bytes": 0, "round_trip": 0.0, "page_time": 0.0}
+    
+    def record_commands(self, n: int = 1):
+        with self._lock:
+            self._current["commands"] += n
+    
+    def record_transport(self, payload_bytes: int, round_trip: float, page_time: float):
+        with self._lock:
+            current = self._current
+            current["payload_bytes"] += payload_bytes
+            current["round_trip"] += round_trip
+            current["page_time"] += page_time
+    
+    def begin_frame(self):
+        now = time.perf_counter()
+        
+        with self._lock:
+            self._frame_start = now
+            self._current = self._empty_record()
+    
+    def end_frame(self):
+        now = time.perf_counter()
+        
+        with self._lock:
+            if self._frame_start is None:
+                raise RuntimeError("end_frame() called without begin_frame()")
+            
+            record = self._current
+            record["frame"] = self._frame_count
+            record["t"] = self._frame_start
+            record["build_time"] = max(0.0, now - self._frame_start - record["round_trip"])
+            record["frame_interval"] = 0.0 if self._last_frame_start is None else self._frame_start - self._last_frame_start
+            
+            for name, histogram in self.histograms.items():
+                if name != "frame_interval" or self._last_frame_start is not None:
+                    histogram.add(record[name])
+            
+            self.records.append(record)
+            self._frame_count += 1
+            self._last_frame_start = self._frame_start
+            self._frame_start = None
+            self._current = self._empty_record()
+    
+    @contextlib.contextmanager
+    def frame(self):
+        """
+        with telemetry.frame(): ...
+        like window.frame(), the overlay (if enabled) is drawn last in the batch
+        """
+        
+        self.begin_frame()
+        try:
+            with self.window.frame():
+                yield self
+                if self.overlay:
+                    self.drawOverlay()
+        finally:
+            self.end_frame()
+    
+    @property
+    def fps(self) -> float:
+        interval = self.histograms["frame_interval"].summary()["mean"]
+        return 1 / interval if interval > 0 else 0.0
+    
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()}
+    
+    def to_json(self, indent: int|None = None) -> str:
+        with self._lock:
+            return json.dumps({
+                "frames": self._frame_count,
+                "metrics": {
+                    name: {**histogram.summary(), "buckets": histogram.buckets()}
+                    for name, histogram in self.histograms.items()
+                }
+            }, indent=indent)
+    
+    def to_csv(self) -> str:
+        with self._lock:
+            records = list(self.records)
+        
+        f = io.StringIO()
+        writer = csv.DictWriter(f, fieldnames=("frame", "t", *METRICS), lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(records)
+        return f.getvalue()
+    
+    def save(self, path: str):
+        # the format follows the extension, .csv for per frame records, json summaries otherwise
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(self.to_csv() if path.lower().endswith(".csv") else self.to_json(indent=4))
+    
+    def overlayText(self) -> list[str]:
+        summary = self.summary()
+        return [
+            f"fps {self.fps:.1f}",
+            f"build {summary["build_time"]["p50"] * 1000:.2f} ms",
+            f"rtt p95 {summary["round_trip"]["p95"] * 1000:.2f} ms",
+            f"page {summary["page_time"]["p50"] * 1000:.2f} ms"
+        ]
+    
+    def drawOverlay(self, x: float = 8, y: float = 8):
+        lines = json.dumps(self.overlayText())
+        self.window.evaluate_js(f"r2drawoverlay({self.ctx}, {x}, {y}, {lines});")
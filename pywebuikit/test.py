@@ -29,8 +29,9 @@ def main():
     rect = render.render_items.Rectangle(0, 0, six, siy)
     rdm.items.append(rect)
     
-    while not wind._destroy_event.is_set():
-        wind.setWaitingState(True)
+    def frame(t: float):
+        nonlocal r, g, b, sr, sg, sb, sx, sy
+        
         rd.clearRect(0, 0, w, h)
         
         r += sr
@@ -65,9 +66,9 @@ def main():
         wfilter_gray.setvalue((r + g + b) / 765 * 1.25)
         
         jsbridge.setFilter(wind, filterSet, cvref)
-        rdm.render()
-        
-        wind.setWaitingState(False)
+        rdm.render(t)
+    
+    wind.run_frames(frame, target_fps=60)
 
 wind = webwindow.WebWindow(800, 600, 100, 100, debug=True)
 threading.Thread(target=main, daemon=True).start()
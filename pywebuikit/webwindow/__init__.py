@@ -2,25 +2,38 @@ import os
 import os.path
 import threading
 import typing
-import random
 import time
+import asyncio
 import http.server
+import concurrent.futures
 import importlib.resources as resources
-from ctypes import windll
 
-import webview
-
-from .. import _dpd_threadckeck
 from .. import jsapi
 from .. import fserver
+from .. import telemetry
+from ..webwindow import backends
+from ..webwindow import transport
+from ..webwindow.backends import PyWebViewBackend, HeadlessBackend, StubExecutor
+
+if typing.TYPE_CHECKING:
+    import webview
+    from .. import respack
 
 HTML_PATH = os.environ.get("PYWEBUIKIT_HTML_PATH", "./user_pywebuikit.html")
 
-if not (os.path.exists(HTML_PATH) and os.path.isfile(HTML_PATH)):
+def _write_page(path: str) -> None:
+    # a page written by an older version lacks the r2* functions this one calls, so it is replaced
     htmlcontent = resources.read_text(__package__, "builtin_pywebuikit.html")
-    with open(HTML_PATH, "w") as f:
+    if os.path.isfile(path):
+        with open(path, "r") as f:
+            if f.read() == htmlcontent:
+                return
+    
+    with open(path, "w") as f:
         f.write(htmlcontent)
 
+_write_page(HTML_PATH)
+
 class StringProcesser:
     def __new__(cls):
         raise NotImplementedError("This class is not instantiable")
@@ -40,6 +53,302 @@ class StringProcesser:
     def replaceString2CodeEval(s: str) -> str:
         return f"\"{StringProcesser.replaceEscape(s)}\""
 
+class JavaScriptError(Exception): ...
+
+class JsBatch:
+    """
+    collects js codes and sends them in one r2evalbatch call,
+    every queued code gets a future which resolves when the batch is flushed,
+    the batch is flushed when the last frame exits, or when it reaches max_size codes,
+    or when its oldest code is max_age seconds old, checked as codes are appended and frames exit,
+    frames are counted per thread: only threads inside a frame have their codes batched
+    """
+    
+    def __init__(self, window: "WebWindow", max_size: int = 4096, max_age: float|None = 0.1):
+        self.window = window
+        self.max_size = max_size
+        self.max_age = max_age
+        
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._codes: list[str] = []
+        self._futures: list[concurrent.futures.Future] = []
+        self._oldest = 0.0 # time.monotonic() of the first queued code
+        self._depth = 0 # open frames of all threads
+        self._local = threading.local()
+    
+    @property
+    def active(self) -> bool:
+        # whether the calling thread is inside a frame
+        return getattr(self._local, "depth", 0) > 0
+    
+    def __len__(self):
+        return len(self._codes)
+    
+    def __enter__(self):
+        self.begin()
+        return self
+    
+    def __exit__(self, *args):
+        self.end()
+    
+    def begin(self) -> None:
+        with self._lock:
+            self._depth += 1
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+    
+    def end(self) -> None:
+        depth = getattr(self._local, "depth", 0)
+        if depth <= 0:
+            raise RuntimeError("end() called without begin()")
+        
+        with self._lock:
+            self._depth -= 1
+            done = self._depth == 0
+        
+        # pending canvas commands belong to this batch, this thread still counts as inside its frame here
+        if done and self.window.cmdbuf is not None:
+            self.window.cmdbuf.flush()
+        
+        if done and self.window.render_worker is not None:
+            self.window.render_worker.flush()
+        
+        self._local.depth = depth - 1
+        
+        if done or self._expired():
+            self.flush()
+    
+    def _expired(self) -> bool:
+        return self.max_age is not None and bool(self._codes) and time.monotonic() - self._oldest >= self.max_age
+    
+    def append(self, code: str) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        
+        with self._lock:
+            if not self._codes:
+                self._oldest = time.monotonic()
+            
+            self._codes.append(code)
+            self._futures.append(future)
+            need_flush = len(self._codes) >= self.max_size or self._depth == 0 or self._expired()
+        
+        if need_flush:
+            self.flush()
+        
+        return future
+    
+    def flush(self) -> None:
+        # the send lock keeps batches in order when several threads flush at once
+        with self._send_lock:
+            with self._lock:
+                codes, futures = self._codes, self._futures
+                self._codes, self._futures = [], []
+            
+            if not codes:
+                return
+            
+            frame_telemetry = self.window.telemetry
+            socket_transport = self.window.transport
+            if socket_transport is not None and socket_transport.connected:
+                return self._send_socket(socket_transport, codes, futures)
+            
+            code = f"r2evalbatch([{",".join(map(StringProcesser.replaceString2CodeEval, codes))}], {"true" if frame_telemetry is not None else "false"});"
+            
+            try:
+                st = time.perf_counter()
+                results = self.window.backend.evaluate_js(code)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                return
+            
+            if frame_telemetry is not None:
+                # the page appends its execution time (ms) after the results
+                frame_telemetry.record_transport(len(code.encode("utf-8")), time.perf_counter() - st, results[-1] / 1000)
+            
+            self._settle(futures, results)
+    
+    @staticmethod
+    def _settle(futures: list[concurrent.futures.Future], results: list[tuple[bool, typing.Any]]):
+        for future, (ok, value) in zip(futures, results):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(JavaScriptError(value))
+    
+    def _send_socket(self, socket_transport: transport.SocketTransport, codes: list[str], futures: list[concurrent.futures.Future]):
+        # the batch does not wait for the page, futures resolve when the ack with the results arrives
+        frame_telemetry = self.window.telemetry
+        sent_bytes = socket_transport.stats["bytes"]
+        st = time.perf_counter()
+        
+        try:
+            result_future = socket_transport.send_batch(codes, frame_telemetry is not None)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        
+        if frame_telemetry is not None:
+            # round_trip is only the time blocked sending, the page time arrives with the ack
+            frame_telemetry.record_transport(socket_transport.stats["bytes"] - sent_bytes, time.perf_counter() - st, 0.0)
+        
+        def _done(result_future: concurrent.futures.Future):
+            e = result_future.exception()
+            if e is not None:
+                for future in futures:
+                    future.set_exception(e)
+                return
+            
+            results = result_future.result()
+            if frame_telemetry is not None:
+                frame_telemetry.record_transport(0, 0.0, results[-1] / 1000)
+            self._settle(futures, results)
+        
+        result_future.add_done_callback(_done)
+
+class FrameScheduler:
+    """
+    calls callback(t) once per frame from a worker thread, paced by requestAnimationFrame acks from the page,
+    at most max_in_flight frames are sent but not yet acked, when the page falls behind
+    the frame slots which already passed are dropped instead of being rendered late,
+    t is the scheduled time of the frame in seconds since start(), without target_fps frames follow the acks
+    """
+    
+    def __init__(
+        self,
+        window: "WebWindow",
+        callback: typing.Callable[[float], typing.Any],
+        target_fps: float|None = 60,
+        max_in_flight: int = 2,
+        ack_timeout: float = 1.0
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        
+        self.window = window
+        self.callback = callback
+        self.target_fps = target_fps
+        self.max_in_flight = max_in_flight
+        self.ack_timeout = ack_timeout
+        self.stats: dict[str, float] = {"frames": 0, "dropped": 0, "timeouts": 0, "latency": 0.0}
+        self.exception: BaseException|None = None
+        
+        self._cond = threading.Condition()
+        self._in_flight: dict[int, float] = {}
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread|None = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+    
+    def start(self) -> "FrameScheduler":
+        if self.running:
+            raise RuntimeError("scheduler is already running")
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+    
+    def join(self, timeout: float|None = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        
+        if self.exception is not None:
+            raise self.exception
+    
+    def _stopped(self) -> bool:
+        return self._stop_event.is_set() or self.window._destroy_event.is_set()
+    
+    def _ack(self, rid: int, ok: bool, value: typing.Any):
+        with self._cond:
+            sent = self._in_flight.pop(rid, None)
+            if sent is not None:
+                self.stats["latency"] = time.perf_counter() - sent
+            self._cond.notify_all()
+    
+    def _wait_slot(self) -> bool:
+        with self._cond:
+            while len(self._in_flight) >= self.max_in_flight:
+                if self._stopped():
+                    return False
+                
+                # acks can be lost when the page reloads, forget frames older than ack_timeout
+                now = time.perf_counter()
+                for rid, sent in list(self._in_flight.items()):
+                    if now - sent > self.ack_timeout:
+                        del self._in_flight[rid]
+                        self.window.jsapi.cancel_request(rid)
+                        self.stats["timeouts"] += 1
+                
+                if len(self._in_flight) >= self.max_in_flight:
+                    self._cond.wait(self.ack_timeout / 4)
+        
+        return not self._stopped()
+    
+    def _send_frame(self, t: float):
+        rid = self.window.jsapi.register_request(lambda ok, value: self._ack(rid, ok, value))
+        
+        with self._cond:
+            self._in_flight[rid] = time.perf_counter()
+        
+        try:
+            with (self.window.frame() if self.window.telemetry is None else self.window.telemetry.frame()):
+                self.callback(t)
+                self.window.evaluate_js(f"r2frameack({rid});")
+        except BaseException:
+            with self._cond:
+                self._in_flight.pop(rid, None)
+            self.window.jsapi.cancel_request(rid)
+            raise
+        
+        self.stats["frames"] += 1
+    
+    def _run(self):
+        interval = None if self.target_fps is None else 1 / self.target_fps
+        start = time.perf_counter()
+        next_time = start
+        
+        try:
+            while self._wait_slot():
+                now = time.perf_counter()
+                
+                if interval is None:
+                    self._send_frame(now - start)
+                    continue
+                
+                if now < next_time:
+                    self._stop_event.wait(next_time - now)
+                    if self._stopped():
+                        break
+                else:
+                    missed = int((now - next_time) / interval)
+                    if missed:
+                        self.stats["dropped"] += missed
+                        next_time += missed * interval
+                
+                self._send_frame(next_time - start)
+                next_time += interval
+        except BaseException as e:
+            self.exception = e
+            raise
+        finally:
+            with self._cond:
+                for rid in self._in_flight:
+                    self.window.jsapi.cancel_request(rid)
+                self._in_flight.clear()
+
 class WebWindow:
     def __init__(
         self,
@@ -54,51 +363,45 @@ class WebWindow:
         minimized: bool = False,
         maximized: bool = False,
         htmlpath: str = HTML_PATH,
-        webkwargs: typing.Optional[dict[str, typing.Any]] = None
+        webkwargs: typing.Optional[dict[str, typing.Any]] = None,
+        backend: backends.Backend|None = None
     ):
         self.jsapi = jsapi.JsApi()
         self._destroy_event = threading.Event()
-        self._jscodes: list[str] = []
         self._waitting_jscodes: bool = False
+        self.cmdbuf = None # render.command_buffer.CommandBuffer, created by the first render using it
+        self.path2d_cache = None # render.path.Path2DCache, created by the first cached path
+        self.render_worker = None # render.render_worker.RenderWorker, created by create_mainCanvas(worker=True)
+        self.jsbatch = JsBatch(self)
+        self.telemetry: telemetry.FrameTelemetry|None = None
+        self.transport: transport.SocketTransport|None = None
         
-        self.web: webview.Window = webview.create_window(
-            title = title,
-            url = os.path.abspath(htmlpath),
-            resizable = resizable,
+        self.backend = PyWebViewBackend() if backend is None else backend
+        self.backend.create(
             js_api = self.jsapi,
-            frameless = frameless,
+            url = os.path.abspath(htmlpath),
+            title = title,
             width = width, height = height,
             x = x, y = y,
+            debug = debug,
+            resizable = resizable,
+            frameless = frameless,
             fullscreen = fullscreen,
             min_size = min_size,
             minimized = minimized, maximized = maximized,
             **(webkwargs or {})
         )
-        
-        with _dpd_threadckeck.Bypasser():
-            threading.Thread(target=webview.start, kwargs={"debug": debug}, daemon=True).start()
-        
-        self.web.events.closed += self._destroy_event.set
-        
-        title = self.web.title
-        temp_title = title + " " * random.randint(0, 4096)
-        self.web.set_title(temp_title)
-        
-        self.hwnd = 0
-        while not self.hwnd:
-            self.hwnd = windll.user32.FindWindowW(None, temp_title)
-            time.sleep(1 / 60)
-        self.web.set_title(title)
+        self.web: webview.Window|None = self.backend.web
+        self.backend.onClosed(self._destroy_event.set)
         
         self.fserver_res: dict[str, bytes] = {}
-        self.fserver_port = int(self.web._server.address.split(":")[2].split("/")[0]) + 1
+        self.fserver_providers: list[fserver.ResourceProvider] = []
+        self.fserver_uploads: dict[str, typing.Callable[[bytearray], typing.Any]] = {}
         self.fserver_hander = fserver.make_fsh(self)
-        self.fserver = http.server.HTTPServer(("localhost", self.fserver_port), self.fserver_hander)
+        self.fserver = http.server.ThreadingHTTPServer(("localhost", self.backend.getServerPort()), self.fserver_hander)
+        self.fserver_port = self.fserver.server_address[1]
         threading.Thread(target=self.fserver.serve_forever, daemon=True).start()
         
-        self.web.evaluate_js("null;")
-        webview.windows.remove(self.web)
-        
         if not fullscreen:
             webdpr = self.evaluate_js("window.devicePixelRatio;")
             w_legacy, h_legacy = self.getLegacyWindowWidth(), self.getLegacyWindowHeight()
@@ -109,63 +412,216 @@ class WebWindow:
             self.move(int(x - dw_legacy / 2), int(y - dh_legacy / 2))
     
     def getWidth(self) -> int:
-        return self.web.width
+        return self.backend.getWidth()
     
     def getHeight(self) -> int:
-        return self.web.height
+        return self.backend.getHeight()
     
     def getHwnd(self) -> int:
-        return self.hwnd
+        return self.backend.getHwnd()
     
     def getTitle(self) -> str:
-        return self.web.title
+        return self.backend.getTitle()
     
     def getLegacyWindowWidth(self) -> int:
-        return self.web.evaluate_js("window.innerWidth;")
+        return self.backend.evaluate_js("window.innerWidth;")
     
     def getLegacyWindowHeight(self) -> int:
-        return self.web.evaluate_js("window.innerHeight;")
+        return self.backend.evaluate_js("window.innerHeight;")
     
     def desotroy(self) -> None:
-        self.web.destroy()
+        self.backend.destroy()
     
     def resize(self, w: int, h: int):
-        self.web.resize(w, h)
+        self.backend.resize(w, h)
     
     def move(self, x: int, y: int):
-        self.web.move(x, y)
+        self.backend.move(x, y)
+    
+    def getResourceUrl(self, path: str) -> str:
+        return f"http://localhost:{self.fserver_port}{path}"
+    
+    def registerProvider(self, provider: fserver.ResourceProvider) -> fserver.ResourceProvider:
+        self.fserver_providers.append(provider)
+        return provider
+    
+    def unregisterProvider(self, provider: fserver.ResourceProvider) -> None:
+        if provider in self.fserver_providers:
+            self.fserver_providers.remove(provider)
+            provider.close()
+    
+    def registerFile(self, url_path: str, file_path: str) -> str:
+        self.registerProvider(fserver.FileProvider(url_path, file_path))
+        return self.getResourceUrl(url_path)
+    
+    def registerDirectory(self, prefix: str, root: str) -> str:
+        self.registerProvider(fserver.DirectoryProvider(prefix, root))
+        return self.getResourceUrl(prefix.rstrip("/") + "/")
+    
+    def registerResPack(self, pack: "respack.ResPack", url_path: str|None = None, max_decoded_bytes: int = 256 << 20) -> "respack.RegisteredResPack":
+        from .. import respack
+        return respack.register(self, pack, url_path, max_decoded_bytes)
     
     def waitClose(self) -> None:
         self._destroy_event.wait()
         self.fserver.shutdown()
+        for provider in self.fserver_providers:
+            provider.close()
+        
+    def frame(self) -> JsBatch:
+        """
+        with window.frame(): ...
+        js evaluated inside the frame is batched and evaluate_js returns a concurrent.futures.Future,
+        it can be entered from several threads, the batch is sent when the last one exits
+        """
+        
+        return self.jsbatch
+    
+    def run_frames(
+        self,
+        callback: typing.Callable[[float], typing.Any],
+        target_fps: float|None = 60,
+        max_in_flight: int = 2
+    ) -> FrameScheduler:
+        """
+        window.run_frames(lambda t: manager.render(t), 60)
+        starts a FrameScheduler, every frame is evaluated inside window.frame()
+        """
+        
+        return FrameScheduler(self, callback, target_fps, max_in_flight).start()
+    
+    def enableTelemetry(self, size: int = 600, overlay: bool = False, ctx: str = "ctx") -> telemetry.FrameTelemetry:
+        """
+        run_frames records frames automatically, otherwise use with window.telemetry.frame(): ...
+        """
+        
+        self.telemetry = telemetry.FrameTelemetry(self, size, overlay, ctx)
+        return self.telemetry
+    
+    def disableTelemetry(self) -> None:
+        self.telemetry = None
+    
+    def openTransport(self, timeout: float = 5.0, max_unacked: int = 64) -> transport.SocketTransport:
+        """
+        frames (and the command buffer flushed inside them) go over a localhost websocket after this,
+        calls outside frames still use the bridge, they wait until the socket traffic before them was acked
+        """
+        
+        if self.transport is not None and self.transport.connected:
+            return self.transport
+        
+        socket_transport = transport.SocketTransport(max_unacked=max_unacked)
+        self.evaluate_js(f"r2socket_connect({StringProcesser.replaceString2CodeEval(socket_transport.url)});")
         
+        if not socket_transport.wait_connected(timeout):
+            socket_transport.close()
+            raise TimeoutError("the page did not connect to the transport")
+        
+        self.transport = socket_transport
+        return socket_transport
+    
+    def closeTransport(self) -> None:
+        if self.transport is not None:
+            self.transport.drain(1.0)
+            self.transport.close()
+            self.transport = None
+    
     def setWaitingState(self, state: bool) -> None:
+        if state == self._waitting_jscodes:
+            return
+        
         self._waitting_jscodes = state
         
-        if not state:
-            self.web.evaluate_js(f"{self._jscodes}.forEach(r2eval);")
-            self._jscodes.clear()
+        if state:
+            self.jsbatch.begin()
+        else:
+            self.jsbatch.end()
     
     def evaluate_js(self, js: str) -> typing.Any:
-        if self._waitting_jscodes:
-            self._jscodes.append(js)
-            return
-        return self.web.evaluate_js(f"r2eval({StringProcesser.replaceString2CodeEval(js)});")
-    
-    # def wait_jspromise(self, code: str) -> None:
-    #     eid = f"wait_jspromise_{random.randint(0, 2 << 31)}"
-    #     ete = threading.Event()
-    #     ecbname = f"{eid}_callback"
-    #     result = None
-        
-    #     def _callback(jsresult):
-    #         nonlocal result
-    #         result = jsresult
-    #         ete.set()
-            
-    #     self.jsapi.set_attr(ecbname, _callback)
-    #     self.evaluate_js(f"({code}).then((result) => pywebview.api.call_attr('{ecbname}', result));")
-    #     ete.wait()
-    #     delattr(self.jsapi, ecbname)
-    #     return result
-    
\ No newline at end of file
+        if self.cmdbuf is not None and self.cmdbuf:
+            self.cmdbuf.flush()
+        
+        render_worker = self.render_worker
+        if render_worker is not None and render_worker.cmdbuf:
+            render_worker.cmdbuf.flush()
+        
+        frame_telemetry = self.telemetry
+        if frame_telemetry is not None:
+            frame_telemetry.record_commands()
+        
+        if self.jsbatch.active:
+            return self.jsbatch.append(js)
+        
+        # codes other threads queued in their frames were sent to the window first
+        if self.jsbatch:
+            self.jsbatch.flush()
+        
+        socket_transport = self.transport
+        if socket_transport is not None and socket_transport.pending:
+            socket_transport.drain()
+        
+        if frame_telemetry is None:
+            return self.backend.evaluate_js(f"r2eval({StringProcesser.replaceString2CodeEval(js)});")
+        
+        code = f"r2evaltimed({StringProcesser.replaceString2CodeEval(js)});"
+        st = time.perf_counter()
+        page_time, result = self.backend.evaluate_js(code)
+        frame_telemetry.record_transport(len(code.encode("utf-8")), time.perf_counter() - st, page_time / 1000)
+        return result
+    
+    def _evaluate_js_request(self, js: str, callback: typing.Callable[[bool, typing.Any], typing.Any]) -> int:
+        # r2evalasync settles the request through jsapi.settle_request once the result (or promise) is ready
+        rid = self.jsapi.register_request(callback)
+        try:
+            self.evaluate_js(f"r2evalasync({rid}, {StringProcesser.replaceString2CodeEval(js)});")
+        except BaseException:
+            self.jsapi.cancel_request(rid)
+            raise
+        return rid
+    
+    def _jspromise_future(self, code: str) -> tuple[concurrent.futures.Future, int]:
+        # settled with the value of code, inside a frame the request goes with the batch
+        future = concurrent.futures.Future()
+        
+        def _settle(ok: bool, value: typing.Any):
+            if ok: future.set_result(value)
+            else: future.set_exception(JavaScriptError(value))
+        
+        return future, self._evaluate_js_request(f"({code})", _settle)
+    
+    def wait_jspromise(self, code: str, timeout: float|None = None) -> typing.Any:
+        future, rid = self._jspromise_future(code)
+        if self.jsbatch.active:
+            # inside a frame the request is queued, the promise can only settle once it is sent
+            self.jsbatch.flush()
+        
+        try:
+            return future.result(timeout)
+        finally:
+            self.jsapi.cancel_request(rid)
+    
+    async def evaluate_js_async(self, js: str) -> typing.Any:
+        """
+        evaluate js without blocking the event loop,
+        many evaluations can be in flight at once, if the result is a promise it is awaited
+        """
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def _set(ok: bool, value: typing.Any):
+            if future.done(): return
+            if ok: future.set_result(value)
+            else: future.set_exception(JavaScriptError(value))
+        
+        def _settle(ok: bool, value: typing.Any):
+            loop.call_soon_threadsafe(_set, ok, value)
+        
+        rid = await loop.run_in_executor(None, self._evaluate_js_request, js, _settle)
+        try:
+            return await future
+        finally:
+            self.jsapi.cancel_request(rid)
+    
+    async def await_js_promise(self, expr: str) -> typing.Any:
+        return await self.evaluate_js_async(f"({expr})")
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import re
+import time
+import random
+import typing
+import threading
+from abc import ABC, abstractmethod
+
+if typing.TYPE_CHECKING:
+    import webview
+    
+    from .. import jsapi
+
+class Backend(ABC):
+    """
+    what WebWindow needs from the thing which shows the page,
+    evaluate_js gets the code as it goes over the bridge (r2eval(...), r2evalbatch(...)) and returns its result
+    """
+    
+    web: webview.Window|None = None
+    
+    @abstractmethod
+    def create(
+        self,
+        js_api: jsapi.JsApi,
+        url: str,
+        title: str,
+        width: int, height: int,
+        x: int, y: int,
+        debug: bool = False,
+        **kwargs: typing.Any
+    ) -> None: ...
+    
+    @abstractmethod
+    def evaluate_js(self, code: str) -> typing.Any: ...
+    
+    @abstractmethod
+    def onClosed(self, callback: typing.Callable[[], typing.Any]) -> None: ...
+    
+    def getServerPort(self) -> int:
+        # port for the file server, 0 picks a free one
+        return 0
+    
+    @abstractmethod
+    def getWidth(self) -> int: ...
+    
+    @abstractmethod
+    def getHeight(self) -> int: ...
+    
+    def getHwnd(self) -> int:
+        return 0
+    
+    @abstractmethod
+    def getTitle(self) -> str: ...
+    
+    @abstractmethod
+    def setTitle(self, title: str) -> None: ...
+    
+    @abstractmethod
+    def resize(self, w: int, h: int) -> None: ...
+    
+    @abstractmethod
+    def move(self, x: int, y: int) -> None: ...
+    
+    @abstractmethod
+    def destroy(self) -> None: ...
+
+class PyWebViewBackend(Backend):
+    """
+    a pywebview window, webview and windll are imported only when it is created
+    """
+    
+    def __init__(self):
+        self.hwnd = 0
+    
+    def create(
+        self,
+        js_api: jsapi.JsApi,
+        url: str,
+        title: str,
+        width: int, height: int,
+        x: int, y: int,
+        debug: bool = False,
+        **kwargs: typing.Any
+    ) -> None:
+        from ctypes import windll
+        
+        import webview
+        
+        from .. import _dpd_threadckeck
+        
+        self.web = webview.create_window(
+            title = title,
+            url = url,
+            js_api = js_api,
+            width = width, height = height,
+            x = x, y = y,
+            **kwargs
+        )
+        
+        with _dpd_threadckeck.Bypasser():
+            threading.Thread(target=webview.start, kwargs={"debug": debug}, daemon=True).start()
+        
+        title = self.web.title
+        temp_title = title + " " * random.randint(0, 4096)
+        self.web.set_title(temp_title)
+        
+        self.hwnd = 0
+        while not self.hwnd:
+            self.hwnd = windll.user32.FindWindowW(None, temp_title)
+            time.sleep(1 / 60)
+        self.web.set_title(title)
+        
+        self.web.evaluate_js("null;")
+        webview.windows.remove(self.web)
+    
+    def evaluate_js(self, code: str) -> typing.Any:
+        return self.web.evaluate_js(code)
+    
+    def onClosed(self, callback: typing.Callable[[], typing.Any]) -> None:
+        self.web.events.closed += callback
+    
+    def getServerPort(self) -> int:
+        return int(self.web._server.address.split(":")[2].split("/")[0]) + 1
+    
+    def getWidth(self) -> int:
+        return self.web.width
+    
+    def getHeight(self) -> int:
+        return self.web.height
+    
+    def getHwnd(self) -> int:
+        return self.hwnd
+    
+    def getTitle(self) -> str:
+        return self.web.title
+    
+    def setTitle(self, title: str) -> None:
+        self.web.set_title(title)
+    
+    def resize(self, w: int, h: int) -> None:
+        self.web.resize(w, h)
+    
+    def move(self, x: int, y: int) -> None:
+        self.web.move(x, y)
+    
+    def destroy(self) -> None:
+        self.web.destroy()
+
+_JS_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"', re.S)
+_JS_ESCAPE = re.compile(r"\\(.)", re.S)
+_WIRE_CALL = re.compile(r"(r2eval|r2evaltimed|r2evalbatch)\((.*)\);?$", re.S)
+
+def _js_unescape(s: str) -> str:
+    # reverses webwindow.StringProcesser.replaceEscape
+    if "\\" not in s:
+        return s
+    return _JS_ESCAPE.sub(lambda m: "\n" if m.group(1) == "n" else m.group(1), s)
+
+def decode_wire(code: str) -> tuple[str, list[str], bool]:
+    """
+    splits bridge code into (wrapper, codes, timed),
+    wrapper is "r2eval", "r2evaltimed", "r2evalbatch" or "" for code sent as is
+    """
+    
+    match = _WIRE_CALL.match(code)
+    if match is None:
+        return "", [code], False
+    
+    wrapper, args = match.groups()
+    codes = [_js_unescape(s) for s in _JS_STRING.findall(args)]
+    
+    if wrapper == "r2evalbatch":
+        return wrapper, codes, args.rstrip().endswith("true")
+    return wrapper, codes[:1], wrapper == "r2evaltimed"
+
+class StubExecutor:
+    """
+    stands in for the page: answers the queries WebWindow makes on its own,
+    acks frames and async requests through the js api, everything else evaluates to None
+    """
+    
+    _REQUEST = re.compile(r"^(r2frameack|r2evalasync|r2loadimages|r2respack_decode_all|r2atlas_compose|r2preload)\((\d+)")
+    
+    def __init__(self, width: int = 800, height: int = 600, device_pixel_ratio: float = 1):
+        self.width = width
+        self.height = height
+        self.device_pixel_ratio = device_pixel_ratio
+        self.js_api: jsapi.JsApi|None = None
+        self.count = 0
+    
+    def __call__(self, code: str) -> typing.Any:
+        self.count += 1
+        
+        match code:
+            case "window.innerWidth;":
+                return self.width
+            case "window.innerHeight;":
+                return self.height
+            case "window.devicePixelRatio;":
+                return self.device_pixel_ratio
+        
+        if self.js_api is not None and code.startswith("r2"):
+            request = self._REQUEST.match(code)
+            if request is not None:
+                value = time.perf_counter() * 1000 if request.group(1) == "r2frameack" else None
+                self.js_api.settle_request(int(request.group(2)), True, value)
+        
+        return None
+
+class HeadlessBackend(Backend):
+    """
+    no window at all, every code sent over the bridge is decoded and appended to commands,
+    results come from executor(code) (a StubExecutor by default), page times are reported as 0
+    """
+    
+    def __init__(
+        self,
+        executor: typing.Callable[[str], typing.Any]|None = None,
+        record: bool = True,
+        max_records: int|None = None
+    ):
+        self.executor = StubExecutor() if executor is None else executor
+        self.record = record
+        self.max_records = max_records
+        self.commands: list[str] = []
+        self.bridge_calls = 0
+        self.payload_bytes = 0
+        
+        self._title = ""
+        self._size = (0, 0)
+        self._closed_callbacks: list[typing.Callable[[], typing.Any]] = []
+    
+    def create(
+        self,
+        js_api: jsapi.JsApi,
+        url: str,
+        title: str,
+        width: int, height: int,
+        x: int, y: int,
+        debug: bool = False,
+        **kwargs: typing.Any
+    ) -> None:
+        self._title = title
+        self._size = (width, height)
+        
+        if isinstance(self.executor, StubExecutor):
+            self.executor.js_api = js_api
+            self.executor.width, self.executor.height = width, height
+    
+    def _run(self, code: str) -> tuple[bool, typing.Any]:
+        try:
+            return True, self.executor(code)
+        except Exception as e:
+            return False, repr(e)
+    
+    def evaluate_js(self, code: str) -> typing.Any:
+        wrapper, codes, timed = decode_wire(code)
+        self.bridge_calls += 1
+        self.payload_bytes += len(code)
+        
+        if self.record:
+            self.commands.extend(codes)
+            if self.max_records is not None and len(self.commands) > self.max_records:
+                del self.commands[:len(self.commands) - self.max_records]
+        
+        if wrapper == "r2evalbatch":
+            results = [list(self._run(c)) for c in codes]
+            if timed:
+                results.append(0)
+            return results
+        
+        result = self.executor(codes[0])
+        return [0, result] if timed else result
+    
+    def clear(self) -> None:
+        self.commands.clear()
+        self.bridge_calls = 0
+        self.payload_bytes = 0
+    
+    def onClosed(self, callback: typing.Callable[[], typing.Any]) -> None:
+        self._closed_callbacks.append(callback)
+    
+    def getWidth(self) -> int:
+        return self._size[0]
+    
+    def getHeight(self) -> int:
+        return self._size[1]
+    
+    def getTitle(self) -> str:
+        return self._title
+    
+    def setTitle(self, title: str) -> None:
+        self._title = title
+    
+    def resize(self, w: int, h: int) -> None:
+        self._size = (w, h)
+    
+    def move(self, x: int, y: int) -> None: ...
+    
+    def destroy(self) -> None:
+        for callback in self._closed_callbacks:
+            callback()
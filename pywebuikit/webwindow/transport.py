@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import base64
+import struct
+import socket
+import hashlib
+import secrets
+import typing
+import threading
+import concurrent.futures
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+def encode_frame(opcode: int, payload: bytes) -> bytes:
+    # server frames are never masked
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+def _unmask(mask: bytes, data: bytes) -> bytes:
+    n = len(data)
+    key = int.from_bytes((mask * (n // 4 + 1))[:n], "little")
+    return (int.from_bytes(data, "little") ^ key).to_bytes(n, "little")
+
+class SocketTransport:
+    """
+    one long-lived localhost websocket to the page, messages are delivered in order and acked by the page,
+    text messages are "<seq> <kind>\\n<body>", kind e: eval body, b / bt: r2evalbatch(JSON.parse(body)) (bt timed),
+    binary messages are <u32 seq><u32 header length><json header><payload>, the header names a r2socket_handlers entry,
+    the page answers with "<seq>" or with [seq, ok, value] for messages which want a result,
+    send blocks while max_unacked messages are waiting for their ack
+    """
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, max_unacked: int = 64):
+        self.max_unacked = max_unacked
+        self.token = secrets.token_hex(16)
+        self.stats: dict[str, int] = {"messages": 0, "bytes": 0}
+        
+        self._listener = socket.create_server((host, port))
+        self._conn: socket.socket|None = None
+        self._connected = threading.Event()
+        self._closed = False
+        
+        self._cond = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._next_seq = 0
+        self._acked = -1
+        self._results: dict[int, concurrent.futures.Future] = {}
+        
+        threading.Thread(target=self._accept, daemon=True).start()
+    
+    @property
+    def url(self) -> str:
+        host, port = self._listener.getsockname()[:2]
+        return f"ws://{host}:{port}/r2socket/{self.token}"
+    
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set() and not self._closed
+    
+    @property
+    def pending(self) -> int:
+        return self._next_seq - 1 - self._acked
+    
+    def wait_connected(self, timeout: float|None = None) -> bool:
+        return self._connected.wait(timeout)
+    
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            
+            try:
+                if self._handshake(conn):
+                    break
+            except OSError:
+                pass
+            conn.close()
+        else:
+            return
+        
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._conn = conn
+        self._connected.set()
+        self._listener.close()
+        self._read_loop()
+    
+    def _handshake(self, conn: socket.socket) -> bool:
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = conn.recv(4096)
+            if not chunk or len(request) > 65536:
+                return False
+            request += chunk
+        
+        lines = request.split(b"\r\n\r\n", 1)[0].decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ")
+        headers = {
+            name.strip().lower(): value.strip()
+            for name, _, value in (line.partition(":") for line in lines[1:])
+        }
+        
+        key = headers.get("sec-websocket-key")
+        if len(parts) < 2 or parts[1] != f"/r2socket/{self.token}" or key is None:
+            conn.sendall(b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return False
+        
+        accept = base64.b64encode(hashlib.sha1(key.encode("latin-1") + _WS_GUID).digest()).decode("ascii")
+        conn.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode("latin-1"))
+        return True
+    
+    def _recv_exact(self, n: int) -> bytes:
+        data = bytearray()
+        while len(data) < n:
+            chunk = self._conn.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("websocket closed by the page")
+            data += chunk
+        return bytes(data)
+    
+    def _read_frame(self) -> tuple[bool, int, bytes]:
+        b1, b2 = self._recv_exact(2)
+        n = b2 & 0x7F
+        if n == 126:
+            n, = struct.unpack("!H", self._recv_exact(2))
+        elif n == 127:
+            n, = struct.unpack("!Q", self._recv_exact(8))
+        
+        mask = self._recv_exact(4) if b2 & 0x80 else None
+        payload = self._recv_exact(n)
+        return bool(b1 & 0x80), b1 & 0x0F, payload if mask is None else _unmask(mask, payload)
+    
+    def _read_loop(self):
+        message = bytearray()
+        message_opcode = OP_TEXT
+        
+        try:
+            while True:
+                fin, opcode, payload = self._read_frame()
+                
+                if opcode == OP_CLOSE:
+                    break
+                elif opcode == OP_PING:
+                    with self._send_lock:
+                        self._conn.sendall(encode_frame(OP_PONG, payload))
+                    continue
+                elif opcode == OP_PONG:
+                    continue
+                
+                if opcode != OP_CONTINUATION:
+                    message_opcode = opcode
+                message += payload
+                
+                if fin:
+                    if message_opcode == OP_TEXT:
+                        self._on_ack(message.decode("utf-8"))
+                    message = bytearray()
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            self.close()
+    
+    def _on_ack(self, text: str):
+        if text.startswith("["):
+            seq, ok, value = json.loads(text)
+        else:
+            seq, ok, value = int(text), True, None
+        
+        with self._cond:
+            # delivery is ordered, an ack covers every earlier message
+            self._acked = max(self._acked, seq)
+            future = self._results.pop(seq, None)
+            self._cond.notify_all()
+        
+        if future is not None:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(RuntimeError(value))
+    
+    def _send(self, opcode: int, build: typing.Callable[[int], bytes], want_result: bool) -> concurrent.futures.Future|None:
+        if not self.connected:
+            raise ConnectionError("transport is not connected")
+        
+        future = concurrent.futures.Future() if want_result else None
+        
+        # wait for room without the send lock, the reader thread needs it to answer pings
+        with self._cond:
+            while self._next_seq - 1 - self._acked >= self.max_unacked and not self._closed:
+                self._cond.wait()
+        
+        with self._send_lock:
+            with self._cond:
+                if self._closed:
+                    raise ConnectionError("transport is closed")
+                
+                seq = self._next_seq
+                self._next_seq += 1
+                if future is not None:
+                    self._results[seq] = future
+            
+            frame = encode_frame(opcode, build(seq))
+            self._conn.sendall(frame)
+            self.stats["messages"] += 1
+            self.stats["bytes"] += len(frame)
+        
+        return future
+    
+    def send_code(self, code: str) -> None:
+        self._send(OP_TEXT, lambda seq: f"{seq} e\n{code}".encode("utf-8"), False)
+    
+    def send_batch(self, codes: list[str], timed: bool = False) -> concurrent.futures.Future:
+        """
+        the future resolves to the r2evalbatch results, [[ok, value], ...] (+ page time in ms when timed)
+        """
+        
+        body = json.dumps(codes)
+        return self._send(OP_TEXT, lambda seq: f"{seq} {"bt" if timed else "b"}\n{body}".encode("utf-8"), True)
+    
+    def send_binary(self, handler: str, payload: bytes|memoryview, **meta: typing.Any) -> None:
+        header = json.dumps({"handler": handler, **meta}).encode("utf-8")
+        self._send(OP_BINARY, lambda seq: struct.pack("<II", seq, len(header)) + header + payload, False)
+    
+    def drain(self, timeout: float|None = None) -> bool:
+        # waits until the page acked everything sent so far
+        with self._cond:
+            target = self._next_seq - 1
+            return self._cond.wait_for(lambda: self._acked >= target or self._closed, timeout)
+    
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            futures = list(self._results.values())
+            self._results.clear()
+            self._cond.notify_all()
+        
+        for future in futures:
+            future.set_exception(ConnectionError("transport closed"))
+        
+        self._listener.close()
+        if self._conn is not None:
+            try:
+                with self._send_lock:
+                    self._conn.sendall(encode_frame(OP_CLOSE, b""))
+            except OSError:
+                pass
+            self._conn.close()
@@ -17,6 +17,7 @@ setuptools.setup(
         "Operating System :: Microsoft :: Windows"
     ],
     install_requires = ["pywebview==5.2"],
+    extras_require = {"numpy": ["numpy"], "pillow": ["Pillow"]},
     license = "MIT License",
     python_requires = ">=3.12.0"
 )
\ No newline at end of file
@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+
+# importing webwindow writes the page to PYWEBUIKIT_HTML_PATH, keep it out of the working tree
+os.environ.setdefault("PYWEBUIKIT_HTML_PATH", os.path.join(tempfile.gettempdir(), "pywebuikit_tests.html"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from pywebuikit import webwindow
+from pywebuikit.webwindow.backends import HeadlessBackend
+
+@pytest.fixture
+def window():
+    window = webwindow.WebWindow(800, 600, 0, 0, backend=HeadlessBackend())
+    window.backend.clear()
+    yield window
+    window.desotroy()
+    window.fserver.shutdown()
+    window.fserver.server_close()
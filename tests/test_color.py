@@ -0,0 +1,45 @@
+import pytest
+
+from pywebuikit import jsbridge
+from pywebuikit.public_objects import Color
+
+@pytest.fixture
+def class_flags():
+    yield
+    Color.checkvalue = False
+    Color.jstoint = False
+
+def test_instance_flags():
+    c = Color("#fff")
+    c.checkvalue = True
+    c.r = 300
+    assert c.r == 255
+    
+    other = Color("#fff")
+    other.r = 300
+    assert other.r == 300
+
+def test_jstoint_changes_cached_js():
+    c = Color(1.5, 2.5, 3.5)
+    assert jsbridge.stringify_pyobj(c) == "'rgba(1.5, 2.5, 3.5, 1.0)'"
+    
+    c.jstoint = True
+    assert jsbridge.stringify_pyobj(c) == "'rgba(1, 2, 3, 1.0)'"
+    assert jsbridge.stringify_pyobj(Color(1.5, 2.5, 3.5)) == "'rgba(1.5, 2.5, 3.5, 1.0)'"
+    
+    c.jstoint = None
+    assert jsbridge.stringify_pyobj(c) == "'rgba(1.5, 2.5, 3.5, 1.0)'"
+
+def test_class_flags_are_the_default(class_flags):
+    c, own = Color(1.5, 2.5, 3.5), Color(1.5, 2.5, 3.5)
+    own.jstoint = False
+    jsbridge.stringify_pyobj(c)
+    
+    Color.jstoint = True
+    assert Color.jstoint is True
+    assert c.jstoint is True
+    assert jsbridge.stringify_pyobj(c) == "'rgba(1, 2, 3, 1.0)'"
+    assert jsbridge.stringify_pyobj(own) == "'rgba(1.5, 2.5, 3.5, 1.0)'"
+    
+    Color.checkvalue = True
+    assert Color(300, 0, 0).r == 255
@@ -0,0 +1,58 @@
+import json
+import shutil
+import subprocess
+import importlib.resources as resources
+
+import pytest
+
+from pywebuikit import jsbridge
+from pywebuikit.render import command_buffer
+
+def page_function(name):
+    html = resources.files("pywebuikit.webwindow").joinpath("builtin_pywebuikit.html").read_text("utf-8")
+    start = html.index(f"    function {name}(")
+    return html[start:html.index("\n    }\n", start) + 6]
+
+def replay(window, cmdbuf):
+    # runs the flushed buffer through the page's r2cmdbuf in node, against a context recording its calls
+    window.backend.clear()
+    cmdbuf.flush()
+    script = "\n".join((
+        "var calls = [];",
+        "var ctx = new Proxy({}, {get: (_, name) => (...args) => calls.push([name, ...args]), set: (_, name, v) => calls.push([name, v])});",
+        "function r2eval(c) { return eval(c); }",
+        f"var r2cmdbuf_ops = {jsbridge.iterable2jsarray(command_buffer.OPNAMES)};",
+        page_function("r2cmdbuf"),
+        *window.backend.commands,
+        "console.log(JSON.stringify(calls));"
+    ))
+    return json.loads(subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout)
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_operands_see_earlier_evals(window):
+    cmdbuf = command_buffer.CommandBuffer(window)
+    k = jsbridge.JavaScriptVariable("k")
+    
+    cmdbuf.eval("k = 1;")
+    cmdbuf.call_method("ctx", "fillRect", (k, 0, 1, 1))
+    cmdbuf.eval("k = 2;")
+    cmdbuf.call_method("ctx", "fillRect", (k, 0, 1, 1))
+    cmdbuf.set_attribute("ctx", "lineWidth", k)
+    
+    assert replay(window, cmdbuf) == [["fillRect", 1, 0, 1, 1], ["fillRect", 2, 0, 1, 1], ["lineWidth", 2]]
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_operand_evaluated_once_between_evals(window):
+    cmdbuf = command_buffer.CommandBuffer(window)
+    counter = jsbridge.JavaScriptVariable("(++n)")
+    
+    cmdbuf.eval("n = 0;")
+    cmdbuf.call_method("ctx", "lineTo", (counter, counter))
+    cmdbuf.call_method("ctx", "lineTo", (counter, 0))
+    
+    assert replay(window, cmdbuf) == [["lineTo", 1, 1], ["lineTo", 1, 0]]
+
+def test_large_int_goes_through_pool(window):
+    cmdbuf = command_buffer.CommandBuffer(window)
+    cmdbuf.call_method("ctx", "lineTo", (2 ** 1100, 0))
+    assert str(2 ** 1100) in cmdbuf.encode()
@@ -0,0 +1,39 @@
+from pywebuikit import render
+from pywebuikit.render import render_items
+
+class Untracked:
+    # no popDirty, the manager can not know what changed
+    def __init__(self):
+        self.update = lambda t: None
+    
+    def itemType(self):
+        return "untracked"
+    
+    def boundingBox(self):
+        return (10, 10, 20, 20)
+
+def make_manager(window, items):
+    rd = render.Context2DRender_Extended(window)
+    manager = render.Canvas2DRenderManager(rd, items, dirty_rects=True, viewport=(800, 600))
+    manager.renderMethods["untracked"] = lambda cvr, item, t: cvr.fillRect(*item.boundingBox())
+    return manager
+
+def test_untracked_item_is_always_redrawn(window):
+    manager = make_manager(window, [Untracked()])
+    manager.render(0)
+    
+    manager.render(1)
+    assert manager.stats["regions"] == 1
+    assert manager.stats["items_redrawn"] == 1
+
+def test_unchanged_tracked_item_is_skipped(window):
+    rect = render_items.Rectangle(10, 10, 20, 20)
+    manager = make_manager(window, [rect])
+    manager.render(0)
+    
+    manager.render(1)
+    assert manager.stats["regions"] == 0
+    
+    rect.x = 15
+    manager.render(2)
+    assert manager.stats["items_redrawn"] == 1
@@ -0,0 +1,39 @@
+import gc
+import weakref
+
+from pywebuikit import render
+
+def record_gauge(rd):
+    with rd.record("gauge") as rec:
+        rd.fillRect(0, 0, rec.param("width"), 10)
+    return rec
+
+def test_params_pass_overload_checks(window):
+    rd = render.Context2DRender(window)
+    rec = record_gauge(rd)
+    assert "ctx.fillRect(0,0,p_width,10);" in rec.defineCode()
+
+def test_dropped_renderer_deletes_its_lists(window):
+    rd = render.Context2DRender(window)
+    var = record_gauge(rd).var
+    ref = weakref.ref(rd)
+    window.backend.clear()
+    
+    del rd
+    gc.collect()
+    
+    assert ref() is None
+    assert f"delete {var};" in window.backend.commands
+
+def test_release_deletes_once(window):
+    rd = render.Context2DRender(window)
+    rec = record_gauge(rd)
+    rec_var = rec.var
+    window.backend.clear()
+    
+    rd.releaseRecording("gauge")
+    rec.release()
+    del rec
+    gc.collect()
+    
+    assert window.backend.commands == [f"delete {rec_var};"]
@@ -0,0 +1,79 @@
+import time
+import threading
+import concurrent.futures
+
+from pywebuikit import render
+
+def test_frame_sends_one_batch(window):
+    with window.frame():
+        futures = [window.evaluate_js(f"{i};") for i in range(3)]
+        assert all(isinstance(future, concurrent.futures.Future) for future in futures)
+        assert window.backend.bridge_calls == 0
+    
+    assert window.backend.bridge_calls == 1
+    assert window.backend.commands == ["0;", "1;", "2;"]
+    assert all(future.done() for future in futures)
+
+def test_thread_outside_frame_gets_value(window):
+    entered, release = threading.Event(), threading.Event()
+    
+    def producer():
+        with window.frame():
+            window.evaluate_js("queued;")
+            entered.set()
+            release.wait(5)
+    
+    thread = threading.Thread(target=producer)
+    thread.start()
+    entered.wait(5)
+    
+    try:
+        assert window.evaluate_js("window.innerWidth;") == 800
+        # the other thread's queued code went to the window first
+        assert window.backend.commands == ["queued;", "window.innerWidth;"]
+    finally:
+        release.set()
+        thread.join(5)
+
+def test_concurrent_frame_exits_flush_command_buffer(window):
+    rd = render.Context2DRender(window, cmdbuf=True)
+    window.backend.clear()
+    
+    for _ in range(50):
+        barrier = threading.Barrier(2)
+        
+        def producer():
+            with window.frame():
+                rd.fillRect(0, 0, 1, 1)
+                barrier.wait(5)
+        
+        threads = [threading.Thread(target=producer) for _ in range(2)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join(5)
+        
+        assert not window.jsbatch.active
+        assert len(window.cmdbuf) == 0
+        assert len(window.jsbatch) == 0
+    
+    assert sum(code.count(",14,4,") for code in window.backend.commands) == 100
+
+def test_wait_jspromise_inside_frame_does_not_wait_for_timer(window):
+    window.jsbatch.max_age = None
+    
+    with window.frame():
+        future = concurrent.futures.ThreadPoolExecutor(1).submit(window.wait_jspromise, "Promise.resolve(1)", 2)
+        assert future.result(5) is None # the headless page settles every request with null
+
+def test_max_age_flushes_without_a_thread(window):
+    window.jsbatch.max_age = 0.05
+    threads = threading.active_count()
+    
+    with window.frame():
+        first = window.evaluate_js("0;")
+        assert threading.active_count() == threads
+        time.sleep(0.06)
+        assert not first.done()
+        
+        window.evaluate_js("1;")
+        assert first.done()
+        assert window.backend.bridge_calls == 1
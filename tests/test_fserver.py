@@ -0,0 +1,94 @@
+import http.client
+
+import pytest
+
+def request(window, method, path, **headers):
+    connection = http.client.HTTPConnection("localhost", window.fserver_port, timeout=5)
+    try:
+        connection.request(method, path, headers=headers)
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+@pytest.fixture
+def served(window):
+    window.fserver_res["/data.bin"] = bytes(range(100))
+    window.fserver_res["/empty.bin"] = b""
+    return window
+
+def test_etag_revalidation(served):
+    status, headers, body = request(served, "GET", "/data.bin")
+    assert status == 200 and body == bytes(range(100))
+    
+    status, _, body = request(served, "GET", "/data.bin", **{"If-None-Match": headers["ETag"]})
+    assert status == 304 and body == b""
+    
+    status, _, _ = request(served, "GET", "/data.bin", **{"If-None-Match": "\"other\""})
+    assert status == 200
+
+@pytest.mark.parametrize("value, expected, content_range", [
+    ("bytes=10-19", bytes(range(10, 20)), "bytes 10-19/100"),
+    ("bytes=90-", bytes(range(90, 100)), "bytes 90-99/100"),
+    ("bytes=-5", bytes(range(95, 100)), "bytes 95-99/100"),
+    ("bytes=95-1000", bytes(range(95, 100)), "bytes 95-99/100"),
+])
+def test_range(served, value, expected, content_range):
+    status, headers, body = request(served, "GET", "/data.bin", Range=value)
+    assert status == 206
+    assert body == expected
+    assert headers["Content-Range"] == content_range
+
+@pytest.mark.parametrize("path, value", [
+    ("/data.bin", "bytes=100-"),
+    ("/data.bin", "bytes=20-10"),
+    ("/data.bin", "bytes=-0"),
+    ("/empty.bin", "bytes=-5"),
+    ("/empty.bin", "bytes=0-"),
+])
+def test_unsatisfiable_range(served, path, value):
+    status, headers, body = request(served, "GET", path, Range=value)
+    assert status == 416
+    assert headers["Content-Range"] == f"bytes */{len(served.fserver_res[path])}"
+    assert body == b""
+
+def test_if_range_mismatch_sends_everything(served):
+    status, _, body = request(served, "GET", "/data.bin", Range="bytes=0-9", **{"If-Range": "\"stale\""})
+    assert status == 200 and len(body) == 100
+
+def test_unknown_path(served):
+    assert request(served, "GET", "/missing.bin")[0] == 404
+
+def post(window, path, headers, body=b""):
+    connection = http.client.HTTPConnection("localhost", window.fserver_port, timeout=5)
+    try:
+        connection.putrequest("POST", path)
+        for name, value in headers.items():
+            connection.putheader(name, value)
+        connection.endheaders(body)
+        return connection.getresponse().status
+    finally:
+        connection.close()
+
+def test_upload(window):
+    received = []
+    window.fserver_uploads["/up"] = received.append
+    assert post(window, "/up", {"Content-Length": "3"}, b"abc") == 204
+    assert received == [bytearray(b"abc")]
+
+@pytest.mark.parametrize("headers, status", [
+    ({}, 411),
+    ({"Content-Length": "abc"}, 400),
+    ({"Content-Length": "-1"}, 400),
+    ({"Content-Length": str(1 << 40)}, 413),
+])
+def test_upload_bad_length(window, headers, status):
+    window.fserver_uploads["/up"] = lambda body: None
+    assert post(window, "/up", headers) == status
+
+def test_upload_handler_error(window):
+    def handler(body):
+        raise RuntimeError("broken")
+    
+    window.fserver_uploads["/up"] = handler
+    assert post(window, "/up", {"Content-Length": "1"}, b"x") == 500
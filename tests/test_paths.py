@@ -0,0 +1,41 @@
+from pywebuikit import render
+from pywebuikit.render import path
+
+def square(x):
+    return path.PathBuilder().rect(x, 0, 10, 10)
+
+def test_path2d_cache_evicts_least_recently_used(window):
+    cache = path.Path2DCache(window, max_size=2)
+    a, b = cache.get(square(0)), cache.get(square(1))
+    assert cache.get(square(0)) is a
+    
+    window.backend.clear()
+    c = cache.get(square(2))
+    assert len(cache) == 2
+    assert cache.stats == {"hits": 1, "misses": 3, "evictions": 1}
+    
+    # b was used least recently, its delete goes with the code creating c
+    assert window.backend.commands == [f"delete {b.v};{c.v} = new Path2D(\"{square(2).data()}\");"]
+    assert cache.get(square(0)) is a
+    assert cache.get(square(1)) is not b
+
+def test_clear_releases_with_next_path(window):
+    cache = path.Path2DCache(window)
+    a = cache.get(square(0))
+    cache.clear()
+    
+    window.backend.clear()
+    cache.get(square(0))
+    assert window.backend.commands[0].startswith(f"delete {a.v};")
+
+def test_geometry_helpers_draw_inline(window):
+    rd = render.Context2DRender_Extended(window)
+    window.backend.clear()
+    
+    rd.clipDiagonalRect_BySize(0, 0, 100, 50, 0.2)
+    rd.drawTriangle(0, 0, 10, 0, 0, 10, "red")
+    assert window.path2d_cache is None
+    assert any(code.endswith("ctx.clip();") for code in window.backend.commands)
+    
+    rd.fill(rd.diagonalRectPath(0, 0, 100, 50, 0.2))
+    assert len(window.path2d_cache) == 1
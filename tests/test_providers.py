@@ -0,0 +1,40 @@
+import pytest
+
+from pywebuikit import fserver
+from pywebuikit.fserver import providers
+
+@pytest.mark.parametrize("path, expected", [
+    ("/res/a.png", "a.png"),
+    ("/res/dir/a.png", "dir/a.png"),
+    ("/res/dir/../a.png", "a.png"),
+    ("/res//a.png", None),
+    ("/res/../secret", None),
+    ("/res/dir/../../secret", None),
+    ("/res/..", None),
+    ("/res/", None),
+    ("/res", None),
+    ("/resources/a.png", None),
+    ("/other/a.png", None),
+])
+def test_relative(path, expected):
+    assert providers._relative("/res/", path) == expected
+
+def test_directory_provider_stays_in_root(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "a.txt").write_bytes(b"a")
+    (tmp_path / "secret.txt").write_bytes(b"secret")
+    
+    provider = fserver.DirectoryProvider("/res", str(root))
+    resource = provider.open("/res/a.txt")
+    assert resource is not None and resource.size == 1
+    resource.close()
+    
+    assert provider.open("/res/../secret.txt") is None
+    assert provider.open("/res/missing.txt") is None
+
+def test_base_classes_are_abstract():
+    with pytest.raises(TypeError):
+        fserver.ResourceProvider()
+    with pytest.raises(TypeError):
+        fserver.Resource(0, "\"\"")
@@ -0,0 +1,27 @@
+import concurrent.futures
+
+from pywebuikit import render
+
+def make_worker_renderer(window):
+    rd = render.Context2DRender_Extended(window)
+    rd.create_mainCanvas(worker=True)
+    window.backend.clear()
+    return rd
+
+def test_value_calls_in_frame_return_futures(window):
+    rd = make_worker_renderer(window)
+    
+    with window.frame():
+        future = rd.getAttribute("lineWidth")
+        assert isinstance(future, concurrent.futures.Future)
+        assert isinstance(rd.measureText("text"), concurrent.futures.Future)
+        assert window.backend.bridge_calls == 0
+    
+    assert window.backend.bridge_calls == 1
+    assert future.done() and future.result() is None
+    assert all("r2worker_request" in code for code in window.backend.commands)
+
+def test_value_calls_outside_frame_wait(window):
+    rd = make_worker_renderer(window)
+    assert rd.getAttribute("lineWidth") is None
+    assert window.backend.bridge_calls == 1
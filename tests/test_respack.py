@@ -0,0 +1,59 @@
+import json
+import http.client
+
+from pywebuikit import respack
+
+def fetch(window, path):
+    connection = http.client.HTTPConnection("localhost", window.fserver_port, timeout=5)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+def make_builder(tmp_path):
+    (tmp_path / "b.bin").write_bytes(b"bbbb")
+    return respack.ResPackBuilder().add("a", b"aa").addFile("b", str(tmp_path / "b.bin")).add("c", b"c")
+
+def test_build_index_offsets(tmp_path):
+    pack = make_builder(tmp_path).build()
+    
+    assert pack.index == [("a", (0, 2)), ("b", (2, 4)), ("c", (6, 1))]
+    assert pack.data == b"aabbbbc"
+    assert [pack.read(name) for name in pack.names] == [b"aa", b"bbbb", b"c"]
+    assert "b" in pack and "d" not in pack
+
+def test_write_and_load(tmp_path):
+    path = str(tmp_path / "assets.respack")
+    written = make_builder(tmp_path).write(path)
+    
+    with open(f"{path}.json", "r", encoding="utf-8") as f:
+        assert json.load(f) == [["a", [0, 2]], ["b", [2, 4]], ["c", [6, 1]]]
+    
+    loaded = respack.ResPack.load(path)
+    assert loaded.index == written.index
+    assert loaded.read("b") == b"bbbb"
+
+def test_register_and_release_in_memory(window, tmp_path):
+    pack = make_builder(tmp_path).build()
+    registered = window.registerResPack(pack, "/packs/a")
+    
+    assert any(code.startswith(f"r2respack_register(\"{registered.name}\"") for code in window.backend.commands)
+    assert fetch(window, "/packs/a") == (200, b"aabbbbc")
+    
+    registered.release()
+    assert f"r2respack_release(\"{registered.name}\");" in window.backend.commands
+    assert "/packs/a" not in window.fserver_res
+    assert fetch(window, "/packs/a")[0] == 404
+
+def test_register_and_release_on_disk(window, tmp_path):
+    path = str(tmp_path / "assets.respack")
+    registered = window.registerResPack(make_builder(tmp_path).write(path), "/packs/b")
+    
+    assert registered.provider in window.fserver_providers
+    assert fetch(window, "/packs/b") == (200, b"aabbbbc")
+    
+    registered.release()
+    assert window.fserver_providers == []
+    assert fetch(window, "/packs/b")[0] == 404
@@ -0,0 +1,51 @@
+import pytest
+
+from pywebuikit import jsbridge
+from pywebuikit import render
+from pywebuikit.render import render_items
+
+def make_manager(window, items):
+    rd = render.Context2DRender_Extended(window)
+    manager = render.Canvas2DRenderManager(rd, items, retained=True)
+    window.backend.clear()
+    return manager
+
+def draws(window):
+    return [code for code in window.backend.commands if "r2scene_draw" in code or "drawImage" in code]
+
+def test_retained_keeps_list_order(window):
+    below, above = render_items.Rectangle(0, 0, 10, 10), render_items.Rectangle(5, 5, 10, 10)
+    image = render_items.Image(jsbridge.ImageBitmap("img"), 0, 0, 10, 10)
+    manager = make_manager(window, [below, image, above])
+    manager.render(0)
+    
+    codes = draws(window)
+    assert len(codes) == 3
+    assert codes[0].endswith("r2scene_draw(\"%s\", ctx, 0, 1);" % manager.scene)
+    assert "drawImage" in codes[1]
+    assert codes[2].endswith("r2scene_draw(\"%s\", ctx, 1, 2);" % manager.scene)
+
+def test_retained_skips_unchanged_frame(window):
+    rect = render_items.Rectangle(0, 0, 10, 10)
+    manager = make_manager(window, [rect])
+    manager.render(0)
+    assert draws(window)
+    
+    window.backend.clear()
+    manager.render(1)
+    assert draws(window) == []
+    
+    rect.x = 20
+    manager.render(2)
+    assert any("r2scene_sync" in code for code in window.backend.commands)
+    assert draws(window)
+    
+    window.backend.clear()
+    manager.invalidate()
+    manager.render(3)
+    assert draws(window)
+
+def test_retained_rejects_dirty_rects(window):
+    rd = render.Context2DRender_Extended(window)
+    with pytest.raises(ValueError):
+        render.Canvas2DRenderManager(rd, retained=True, dirty_rects=True)
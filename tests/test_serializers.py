@@ -0,0 +1,59 @@
+import enum
+
+import pytest
+
+from pywebuikit import jsbridge
+
+class Name(str): ...
+class Count(int): ...
+class Flag(enum.IntFlag):
+    A = 1
+
+class Base: ...
+class Derived(Base): ...
+
+@pytest.fixture
+def registry():
+    registered = []
+    
+    def register(t, serializer):
+        registered.append(t)
+        jsbridge.register_serializer(t, serializer)
+    
+    yield register
+    for t in registered:
+        jsbridge.unregister_serializer(t)
+
+def test_bool_is_not_an_int():
+    assert jsbridge.stringify_pyobj(True) == "true"
+    assert jsbridge.stringify_pyobj(1) == "1"
+    assert jsbridge.stringify_pyobj(1.5) == "1.5"
+    assert jsbridge.iterable2jsarray((1, True, 2.0, False)) == "[1,true,2.0,false]"
+    assert jsbridge.stringify_pyobj([float("inf"), float("nan")]) == "[Infinity,NaN]"
+
+def test_subclasses_use_base_serializer():
+    assert jsbridge.stringify_pyobj(Name("a")) == jsbridge.stringify_pyobj("a")
+    assert jsbridge.stringify_pyobj(Count(3)) == "3"
+    assert jsbridge.stringify_pyobj(Flag.A) == "1"
+
+def test_registered_serializer_overrides_base(registry):
+    registry(Base, lambda o: "base")
+    assert jsbridge.stringify_pyobj(Derived()) == "base"
+    
+    registry(Derived, lambda o: "derived")
+    assert jsbridge.stringify_pyobj(Derived()) == "derived"
+    assert jsbridge.stringify_pyobj(Base()) == "base"
+    
+    registry(Count, lambda o: f"BigInt({int(o)})")
+    assert jsbridge.stringify_pyobj(Count(3)) == "BigInt(3)"
+    assert jsbridge.stringify_pyobj(3) == "3"
+
+def test_unregister_clears_cache():
+    jsbridge.register_serializer(Derived, lambda o: "derived")
+    assert jsbridge.stringify_pyobj(Derived()) == "derived"
+    assert Derived in jsbridge._serializer_cache
+    
+    jsbridge.unregister_serializer(Derived)
+    assert Derived not in jsbridge._serializer_cache
+    with pytest.raises(TypeError):
+        jsbridge.stringify_pyobj(Derived())
@@ -0,0 +1,91 @@
+from pywebuikit import render
+from pywebuikit.render import shadow_state
+
+def make_shadow():
+    sent = []
+    shadow = shadow_state.ShadowState(
+        lambda method, args: sent.append((method, args)),
+        lambda name, value: sent.append((name, value))
+    )
+    return shadow, sent
+
+def test_unchanged_attribute_is_sent_once():
+    shadow, sent = make_shadow()
+    for _ in range(3):
+        shadow.setAttribute("fillStyle", "red")
+        shadow.sync()
+    
+    assert sent == [("fillStyle", "red")]
+    assert shadow.removedCommands() == 2
+
+def test_transforms_fold_into_one_set_transform():
+    shadow, sent = make_shadow()
+    shadow.call("resetTransform", ())
+    shadow.call("translate", (10, 20))
+    shadow.call("scale", (2, 2))
+    shadow.sync()
+    
+    assert sent == [("setTransform", (2.0, 0.0, 0.0, 2.0, 10.0, 20.0))]
+
+def test_frame_without_changes_sends_no_save():
+    shadow, sent = make_shadow()
+    shadow.setAttribute("fillStyle", "red")
+    shadow.sync()
+    
+    shadow.call("save", ())
+    shadow.setAttribute("fillStyle", "red")
+    shadow.sync()
+    shadow.call("restore", ())
+    shadow.sync()
+    
+    assert sent == [("fillStyle", "red")]
+
+def test_restore_save_pair_is_dropped():
+    shadow, sent = make_shadow()
+    shadow.setAttribute("fillStyle", "red")
+    
+    for color in ("blue", "green"):
+        shadow.call("save", ())
+        shadow.setAttribute("fillStyle", color)
+        shadow.sync()
+        shadow.call("restore", ())
+    shadow.sync()
+    
+    assert sent == [("fillStyle", "blue"), ("fillStyle", "green"), ("fillStyle", "red")]
+    assert shadow.stats["saves_sent"] == shadow.stats["restores_sent"] == 0
+
+def test_clip_needs_a_real_save():
+    shadow, sent = make_shadow()
+    shadow.call("save", ())
+    shadow.call("clip", ())
+    shadow.call("restore", ())
+    shadow.sync()
+    
+    assert sent == [("save", ()), ("clip", ()), ("restore", ())]
+
+def test_renderer_drops_redundant_calls(window):
+    rd = render.Context2DRender(window, state_tracking=True)
+    window.backend.clear()
+    
+    for _ in range(3):
+        rd.setAttribute("fillStyle", "red")
+        rd.fillRect(0, 0, 10, 10)
+    
+    assert len([code for code in window.backend.commands if "fillStyle" in code]) == 1
+    assert rd.shadow.stats["attributes_sent"] == 1
+
+def test_canvas_reset_invalidates_shadow(window):
+    rd = render.Context2DRender(window, state_tracking=True)
+    window.backend.clear()
+    
+    rd.setAttribute("fillStyle", "red")
+    rd.setTransform(2, 0, 0, 2, 0, 0)
+    rd.fillRect(0, 0, 10, 10)
+    
+    # the page reports a resize, which reset the context
+    window.jsapi.canvas_reset()
+    rd.setAttribute("fillStyle", "red")
+    rd.fillRect(0, 0, 10, 10)
+    
+    assert len([code for code in window.backend.commands if "fillStyle" in code]) == 2
+    assert len([code for code in window.backend.commands if "setTransform" in code]) == 2